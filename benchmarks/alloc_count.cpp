@@ -0,0 +1,31 @@
+// Counts the heap allocations of a benchmark program. runtime.py links it
+// into the generated and the hand-written kernels, the count is printed to
+// stderr when the program exits.
+#include <cstdio>
+#include <cstdlib>
+#include <new>
+
+static unsigned long long allocations = 0;
+
+void* operator new(std::size_t size) {
+    allocations++;
+    if (void* p = std::malloc(size ? size : 1)) {
+        return p;
+    }
+    throw std::bad_alloc();
+}
+
+void operator delete(void* p) noexcept {
+    std::free(p);
+}
+
+void operator delete(void* p, std::size_t) noexcept {
+    std::free(p);
+}
+
+// destroyed after main returns
+static struct Report {
+    ~Report() {
+        std::fprintf(stderr, "allocations: %llu\n", allocations);
+    }
+} report;
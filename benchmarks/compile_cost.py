@@ -0,0 +1,187 @@
+# Measures what the generated code costs the C++ compiler.
+#
+#   python benchmarks/compile_cost.py                      run and compare with the baseline
+#   python benchmarks/compile_cost.py --update-baseline     store the results as the new baseline
+#   python benchmarks/compile_cost.py --cc clang++ --output results.json
+#
+# Transpiles the programs of benchmarks/corpus, then for every generated
+# source runs `-fsyntax-only` and a full `-O2 -c` compile with -ftime-report.
+# Reports per module the front-end time (setup, parsing and deferred
+# parsing), the back-end time (optimization and code generation), the share
+# of the front-end spent on the generated header and what it includes, and
+# the object size. Exits with 1 when a metric is worse than the baseline by
+# more than the threshold.
+
+import argparse
+import glob
+import json
+import os
+import platform
+import re
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bic import Project
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CORPUS = os.path.join(HERE, 'corpus')
+BASELINE = os.path.join(HERE, 'compile_baseline.json')
+
+# metrics compared with the baseline, all lower is better
+METRICS = ['syntax', 'frontend', 'backend', 'object_size']
+
+FRONTEND_PHASES = ['phase setup', 'phase parsing', 'phase lang. deferred']
+BACKEND_PHASES = ['phase opt and generate']
+
+def get_options():
+    parser = argparse.ArgumentParser(description='Bic generated C++ compile cost benchmark')
+    parser.add_argument('--corpus', default=CORPUS, help='folder of the .bic programs')
+    parser.add_argument('--cc', default='g++', help='the c++ compiler')
+    parser.add_argument('--cxxflags', default='-std=c++17', help='flags passed to every compile')
+    parser.add_argument('--repeat', type=int, default=5, help='compiles per measure, the fastest one is kept')
+    parser.add_argument('--output', help='write the results to this json file')
+    parser.add_argument('--baseline', default=BASELINE, help='results to compare with')
+    parser.add_argument('--threshold', type=float, default=0.5, help='allowed relative regression of the timings and sizes')
+    parser.add_argument('--update-baseline', action='store_true', help='store the results as the baseline')
+    return parser.parse_args()
+
+# parse_time_report: phase -> wall seconds of the -ftime-report output
+def parse_time_report(text):
+    phases = {}
+    for line in text.splitlines():
+        match = re.match(r'^\s*(phase [^:]+?|TOTAL)\s*:(.*)$', line)
+        if not match:
+            continue
+        # usr, sys and wall, followed by the garbage collector memory
+        numbers = re.findall(r'(\d+\.\d+)', match.group(2))
+        if len(numbers) >= 3:
+            phases[match.group(1)] = float(numbers[2])
+    return phases
+
+# compile: fastest run of command and fastest time of every -ftime-report
+# phase over the runs
+def compile(command, repeat, cwd, stdin=None):
+    best = float('inf')
+    phases = {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        process = subprocess.run(command, cwd=cwd, input=stdin, capture_output=True, text=True)
+        best = min(best, time.perf_counter() - start)
+        if process.returncode != 0:
+            raise Exception(f'{" ".join(command)} failed:\n{process.stderr}')
+
+        for phase, wall in parse_time_report(process.stderr).items():
+            phases[phase] = min(phases.get(phase, wall), wall)
+    return best, phases
+
+def transpile(corpus, folder):
+    for filename in glob.glob(os.path.join(corpus, '*.bic')):
+        shutil.copy(filename, folder)
+
+    filenames = sorted(os.path.basename(f) for f in glob.glob(os.path.join(folder, '*.bic')))
+    cwd = os.getcwd()
+    os.chdir(folder)
+    try:
+        project = Project(filenames)
+        project.parse()
+        project.generate()
+        for module in project.modules:
+            project.write_module(module, 'build/')
+    finally:
+        os.chdir(cwd)
+    return project
+
+def measure_module(module, options, build):
+    flags = shlex.split(options.cxxflags)
+    source = module.name + '.cpp'
+    header = module.name + '.hpp'
+
+    syntax, _ = compile([options.cc, *flags, '-fsyntax-only', source], options.repeat, build)
+
+    # the header alone, from a source that only includes it
+    header_syntax, _ = compile([options.cc, *flags, '-fsyntax-only', '-x', 'c++', '-'], options.repeat, build, f'#include "{header}"\n')
+
+    obj = module.name + '.o'
+    _, phases = compile([options.cc, *flags, '-O2', '-ftime-report', '-c', source, '-o', obj], options.repeat, build)
+
+    return {
+        'syntax': syntax,
+        'frontend': sum(phases.get(phase, 0.0) for phase in FRONTEND_PHASES),
+        'backend': sum(phases.get(phase, 0.0) for phase in BACKEND_PHASES),
+        'header_share': min(1.0, header_syntax / syntax) if syntax else 0.0,
+        'object_size': os.path.getsize(os.path.join(build, obj)),
+    }
+
+# compare: regressions of results against baseline
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results['modules'].items():
+        base = baseline.get('modules', {}).get(name)
+        if base is None:
+            continue
+
+        for metric in METRICS:
+            # timings below the -ftime-report resolution are noise
+            if metric != 'object_size' and base[metric] < 0.02:
+                continue
+            if base[metric] and result[metric] / base[metric] > 1 + threshold:
+                regressions.append((name, metric, base[metric], result[metric]))
+    return regressions
+
+def main():
+    options = get_options()
+
+    results = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'compiler': subprocess.run([options.cc, '--version'], capture_output=True, text=True).stdout.splitlines()[0],
+        'cxxflags': options.cxxflags,
+        'modules': {},
+    }
+
+    print(f'{"module":<16}{"syntax s":>10}{"front s":>10}{"back s":>10}{"header":>9}{"object B":>11}')
+    with tempfile.TemporaryDirectory() as folder:
+        project = transpile(options.corpus, folder)
+        build = os.path.join(folder, 'build')
+
+        for module in project.modules:
+            result = measure_module(module, options, build)
+            results['modules'][module.name] = result
+            print(f'{module.name:<16}{result["syntax"]:>10.3f}{result["frontend"]:>10.2f}{result["backend"]:>10.2f}{result["header_share"]:>9.0%}{result["object_size"]:>11,}')
+
+    if options.output:
+        with open(options.output, 'w') as file:
+            json.dump(results, file, indent=4)
+
+    if options.update_baseline:
+        with open(options.baseline, 'w') as file:
+            json.dump(results, file, indent=4)
+        print(f'baseline written to {options.baseline}')
+        return
+
+    if not os.path.exists(options.baseline):
+        return
+
+    with open(options.baseline, 'r') as file:
+        baseline = json.load(file)
+
+    if baseline.get('compiler') != results['compiler'] or baseline.get('cxxflags') != results['cxxflags']:
+        print(f'baseline of {baseline.get("compiler")} {baseline.get("cxxflags")} not comparable, skipped')
+        return
+
+    regressions = compare(results, baseline, options.threshold)
+    for name, metric, before, after in regressions:
+        print(f'regression: {name} {metric} {before:,.3f} -> {after:,.3f}')
+
+    if regressions:
+        sys.exit(1)
+    print(f'no regressions over {options.threshold:.0%} against {options.baseline}')
+
+if __name__ == '__main__':
+    main()
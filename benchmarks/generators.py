@@ -0,0 +1,143 @@
+# Synthetic .bic workloads, every generator takes a size n and returns the
+# source text of a program that stresses one phase of the compiler.
+
+def flat(n):
+    """ n small functions one after the other. """
+    source = 'import "iostream";\n\n'
+    for i in range(n):
+        source += f'func{i}(a : int, b : int) -> int {{\n'
+        source += f'    mut x : int = a * {i} + b;\n'
+        source += f'    x += {i};\n'
+        source += '    ret x;\n'
+        source += '}\n\n'
+    return source
+
+def nested(n):
+    """ blocks and parentheses nested n levels deep. """
+    source = 'nested() -> int {\n    mut x : int = 0;\n'
+    for i in range(n):
+        source += '    ' * (i + 1) + 'if (x != 100) {\n'
+    source += '    ' * (n + 1) + 'x = ' + '(' * n + '1' + ' + 1)' * n + ';\n'
+    for i in reversed(range(n)):
+        source += '    ' * (i + 1) + '}\n'
+    source += '    ret x;\n}\n'
+    return source
+
+def operators(n):
+    """ one expression with a chain of n binary operators. """
+    ops = ['+', '-', '*', '/']
+    chain = 'a'
+    for i in range(n):
+        chain += f' {ops[i % len(ops)]} {i + 1}'
+    return f'chain(a : int) -> int {{\n    ret {chain};\n}}\n'
+
+def templates(n, depth=8):
+    """ n declarations of template types nested depth levels deep. """
+    source = 'import "vector";\nimport "map";\n\ntemplates() -> int {\n'
+    for i in range(n):
+        type = 'int'
+        for level in range(depth):
+            type = f'std::vector<{type}>' if (i + level) % 2 else f'std::map<int, {type}>'
+        source += f'    mut v{i} : {type};\n'
+    source += '    ret 0;\n}\n'
+    return source
+
+def classes(n, methods=20):
+    """ n classes with a field and methods each. """
+    source = ''
+    for i in range(n):
+        source += f'class Class{i} {{\n'
+        source += '    pub mut value : int;\n'
+        for m in range(methods):
+            source += f'    pub method{m}(x : int) -> int {{ ret .value + x * {m}; }}\n'
+        source += '}\n\n'
+    return source
+
+def enums(n):
+    """ one enum with n keys. """
+    keys = ',\n'.join(f'    Key{i} = {i}' for i in range(n))
+    return f'enum Large : int {{\n{keys}\n}}\n'
+
+def cpplit(n):
+    """ n functions made of cpp literal lines. """
+    source = ''
+    for i in range(n):
+        source += f'//: static int literal{i}() {{\n'
+        source += f'//:     return {i} * 2;\n'
+        source += '//: }\n'
+    return source
+
+# adversarial constructs for the scaling tests, n is the nesting depth or
+# the length of the construct
+
+def template_depth(n):
+    """ a declaration of a template type nested n levels deep. """
+    type = 'int'
+    for i in range(n):
+        type = f'Tpl{i}<{type}>'
+    return f'depth() -> int {{\n    mut v : {type};\n    ret 0;\n}}\n'
+
+def template_call(n):
+    """ a call at statement start with template arguments nested n levels deep. """
+    arg = '1'
+    for i in range(n):
+        arg = f'Tpl{i}<{arg}>'
+    return f'call() -> int {{\n    f<{arg}>(x);\n    ret 0;\n}}\n'
+
+def template_expr(n):
+    """ template arguments nested n levels deep around an expression that
+    starts like a type, both alternatives are tried at every level. """
+    arg = 'c * 1'
+    for i in range(n):
+        arg = f'Tpl{i}<{arg}>'
+    return f'expr() -> int {{\n    f<{arg}>(x);\n    ret 0;\n}}\n'
+
+def template_args(n):
+    """ a call at statement start with n template arguments. """
+    args = ', '.join(f'Tpl{i}<int>' for i in range(n))
+    return f'args() -> int {{\n    f<{args}>(x);\n    ret 0;\n}}\n'
+
+def call_chain(n):
+    """ n template calls nested as arguments of each other at statement start. """
+    expr = 'x'
+    for i in range(n):
+        expr = f'f{i}<int>({expr})'
+    return f'chain() -> int {{\n    {expr};\n    ret 0;\n}}\n'
+
+def parens(n):
+    """ an expression in n parentheses. """
+    return 'parens() -> int {\n    ret ' + '(' * n + '1' + ')' * n + ';\n}\n'
+
+def elifs(n):
+    """ an if with n elif branches. """
+    source = 'elifs(x : int) -> int {\n    if (x == 0) {\n        ret 0;\n    }\n'
+    for i in range(1, n + 1):
+        source += f'    elif (x == {i}) {{\n        ret {i};\n    }}\n'
+    source += '    ret -1;\n}\n'
+    return source
+
+WORKLOADS = {
+    'flat': (flat, 2000),
+    'nested': (nested, 60),
+    'operators': (operators, 2000),
+    'templates': (templates, 500),
+    'classes': (classes, 100),
+    'enums': (enums, 5000),
+    'cpplit': (cpplit, 5000),
+}
+
+# construct -> (generator, first size), sizes double from the first one
+SCALING = {
+    'flat': (flat, 100),
+    'nested': (nested, 20),
+    'operators': (operators, 100),
+    'classes': (classes, 5),
+    'enums': (enums, 250),
+    'template_depth': (template_depth, 40),
+    'template_call': (template_call, 40),
+    'template_expr': (template_expr, 16),
+    'template_args': (template_args, 25),
+    'call_chain': (call_chain, 20),
+    'parens': (parens, 40),
+    'elifs': (elifs, 50),
+}
@@ -0,0 +1,63 @@
+#include <iostream>
+#include <vector>
+
+class Shape {
+public:
+    virtual double area() const { return 0.0; }
+    virtual ~Shape() {}
+};
+
+class Circle : public Shape {
+public:
+    double radius;
+    Circle(double radius) : radius(radius) {}
+    double area() const override { return 3.14159265 * radius * radius; }
+};
+
+class Square : public Shape {
+public:
+    double side;
+    Square(double side) : side(side) {}
+    double area() const override { return side * side; }
+};
+
+class Triangle : public Shape {
+public:
+    double base;
+    double height;
+    Triangle(double base, double height) : base(base), height(height) {}
+    double area() const override { return 0.5 * base * height; }
+};
+
+double total_area(const std::vector<Shape*>& shapes) {
+    double total = 0.0;
+    for (const Shape* shape : shapes) {
+        total += shape->area();
+    }
+    return total;
+}
+
+int main() {
+    std::vector<Shape*> shapes;
+    for (int i = 0; i < 30000; i++) {
+        if (i % 3 == 0) {
+            shapes.push_back(new Circle(i * 0.001));
+        } else if (i % 3 == 1) {
+            shapes.push_back(new Square(i * 0.002));
+        } else {
+            shapes.push_back(new Triangle(i * 0.001, 2.0));
+        }
+    }
+
+    double total = 0.0;
+    for (int round = 0; round < 3000; round++) {
+        total += total_area(shapes);
+    }
+
+    for (Shape* shape : shapes) {
+        delete shape;
+    }
+
+    std::cout << total << std::endl;
+    return 0;
+}
@@ -0,0 +1,45 @@
+#include <iostream>
+#include <vector>
+
+enum class Op : int {
+    Add,
+    Sub,
+    Mul,
+    Mix,
+    Shift
+};
+
+int apply(Op op, int a, int b) {
+    switch (op) {
+    case Op::Add: return (a + b) % 1000003;
+    case Op::Sub: return (a - b) % 1000003;
+    case Op::Mul: return a * 3 % 1000003;
+    case Op::Mix: return (a * 31 + b) % 1000003;
+    default: return a >> 1;
+    }
+}
+
+int run(const std::vector<Op>& ops, int seed) {
+    int value = seed;
+    int i = 0;
+    for (Op op : ops) {
+        value = apply(op, value, i);
+        i++;
+    }
+    return value;
+}
+
+int main() {
+    std::vector<Op> ops;
+    for (int i = 0; i < 100000; i++) {
+        ops.push_back(static_cast<Op>((i * 7 + i / 3) % 5));
+    }
+
+    int total = 0;
+    for (int round = 0; round < 1000; round++) {
+        total += run(ops, round);
+    }
+
+    std::cout << total << std::endl;
+    return 0;
+}
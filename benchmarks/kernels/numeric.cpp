@@ -0,0 +1,42 @@
+#include <iostream>
+#include <vector>
+
+std::vector<double> matmul(const std::vector<double>& a, const std::vector<double>& b, int n) {
+    std::vector<double> c(n * n, 0.0);
+    for (int i = 0; i < n; i++) {
+        for (int k = 0; k < n; k++) {
+            const double x = a[i * n + k];
+            for (int j = 0; j < n; j++) {
+                c[i * n + j] += x * b[k * n + j];
+            }
+        }
+    }
+    return c;
+}
+
+double trace(const std::vector<double>& m, int n) {
+    double total = 0.0;
+    for (int i = 0; i < n; i++) {
+        total += m[i * n + i];
+    }
+    return total;
+}
+
+int main() {
+    const int n = 300;
+    std::vector<double> a(n * n);
+    std::vector<double> b(n * n);
+    for (int i = 0; i < n * n; i++) {
+        a[i] = (i % 17) * 0.25;
+        b[i] = (i % 13) * 0.5;
+    }
+
+    double total = 0.0;
+    for (int round = 0; round < 10; round++) {
+        total += trace(matmul(a, b, n), n);
+        a[round] += 1.0;
+    }
+
+    std::cout << total << std::endl;
+    return 0;
+}
@@ -0,0 +1,47 @@
+#include <iostream>
+
+class Vec3 {
+public:
+    double x;
+    double y;
+    double z;
+    Vec3(double x, double y, double z) : x(x), y(y), z(z) {}
+    double length2() const { return x * x + y * y + z * z; }
+    double spread(int n) const {
+        if (0 >= n) {
+            return z;
+        }
+        double rest = spread(n - 1);
+        return rest * 0.5 + x;
+    }
+};
+
+class Stats {
+public:
+    double sum = 0.0;
+    int count = 0;
+    void add(double value) {
+        sum += value;
+        count += 1;
+    }
+};
+
+int main() {
+    double total = 0.0;
+    Stats stats;
+    for (int i = 0; i < 20000000; ++i) {
+        Vec3 v(i * 0.5, 1.0, 2.0);
+        Vec3 w(1.0, i * 0.25, 3.0);
+        double spread = v.spread(i % 8);
+        double l = spread + v.length2();
+        stats.add(l + w.length2());
+
+        if (i % 1000 == 999) {
+            total += stats.sum / stats.count;
+            stats = Stats();
+        }
+    }
+
+    std::cout << total << std::endl;
+    return 0;
+}
@@ -0,0 +1,42 @@
+#include <iostream>
+#include <string>
+#include <vector>
+
+std::string join(const std::vector<std::string>& parts, const std::string& separator) {
+    std::string result;
+    bool first = true;
+    for (const std::string& part : parts) {
+        if (!first) {
+            result += separator;
+        }
+        result += part;
+        first = false;
+    }
+    return result;
+}
+
+int count_char(const std::string& text, char c) {
+    int count = 0;
+    for (char x : text) {
+        if (x == c) {
+            count++;
+        }
+    }
+    return count;
+}
+
+int main() {
+    std::vector<std::string> parts;
+    for (int i = 0; i < 2000; i++) {
+        parts.push_back("a fairly long string part number " + std::to_string(i));
+    }
+
+    int total = 0;
+    for (int round = 0; round < 1000; round++) {
+        const std::string text = join(parts, ", ");
+        total += count_char(text, ',');
+    }
+
+    std::cout << total << std::endl;
+    return 0;
+}
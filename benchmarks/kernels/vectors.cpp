@@ -0,0 +1,34 @@
+#include <iostream>
+#include <vector>
+
+double sum(const std::vector<double>& values) {
+    double total = 0.0;
+    for (double value : values) {
+        total += value;
+    }
+    return total;
+}
+
+std::vector<double> scaled(const std::vector<double>& values, double factor) {
+    std::vector<double> result(values.size());
+    for (size_t i = 0; i < values.size(); i++) {
+        result[i] = values[i] * factor;
+    }
+    return result;
+}
+
+int main() {
+    std::vector<double> values;
+    for (int i = 0; i < 100000; i++) {
+        values.push_back(i * 0.5);
+    }
+
+    double total = 0.0;
+    for (int round = 0; round < 2000; round++) {
+        total += sum(values);
+    }
+    total += sum(scaled(values, 2.0));
+
+    std::cout << total << std::endl;
+    return 0;
+}
@@ -0,0 +1,165 @@
+# Benchmarks the phases of the compiler on the synthetic workloads.
+#
+#   python benchmarks/run.py                      run and compare with the baseline
+#   python benchmarks/run.py --update-baseline    store the results as the new baseline
+#   python benchmarks/run.py -w flat,enums --scale 0.5 --output results.json
+#
+# Reports tokens/sec for the Lexer, AST nodes/sec for the Parser, output
+# bytes/sec for the CodeGenerator and the peak memory of the whole pipeline.
+# Exits with 1 when a metric is worse than the baseline by more than the
+# threshold.
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bic import Lexer, Parser, CodeGenerator, AST, walk
+from generators import WORKLOADS
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# metric -> True when higher is better
+METRICS = {
+    'tokens_per_sec': True,
+    'nodes_per_sec': True,
+    'bytes_per_sec': True,
+    'peak_memory': False,
+}
+
+def get_options():
+    parser = argparse.ArgumentParser(description='Bic compiler benchmarks')
+    parser.add_argument('-w', '--workloads', help='comma separated workloads to run', default=','.join(WORKLOADS))
+    parser.add_argument('--scale', type=float, default=1.0, help='multiplies the size of every workload')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per workload, the best one is kept')
+    parser.add_argument('--output', help='write the results to this json file')
+    parser.add_argument('--baseline', default=BASELINE, help='results to compare with')
+    parser.add_argument('--threshold', type=float, default=0.3, help='allowed relative regression')
+    parser.add_argument('--update-baseline', action='store_true', help='store the results as the baseline')
+    return parser.parse_args()
+
+def lex(filename):
+    lexer = Lexer(filename)
+    start = time.perf_counter()
+    count = 0
+    while lexer.get_next_token().type != 'EOF':
+        count += 1
+    return count, time.perf_counter() - start
+
+def parse(filename):
+    parser = Parser(Lexer(filename))
+    start = time.perf_counter()
+    tree = parser.parse()
+    elapsed = time.perf_counter() - start
+    return tree, sum(1 for node in walk(tree) if isinstance(node, AST)), elapsed
+
+def generate(tree, name):
+    cg = CodeGenerator(tree, name)
+    start = time.perf_counter()
+    cg.generate()
+    elapsed = time.perf_counter() - start
+    return len(cg.code.encode()) + len(cg.header.encode()), elapsed
+
+def peak_memory(filename, name):
+    tracemalloc.start()
+    tree = Parser(Lexer(filename)).parse()
+    CodeGenerator(tree, name).generate()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+def run_workload(name, size, repeat, folder):
+    generator, _ = WORKLOADS[name]
+    filename = os.path.join(folder, name + '.bic')
+    with open(filename, 'w') as file:
+        file.write(generator(size))
+
+    lex_time = parse_time = generate_time = float('inf')
+    for _ in range(repeat):
+        tokens, elapsed = lex(filename)
+        lex_time = min(lex_time, elapsed)
+
+        tree, nodes, elapsed = parse(filename)
+        parse_time = min(parse_time, elapsed)
+
+        size_bytes, elapsed = generate(tree, name)
+        generate_time = min(generate_time, elapsed)
+
+    return {
+        'size': size,
+        'source_bytes': os.path.getsize(filename),
+        'tokens': tokens,
+        'nodes': nodes,
+        'output_bytes': size_bytes,
+        'tokens_per_sec': tokens / lex_time,
+        'nodes_per_sec': nodes / parse_time,
+        'bytes_per_sec': size_bytes / generate_time,
+        'peak_memory': peak_memory(filename, name),
+    }
+
+# compare: regressions of results against baseline
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results['workloads'].items():
+        base = baseline.get('workloads', {}).get(name)
+        if base is None or base.get('size') != result['size']:
+            continue
+
+        for metric, higher_is_better in METRICS.items():
+            ratio = result[metric] / base[metric] if base[metric] else 1.0
+            worse = ratio < 1 - threshold if higher_is_better else ratio > 1 + threshold
+            if worse:
+                regressions.append((name, metric, base[metric], result[metric]))
+    return regressions
+
+def main():
+    options = get_options()
+    sys.setrecursionlimit(100000)
+
+    results = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'workloads': {},
+    }
+
+    print(f'{"workload":<12}{"tokens/s":>14}{"nodes/s":>14}{"bytes/s":>14}{"peak KiB":>12}')
+    with tempfile.TemporaryDirectory() as folder:
+        for name in options.workloads.split(','):
+            size = max(1, int(WORKLOADS[name][1] * options.scale))
+            result = run_workload(name, size, options.repeat, folder)
+            results['workloads'][name] = result
+            print(f'{name:<12}{result["tokens_per_sec"]:>14,.0f}{result["nodes_per_sec"]:>14,.0f}{result["bytes_per_sec"]:>14,.0f}{result["peak_memory"] / 1024:>12,.0f}')
+
+    if options.output:
+        with open(options.output, 'w') as file:
+            json.dump(results, file, indent=4)
+
+    if options.update_baseline:
+        with open(options.baseline, 'w') as file:
+            json.dump(results, file, indent=4)
+        print(f'baseline written to {options.baseline}')
+        return
+
+    if not os.path.exists(options.baseline):
+        return
+
+    with open(options.baseline, 'r') as file:
+        baseline = json.load(file)
+
+    regressions = compare(results, baseline, options.threshold)
+    for name, metric, before, after in regressions:
+        print(f'regression: {name} {metric} {before:,.0f} -> {after:,.0f}')
+
+    if regressions:
+        sys.exit(1)
+    print(f'no regressions over {options.threshold:.0%} against {options.baseline}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+# Compares the speed of generated C++ with the same kernels written by hand.
+#
+#   python benchmarks/runtime.py                       run and compare with the baseline
+#   python benchmarks/runtime.py --update-baseline     store the results as the new baseline
+#   python benchmarks/runtime.py -k vectors,strings --cxxflags "-std=c++17 -O3"
+#   python benchmarks/runtime.py --fold-calls --const-methods --const-refs --switch-chains --stack-alloc --devirtualize    with the optimization passes enabled
+#
+# Every kernel in benchmarks/kernels is a .bic program with an idiomatic C++
+# version next to it. Both are compiled with the same flags and run, they
+# must print the same result. The ratio of their fastest CPU times shows
+# what the code generation costs: copies of by-value params, copies of the
+# elements in range for loops and so on. Both are linked with alloc_count.cpp
+# to count their heap allocations. Exits with 1 when a ratio is worse than
+# the baseline by more than the threshold, or when the generated code
+# allocates more than in the baseline.
+
+import argparse
+import glob
+import json
+import os
+import platform
+import re
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:
+    # windows, wall time instead of CPU time
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bic import Project
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+KERNELS = os.path.join(HERE, 'kernels')
+BASELINE = os.path.join(HERE, 'runtime_baseline.json')
+ALLOC_COUNT = os.path.join(HERE, 'alloc_count.cpp')
+
+def get_options():
+    kernels = sorted(os.path.splitext(os.path.basename(f))[0] for f in glob.glob(os.path.join(KERNELS, '*.bic')))
+
+    parser = argparse.ArgumentParser(description='Bic generated code runtime benchmark')
+    parser.add_argument('-k', '--kernels', default=','.join(kernels), help='comma separated kernels to run')
+    parser.add_argument('--cc', default='g++', help='the c++ compiler')
+    parser.add_argument('--cxxflags', default='-std=c++17 -O2', help='flags passed to both compiles')
+    parser.add_argument('--fold-calls', action='store_true', help='transpile with the calls of pure functions over literals computed')
+    parser.add_argument('--const-methods', action='store_true', help='transpile with the methods that never modify their object declared const')
+    parser.add_argument('--const-refs', action='store_true', help='transpile with the params only read passed by const reference')
+    parser.add_argument('--switch-chains', action='store_true', help='transpile with the if chains over constants turned into switches')
+    parser.add_argument('--stack-alloc', action='store_true', help='transpile with the new objects that do not escape off the heap')
+    parser.add_argument('--devirtualize', action='store_true', help='transpile with the classes and methods never derived from or overridden marked final')
+    parser.add_argument('--repeat', type=int, default=7, help='runs per program, the fastest one is kept')
+    parser.add_argument('--output', help='write the results to this json file')
+    parser.add_argument('--baseline', default=BASELINE, help='results to compare with')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed relative regression of the ratios')
+    parser.add_argument('--update-baseline', action='store_true', help='store the results as the baseline')
+    return parser.parse_args()
+
+def build(command, cwd):
+    process = subprocess.run(command, cwd=cwd, capture_output=True, text=True)
+    if process.returncode != 0:
+        raise Exception(f'{" ".join(command)} failed:\n{process.stderr}')
+
+# run: CPU time of executable, what it printed and its number of heap
+# allocations. CPU time is less sensitive than the wall time to other
+# processes on the machine.
+def run(executable):
+    if resource is None:
+        start = time.perf_counter()
+        process = subprocess.run([executable], capture_output=True, text=True)
+        elapsed = time.perf_counter() - start
+    else:
+        before = resource.getrusage(resource.RUSAGE_CHILDREN)
+        process = subprocess.run([executable], capture_output=True, text=True)
+        after = resource.getrusage(resource.RUSAGE_CHILDREN)
+        elapsed = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+
+    if process.returncode != 0:
+        raise Exception(f'{executable} exited with code {process.returncode}')
+
+    match = re.search(r'allocations: (\d+)', process.stderr)
+    return elapsed, process.stdout, int(match.group(1)) if match else None
+
+def run_kernel(name, options, folder):
+    flags = shlex.split(options.cxxflags)
+    shutil.copy(os.path.join(KERNELS, name + '.bic'), folder)
+
+    cwd = os.getcwd()
+    os.chdir(folder)
+    try:
+        project = Project([name + '.bic'], fold_calls=options.fold_calls, const_methods=options.const_methods, const_refs=options.const_refs, switch_chains=options.switch_chains, stack_alloc=options.stack_alloc, devirtualize=options.devirtualize)
+        project.parse()
+        project.generate()
+        sources, _ = project.write_module(project.modules[0], 'build/')
+    finally:
+        os.chdir(cwd)
+
+    generated = os.path.join(folder, name + '_generated')
+    handwritten = os.path.join(folder, name + '_handwritten')
+    build([options.cc, *flags, *sources, ALLOC_COUNT, '-o', generated], folder)
+    build([options.cc, *flags, os.path.join(KERNELS, name + '.cpp'), ALLOC_COUNT, '-o', handwritten], folder)
+
+    # alternated so that changes in the load of the machine hit both
+    generated_time = handwritten_time = float('inf')
+    for _ in range(options.repeat):
+        elapsed, generated_output, generated_allocations = run(generated)
+        generated_time = min(generated_time, elapsed)
+        elapsed, handwritten_output, handwritten_allocations = run(handwritten)
+        handwritten_time = min(handwritten_time, elapsed)
+
+    if generated_output != handwritten_output:
+        raise Exception(f'{name}: generated code printed {generated_output.strip()!r}, hand written {handwritten_output.strip()!r}')
+
+    return {
+        'generated': generated_time,
+        'handwritten': handwritten_time,
+        'ratio': generated_time / handwritten_time,
+        'generated_allocations': generated_allocations,
+        'handwritten_allocations': handwritten_allocations,
+    }
+
+# compare: kernels whose ratio or allocations got worse than the baseline
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results['kernels'].items():
+        base = baseline.get('kernels', {}).get(name)
+        if base is None:
+            continue
+        if result['ratio'] > base['ratio'] * (1 + threshold):
+            regressions.append((name, 'ratio', f'{base["ratio"]:.2f}', f'{result["ratio"]:.2f}'))
+        # allocation counts are deterministic, any increase is a regression
+        allocations = base.get('generated_allocations')
+        if allocations is not None and result['generated_allocations'] is not None and result['generated_allocations'] > allocations:
+            regressions.append((name, 'allocations', f'{allocations:,}', f'{result["generated_allocations"]:,}'))
+    return regressions
+
+def main():
+    options = get_options()
+
+    results = {
+        'machine': platform.machine(),
+        'compiler': subprocess.run([options.cc, '--version'], capture_output=True, text=True).stdout.splitlines()[0],
+        'cxxflags': options.cxxflags,
+        'kernels': {},
+    }
+
+    print(f'{"kernel":<12}{"generated s":>13}{"by hand s":>12}{"ratio":>8}{"allocations":>14}{"by hand":>12}')
+    with tempfile.TemporaryDirectory() as folder:
+        for name in options.kernels.split(','):
+            result = run_kernel(name, options, folder)
+            results['kernels'][name] = result
+            print(f'{name:<12}{result["generated"]:>13.3f}{result["handwritten"]:>12.3f}{result["ratio"]:>8.2f}{result["generated_allocations"] or 0:>14,}{result["handwritten_allocations"] or 0:>12,}')
+
+    if options.output:
+        with open(options.output, 'w') as file:
+            json.dump(results, file, indent=4)
+
+    if options.update_baseline:
+        with open(options.baseline, 'w') as file:
+            json.dump(results, file, indent=4)
+        print(f'baseline written to {options.baseline}')
+        return
+
+    if not os.path.exists(options.baseline):
+        return
+
+    with open(options.baseline, 'r') as file:
+        baseline = json.load(file)
+
+    if baseline.get('compiler') != results['compiler'] or baseline.get('cxxflags') != results['cxxflags']:
+        print(f'baseline of {baseline.get("compiler")} {baseline.get("cxxflags")} not comparable, skipped')
+        return
+
+    regressions = compare(results, baseline, options.threshold)
+    for name, metric, before, after in regressions:
+        print(f'regression: {name} {metric} {before} -> {after}')
+
+    if regressions:
+        sys.exit(1)
+    print(f'no ratio over {options.threshold:.0%} worse than {options.baseline}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+# Checks that parse and transpile time grow linearly with the size of every
+# grammar construct.
+#
+#   python benchmarks/scaling.py                       run every construct
+#   python benchmarks/scaling.py -c template_expr -v   one construct with the timings
+#   python benchmarks/scaling.py --bound 1.5 --steps 6
+#
+# Every construct is generated at sizes n, 2n, 4n, ... and the growth exponent
+# is the slope of log(time) over log(source bytes), so generators whose text
+# is not linear in n (indentation of nested blocks) are still measured
+# fairly. Exits with 1 when an exponent is
+# above the bound, so backtracking that turns quadratic or exponential on some
+# input is caught before it reaches a user.
+
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bic import Lexer, Parser, CodeGenerator
+from generators import SCALING
+
+def get_options():
+    parser = argparse.ArgumentParser(description='Bic compiler scaling tests')
+    parser.add_argument('-c', '--constructs', help='comma separated constructs to run', default=','.join(SCALING))
+    parser.add_argument('--steps', type=int, default=5, help='number of sizes, each twice the previous one')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per size, the fastest one is kept')
+    parser.add_argument('--bound', type=float, default=1.3, help='largest allowed growth exponent')
+    parser.add_argument('--budget', type=float, default=2.0, help='seconds a size may take before the larger ones are skipped')
+    parser.add_argument('--output', help='write the timings and exponents to this json file')
+    parser.add_argument('-v', '--verbose', action='store_true', help='print the timing of every size')
+    return parser.parse_args()
+
+# measure: fastest parse and transpile time of filename, short runs are
+# repeated until they add up to a measurable time
+def measure(filename, repeat):
+    parse_time = transpile_time = float('inf')
+    runs = 0
+    total = 0.0
+    while runs < repeat or (total < 0.1 and runs < 100):
+        start = time.perf_counter()
+        tree = Parser(Lexer(filename)).parse()
+        parsed = time.perf_counter()
+        CodeGenerator(tree, 'scaling').generate()
+        end = time.perf_counter()
+
+        parse_time = min(parse_time, parsed - start)
+        transpile_time = min(transpile_time, end - parsed)
+        total += end - start
+        runs += 1
+    return parse_time, transpile_time
+
+# exponent: least squares slope of log(time) over log(size)
+def exponent(sizes, times):
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(max(t, 1e-9)) for t in times]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    variance = sum((x - mean_x) ** 2 for x in xs)
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / variance
+
+def run_construct(name, options, folder):
+    generator, size = SCALING[name]
+    filename = os.path.join(folder, name + '.bic')
+    result = {'sizes': [], 'bytes': [], 'parse': [], 'transpile': []}
+
+    for _ in range(options.steps):
+        with open(filename, 'w') as file:
+            file.write(generator(size))
+
+        try:
+            parse_time, transpile_time = measure(filename, options.repeat)
+        except (Exception, SystemExit) as e:
+            result['error'] = f'size {size}: {type(e).__name__} {e}'
+            break
+
+        result['sizes'].append(size)
+        result['bytes'].append(os.path.getsize(filename))
+        result['parse'].append(parse_time)
+        result['transpile'].append(transpile_time)
+        if options.verbose:
+            print(f'  {name:<16}{size:>8}{result["bytes"][-1]:>10} B{parse_time * 1000:>12.3f} ms{transpile_time * 1000:>12.3f} ms')
+
+        # the next size would take at least twice as long
+        if 2 * (parse_time + transpile_time) > options.budget:
+            break
+        size *= 2
+
+    if len(result['sizes']) >= 2:
+        result['parse_exponent'] = exponent(result['bytes'], result['parse'])
+        result['transpile_exponent'] = exponent(result['bytes'], result['transpile'])
+    return result
+
+def main():
+    options = get_options()
+    sys.setrecursionlimit(100000)
+
+    results = {'bound': options.bound, 'constructs': {}}
+    failures = []
+
+    print(f'{"construct":<16}{"sizes":>14}{"parse":>10}{"transpile":>11}')
+    with tempfile.TemporaryDirectory() as folder:
+        for name in options.constructs.split(','):
+            result = run_construct(name, options, folder)
+            results['constructs'][name] = result
+
+            if 'parse_exponent' not in result:
+                failures.append(f'{name}: {result.get("error", "not enough sizes measured")}')
+                print(f'{name:<16}{"-":>14}{"-":>10}{"-":>11}  ✗')
+                continue
+
+            sizes = f'{result["sizes"][0]}..{result["sizes"][-1]}'
+            worst = max(result['parse_exponent'], result['transpile_exponent'])
+            if worst > options.bound:
+                failures.append(f'{name}: grows as n^{worst:.2f}, bound is n^{options.bound:.2f}')
+            if 'error' in result:
+                failures.append(f'{name}: {result["error"]}')
+
+            mark = '✗' if worst > options.bound or 'error' in result else '✓'
+            print(f'{name:<16}{sizes:>14}{result["parse_exponent"]:>10.2f}{result["transpile_exponent"]:>11.2f}  {mark}')
+
+    if options.output:
+        with open(options.output, 'w') as file:
+            json.dump(results, file, indent=4)
+
+    for failure in failures:
+        print(f'failure: {failure}')
+
+    if failures:
+        sys.exit(1)
+    print(f'every construct grows at most as n^{options.bound:.2f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,320 @@
+from .AST import *
+from .Token import *
+
+# Analysis: read only queries over the AST used by the code generator
+
+# names: every identifier used below node
+def names(node):
+    return set(t.value for t in walk(node) if isinstance(t, Token) and t.type == 'ID')
+
+# type_uses: records the names used by a type, a name only needs a
+# complete type when it is not behind a pointer or reference
+def type_uses(node, uses, indirect=False):
+    if node is None:
+        return
+
+    if isinstance(node, Type):
+        type_uses(node.token, uses, indirect)
+        if node.template:
+            for param in node.template.params:
+                type_uses(param, uses)
+
+    elif isinstance(node, (TypePtr, TypeRef)):
+        type_uses(node.token, uses, True)
+
+    elif isinstance(node, Token):
+        if node.type == 'ID':
+            add_use(uses, node.value, indirect)
+
+    elif isinstance(node, NamespaceAccess):
+        # the scope of a qualified name has to be complete
+        left = node.left
+        while isinstance(left, NamespaceAccess):
+            left = left.left
+        type_uses(left, uses)
+
+    else:
+        for name in names(node):
+            add_use(uses, name, False)
+
+def add_use(uses, name, indirect):
+    uses[name] = uses.get(name, True) and indirect
+
+# signature_uses: types used by the declaration of a function
+def signature_uses(func_decl, uses):
+    for param in func_decl.args:
+        type_uses(param.type, uses)
+        for bracket in param.bracket:
+            type_uses(bracket, uses)
+
+    if func_decl.method_type not in ['constructor', 'destructor']:
+        type_uses(func_decl.type, uses)
+
+# header_uses: names used by the public surface of a module (everything
+# the code generator writes to the header) mapped to True when they are
+# only used through pointers or references.
+# Returns None when the header can't be analysed (cpp literals).
+def header_uses(tree):
+    uses = {}
+
+    def class_uses(class_decl):
+        for _, type in class_decl.inherits:
+            type_uses(type, uses)
+
+        for statement in class_decl.body.statements:
+            node = statement.token
+            if isinstance(node, VarDecl):
+                type_uses(node.type, uses)
+                for bracket in node.bracket:
+                    type_uses(bracket, uses)
+                if node.value is not None:
+                    type_uses(node.value, uses)
+            elif isinstance(node, (FuncDecl, OperatorDecl)):
+                if class_decl.template or getattr(node, 'template', None) or defined_in_header(node):
+                    type_uses(node, uses)
+                else:
+                    signature_uses(node, uses)
+            elif isinstance(node, ClassDecl):
+                if not class_uses(node):
+                    return False
+            elif isinstance(node, EnumDecl):
+                type_uses(node, uses)
+            elif isinstance(node, CppLit):
+                return False
+        return True
+
+    for statement in tree.statements:
+        node = statement.token
+        if isinstance(node, ClassDecl):
+            if not class_uses(node):
+                return None
+        elif isinstance(node, FuncDecl):
+            if node.template or defined_in_header(node):
+                type_uses(node, uses)
+            elif not (node.name.value == 'main' and node.method_type is None):
+                signature_uses(node, uses)
+        elif isinstance(node, EnumDecl):
+            type_uses(node, uses)
+
+    return uses
+
+# declared_types: top level types of a module mapped to their forward
+# declaration, None when the type can't be forward declared
+def declared_types(tree):
+    types = {}
+    for statement in tree.statements:
+        node = statement.token
+        if isinstance(node, ClassDecl):
+            template = f'template <{node.template.transpile()}> ' if node.template else ''
+            types[node.name.value] = f'{template}class {node.name.value};'
+        elif isinstance(node, EnumDecl):
+            type = (' : ' + node.type.transpile()) if node.type else ''
+            types[node.name.value] = f'enum class {node.name.value}{type};'
+        elif isinstance(node, TypeDecl):
+            types[node.left.value] = None
+    return types
+
+# forward_decls: forward declarations that replace the include of a
+# module in the header, None when the include is still needed
+def forward_decls(uses, types):
+    decls = []
+    for name, decl in types.items():
+        if name not in uses:
+            continue
+        if decl is None or not uses[name]:
+            return None
+        decls.append(decl)
+    return decls
+
+# template_uses: counts the concrete template arguments used at call sites
+# and in types for the templates named in templates (name -> TemplateDecl)
+def template_uses(tree, templates, uses):
+    def record(name, template, params):
+        if name not in templates or template is None:
+            return
+        if len(template.params) != len(templates[name].types):
+            return
+        # arguments that depend on an enclosing template aren't concrete
+        if any(names(param) & params for param in template.params):
+            return
+
+        key = (name, tuple(param.transpile() for param in template.params))
+        uses[key] = uses.get(key, 0) + 1
+
+    def visit(node, params):
+        if isinstance(node, (list, tuple)):
+            for child in node:
+                visit(child, params)
+            return
+
+        if not isinstance(node, AST):
+            return
+
+        if isinstance(node, (FuncDecl, ClassDecl)) and node.template:
+            params = params | set(t.left.value for t in node.template.types)
+
+        if isinstance(node, Call) and isinstance(node.func, Token):
+            record(node.func.value, node.template, params)
+        elif isinstance(node, Type) and isinstance(node.token, Token):
+            record(node.token.value, node.template, params)
+
+        for child in vars(node).values():
+            visit(child, params)
+
+    visit(tree, set())
+    return uses
+
+ASSIGN_OPS = ['=', '+=', '-=', '*=', '/=', '%=', '&=', '|=', '^=']
+
+# standard functions that modify the arguments they are given
+MUTATING_CALLS = ['move', 'forward', 'swap', 'getline']
+
+# methods of the standard library types whose non const overload returns
+# a reference or an iterator the caller may write through
+ACCESS_METHODS = [
+    'at', 'front', 'back', 'data', 'begin', 'end', 'rbegin', 'rend', 'top',
+    'value', 'find', 'lower_bound', 'upper_bound', 'equal_range',
+]
+
+COMPARE_OPS = ['==', '!=', '<', '>', '<=', '>=']
+
+# is_mut_ref: type is a reference that isn't const
+def is_mut_ref(type):
+    return isinstance(type, Type) and isinstance(type.token, TypeRef) and not type.is_const
+
+# lvalue_root: variable an lvalue is part of (a.b[i] -> a), None when it
+# is reached through a pointer or isn't a variable. The object a method is
+# called on is part of the lvalue, a.front() = x modifies a
+def lvalue_root(node):
+    while True:
+        if isinstance(node, Expr):
+            node = node.token
+        elif isinstance(node, Parenthesis):
+            node = node.expr
+        elif isinstance(node, (Index, Dot)):
+            node = node.left
+        elif isinstance(node, Call) and isinstance(node.func, (ObjectAccess, Dot)):
+            node = node.func
+            if isinstance(node, ObjectAccess) and node.op == '->':
+                return None
+            node = node.left
+        elif isinstance(node, ObjectAccess):
+            if node.op == '->' or node.left == 'this':
+                return None
+            node = node.left
+        elif isinstance(node, Token):
+            return node.value if node.type == 'ID' else None
+        else:
+            return None
+
+# this_member: field of this an lvalue is part of (.a.b[i] -> a), None
+# when it is reached through a pointer or isn't a field. The object a
+# method is called on is part of the lvalue, .a.front() = x modifies a
+def this_member(node):
+    while True:
+        if isinstance(node, Expr):
+            node = node.token
+        elif isinstance(node, Parenthesis):
+            node = node.expr
+        elif isinstance(node, (Index, Dot)):
+            node = node.left
+        elif isinstance(node, Call) and isinstance(node.func, (ObjectAccess, Dot)):
+            node = node.func.left
+        elif isinstance(node, ObjectAccess):
+            if node.op == '->':
+                return None
+            if node.left == 'this':
+                return node.right.value if isinstance(node.right, Token) else None
+            node = node.left
+        else:
+            return None
+
+# call_name: name of the function or method called, None for calls of
+# expressions
+def call_name(node):
+    func = node.func
+    if isinstance(func, (ObjectAccess, Dot, NamespaceAccess)):
+        func = func.right
+    return func.value if isinstance(func, Token) else None
+
+# read_calls: ids of the calls below node whose value is only read:
+# compared or copied into a variable of a named type
+def read_calls(node) -> set:
+    reads = set()
+
+    def add(value):
+        while isinstance(value, (Expr, Parenthesis)):
+            value = value.token if isinstance(value, Expr) else value.expr
+        if isinstance(value, Call):
+            reads.add(id(value))
+
+    for child in walk(node):
+        if isinstance(child, BinOp) and child.op in COMPARE_OPS:
+            add(child.left)
+            add(child.right)
+        elif isinstance(child, VarDecl) and isinstance(child.type, Type) and isinstance(child.type.token, Token):
+            add(child.value)
+    return reads
+
+# mutated_names: variables a function body may modify: assigned,
+# incremented, read into, their address taken, bound to a reference,
+# given to a mutating call or used to call a method that isn't const,
+# or one of ACCESS_METHODS unless its value is only read.
+# The containers of range for loops that modify their elements through a
+# reference are modified too.
+# const_method(name, method) tells whether calling method on the variable
+# name only reads it, ref_params maps function names to the positions of
+# their non const reference params
+def mutated_names(body, const_method, ref_params={}):
+    mutated = set()
+    reads = read_calls(body)
+
+    def add(node):
+        root = lvalue_root(node)
+        if root is not None:
+            mutated.add(root)
+
+    for node in walk(body):
+        if isinstance(node, BinOp):
+            if node.op in ASSIGN_OPS:
+                add(node.left)
+            elif node.op == '>>':
+                add(node.right)
+
+        elif isinstance(node, (PreOp, PostOp)):
+            if node.op in ['++', '--']:
+                add(node.expr)
+
+        elif isinstance(node, UnaryOp):
+            if node.op == '&':
+                add(node.expr)
+
+        elif isinstance(node, VarDecl):
+            if is_mut_ref(node.type) and node.value is not None:
+                add(node.value)
+
+        elif isinstance(node, Call):
+            func = node.func
+            if isinstance(func, (ObjectAccess, Dot)) and isinstance(func.right, Token):
+                root = lvalue_root(func.left)
+                method = func.right.value
+                if root is not None and (not const_method(root, method) or (method in ACCESS_METHODS and id(node) not in reads)):
+                    mutated.add(root)
+
+            name = call_name(node)
+            positions = ref_params.get(name, set())
+            for i, arg in enumerate(node.args.token):
+                if name in MUTATING_CALLS or i in positions:
+                    add(arg)
+
+    loops = [node for node in walk(body) if isinstance(node, For) and node.is_reference()]
+    changed = True
+    while changed:
+        changed = False
+        for loop in loops:
+            root = lvalue_root(loop.iterable)
+            if loop.var_decl.name.value in mutated and root is not None and root not in mutated:
+                mutated.add(root)
+                changed = True
+
+    return mutated
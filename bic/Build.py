@@ -0,0 +1,196 @@
+from .Project import *
+from .Cache import *
+
+import asyncio
+import os
+import sys
+import time
+
+class BuildError(Exception):
+    pass
+
+class Builder:
+    """ Transpiles the modules of a project in import order and compiles the
+    generated sources in a bounded pool of compiler processes, so module N
+    is compiled while module N + 1 is still generated. Every module is
+    parsed and transformed first, the optimization passes look at the
+    whole project. The first failing command cancels the rest of the
+    build.
+    """
+
+    def __init__(self, project : Project, output : str = './', compiler : str = 'g++', flags : list = [], jobs : int = None, executable : str = None, cache : ObjectCache = None, stream = sys.stdout):
+        self.project = project
+        self.output = output
+        self.compiler = compiler
+        self.flags = flags
+        self.jobs = jobs or os.cpu_count() or 1
+        self.executable = executable
+        self.stream = stream
+
+        # objects reused from previous builds
+        self.cache = cache
+        self.compiler_id = compiler
+
+        self.objects = []
+        self.tasks = []
+        self.error = None
+        self.main = None
+        self.semaphore = None
+
+    def run(self):
+        return asyncio.run(self.build())
+
+    async def build(self):
+        self.main = asyncio.current_task()
+        self.semaphore = asyncio.Semaphore(self.jobs)
+        start = time.perf_counter()
+
+        try:
+            if self.cache:
+                self.compiler_id = await self.compiler_version()
+
+            await self.transpile()
+            await asyncio.gather(*self.tasks)
+
+            if self.executable:
+                await self.run_command([self.compiler, *self.objects, '-o', self.executable], self.executable)
+
+        except asyncio.CancelledError:
+            if self.error is None:
+                raise
+            await self.settle()
+            raise self.error
+
+        except BaseException as e:
+            self.fail(e)
+            await self.settle()
+            raise
+
+        self.stream.write(f'\u2713 built {len(self.objects)} objects in {time.perf_counter() - start:.2f}s\n')
+        if self.cache:
+            self.cache.save()
+            self.stream.write(f'  cache: {self.cache.hits} hits, {self.cache.misses} misses, {self.cache.size() / (1 << 20):.1f} MiB\n')
+        return self.objects
+
+    # compiler_version: identifies the compiler in the cache keys
+    async def compiler_version(self):
+        process = await asyncio.create_subprocess_exec(self.compiler, '--version', stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
+        version, _ = await process.communicate()
+        return self.compiler + '\0' + version.decode(errors='replace')
+
+    async def transpile(self):
+        project = self.project
+        loop = asyncio.get_running_loop()
+        flags = []
+        shared = {}
+
+        # the passes run over every module before any is generated
+        await loop.run_in_executor(None, project.parse)
+        await loop.run_in_executor(None, project.transform)
+
+        # options that need the whole project parsed before generating
+        if project.is_global():
+            await loop.run_in_executor(None, project.prepare)
+            shared = project.write_shared(self.output)
+
+            if 'pch' in shared:
+                commands, flags = pch_commands(self.compiler, shared['pch'], self.flags)
+                for command in commands:
+                    await self.run_command(command, PCH_HEADER)
+
+
+        visited = set()
+
+        # post order over the import graph, a module is generated once the
+        # modules it imports have their headers written
+        async def visit(module):
+            if module.filename in visited:
+                return
+            visited.add(module.filename)
+
+            for node in module.imports():
+                if node.is_module():
+                    dependency = project.resolve(module, node)
+                    if dependency in project.modules:
+                        await visit(dependency)
+
+            await loop.run_in_executor(None, project.generate_module, module)
+            sources, header = project.write_module(module, self.output)
+            self.stream.write(f'\u2713 {module.filename}\n')
+
+            headers = project.generated_headers(module, self.output)
+            for source in sources:
+                self.compile(source, flags, headers)
+
+        for module in project.modules:
+            await visit(module)
+
+        # includes the headers of the modules using the templates, compiled
+        # and hashed once every header is written
+        if 'instantiations' in shared:
+            headers = [project.output_filename(m, self.output) + '.hpp' for m in project.modules]
+            if 'pch' in shared:
+                headers.append(shared['pch'])
+            self.compile(shared['instantiations'], flags, headers)
+
+    # compile: starts compiling source in the background, headers are the
+    # generated headers it includes
+    def compile(self, source : str, flags : list, headers : list):
+        obj = os.path.splitext(source)[0] + '.o'
+        self.objects.append(obj)
+
+        include = ['-I', self.project.output_root(self.output)]
+        flags = [*self.flags, *flags, *include]
+
+        key = None
+        if self.cache:
+            key = self.cache.key(source, headers, self.compiler_id, flags)
+            if self.cache.get(key, obj):
+                return
+
+        command = [self.compiler, *flags, '-c', source, '-o', obj]
+        self.tasks.append(asyncio.create_task(self.run_task(command, os.path.basename(source), key, obj)))
+
+    async def run_task(self, command : list, name : str, key : str = None, obj : str = None):
+        try:
+            await self.run_command(command, name)
+        except BuildError as e:
+            self.fail(e)
+            raise
+
+        if key is not None:
+            self.cache.put(key, obj)
+
+    # run_command: runs a command in the pool, streaming its diagnostics
+    async def run_command(self, command : list, name : str):
+        async with self.semaphore:
+            process = await asyncio.create_subprocess_exec(*command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT)
+            try:
+                async for line in process.stdout:
+                    self.stream.write(f'[{name}] {line.decode(errors="replace")}')
+                code = await process.wait()
+            except asyncio.CancelledError:
+                process.kill()
+                await process.wait()
+                raise
+
+        if code != 0:
+            raise BuildError(f'{name}: {" ".join(command)} exited with code {code}')
+
+    # settle: waits for the cancelled tasks to kill their processes, so no
+    # subprocess transport outlives the event loop
+    async def settle(self):
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    # fail: cancels everything still running after the first error
+    def fail(self, error : BaseException):
+        if self.error is not None:
+            return
+        self.error = error
+
+        current = asyncio.current_task()
+        for task in self.tasks:
+            if task is not current:
+                task.cancel()
+        if self.main is not current:
+            self.main.cancel()
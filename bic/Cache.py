@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+import shutil
+
+# parse_size: '500M', '2G', '1024' -> bytes
+def parse_size(text : str) -> int:
+    units = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+    text = text.strip().upper()
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+class ObjectCache:
+    """ Local store of compiled objects keyed by the generated source, the
+    generated headers it includes, the compiler and the flags.
+
+    Objects are evicted least recently used first once the directory grows
+    past max_size. Hit and miss counts are kept in stats.json.
+    """
+
+    def __init__(self, directory : str, max_size : int = 5 << 30):
+        self.directory = directory
+        self.max_size = max_size
+        self.stats_filename = os.path.join(directory, 'stats.json')
+
+        os.makedirs(directory, exist_ok=True)
+
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        if os.path.exists(self.stats_filename):
+            with open(self.stats_filename, 'r') as file:
+                self.stats.update(json.load(file))
+
+        # counts of the current run only
+        self.hits = 0
+        self.misses = 0
+
+    # key: hash of the source and headers, which have to be written
+    # already, a missing file raises instead of hashing an old build
+    def key(self, source : str, headers : list, compiler : str, flags : list) -> str:
+        digest = hashlib.sha256()
+        digest.update(compiler.encode() + b'\0')
+        digest.update('\0'.join(flags).encode() + b'\0')
+
+        for filename in [source, *headers]:
+            digest.update(filename.replace('\\', '/').split('/')[-1].encode() + b'\0')
+            with open(filename, 'rb') as file:
+                digest.update(file.read())
+            digest.update(b'\0')
+
+        return digest.hexdigest()
+
+    def path(self, key : str) -> str:
+        return os.path.join(self.directory, key[:2], key + '.o')
+
+    # get: copies the cached object to obj, False on a miss
+    def get(self, key : str, obj : str) -> bool:
+        path = self.path(key)
+        if not os.path.exists(path):
+            self.misses += 1
+            self.stats['misses'] += 1
+            return False
+
+        shutil.copyfile(path, obj)
+        os.utime(path)
+
+        self.hits += 1
+        self.stats['hits'] += 1
+        return True
+
+    def put(self, key : str, obj : str):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # written under a temporary name so readers never see half an object
+        temp = path + '.tmp'
+        shutil.copyfile(obj, temp)
+        os.replace(temp, path)
+
+        self.evict()
+
+    def entries(self) -> list:
+        entries = []
+        for folder in os.listdir(self.directory):
+            folder = os.path.join(self.directory, folder)
+            if not os.path.isdir(folder):
+                continue
+            for name in os.listdir(folder):
+                if name.endswith('.o'):
+                    stat = os.stat(os.path.join(folder, name))
+                    entries.append((stat.st_mtime, stat.st_size, os.path.join(folder, name)))
+        return entries
+
+    # evict: removes the least recently used objects over max_size
+    def evict(self):
+        entries = sorted(self.entries())
+        size = sum(entry[1] for entry in entries)
+
+        for _, entry_size, path in entries:
+            if size <= self.max_size:
+                break
+            os.remove(path)
+            size -= entry_size
+            self.stats['evictions'] += 1
+
+    def size(self) -> int:
+        return sum(entry[1] for entry in self.entries())
+
+    def save(self):
+        with open(self.stats_filename, 'w') as file:
+            json.dump(self.stats, file, indent=4)
@@ -1,9 +1,30 @@
 from .AST import *
+from .Hooks import *
+
+# is_deduced: function defined with a return type deduced from its body,
+# the C++ compiler needs the definition before any call
+def is_deduced(func_decl : FuncDecl) -> bool:
+    return func_decl.type is None and func_decl.method_type not in ['constructor', 'destructor']
+
+# deduced_functions: names of the functions and methods of the tree whose
+# return type is deduced, constructors aren't marked yet
+def deduced_functions(tree : Program) -> set:
+    classes = {node.name.value for node in walk(tree) if isinstance(node, ClassDecl)}
+    return {node.name.value for node in walk(tree) if isinstance(node, FuncDecl) and node.body is not None and is_deduced(node) and node.name.value not in classes}
+
+# calls_any: names of the functions called in node that are in names
+def calls_any(node, names : set) -> bool:
+    for call in walk(node):
+        if isinstance(call, Call):
+            func = call.func.right if isinstance(call.func, (ObjectAccess, Dot, NamespaceAccess)) else call.func
+            if isinstance(func, Token) and func.value in names:
+                return True
+    return False
 
 class CodeGenerator:
     """ Generates a cpp and header file from the AST Nodes. """
 
-    def __init__(self, tree : Program, filename : str):
+    def __init__(self, tree : Program, filename : str, pch : str = None, forward_decls : dict = {}, extern_templates : list = [], shards : int = 1):
         self.tree = tree
         self.header = ''
         self.code = ''
@@ -11,11 +32,81 @@ class CodeGenerator:
         self.source_filename = filename + '.cpp'
         self.header_filename = filename + '.hpp'
 
+        # definitions split across several sources compiled in parallel,
+        # the first shard is the code of source_filename
+        self.shard_count = shards
+        self.shards = []
+        self.shard_filenames = [self.source_filename] + [f'{filename}_{i}.cpp' for i in range(1, shards)]
+        self.includes = ''
+        self.definitions = []
+        self.split_at = None
+
+        # functions with a deduced return type, kept in the first shard
+        # with their callers
+        self.deduced = set()
+
+        # shared precompiled header, replaces the non .bic imports
+        self.pch = pch
+
+        # imports moved to the source, mapped to the forward declarations
+        # that replace them in the header
+        self.forward_decls = forward_decls
+
+        # template instances explicitly instantiated in another source
+        self.extern_templates = extern_templates
+
+        hooks.bind_generator(self)
+
     def generate(self):
         self.header += '#pragma once\n'
-        self.code += f'#include "{self.header_filename}"\n'
+
+        if self.pch:
+            self.header += f'#include "{self.pch}"\n'
+            self.add_include(f'#include "{self.pch}"\n')
+
+        self.add_include(f'#include "{self.header_filename}"\n')
+
+        if self.shard_count > 1:
+            self.deduced = deduced_functions(self.tree)
 
         self.generate_program(self.tree)
+
+        for decl in self.extern_templates:
+            self.header += decl + '\n'
+
+        self.split_shards()
+
+    def add_include(self, include : str):
+        self.code += include
+        self.includes += include
+
+    # add_definition: code of a function defined in the source, kept apart
+    # to be distributed between the shards unless it is pinned to the first
+    def add_definition(self, code : str, pinned : bool = False):
+        if self.shard_count > 1 and self.split_at is None and not pinned:
+            self.definitions.append(code)
+        else:
+            self.code += code
+
+    # split_shards: balances the definitions by size, largest first into
+    # the shard with the least code
+    def split_shards(self):
+        if self.shard_count <= 1:
+            self.shards = [self.code]
+            return
+
+        # cpp literals stay where they are with the code that follows them
+        split_at = self.split_at if self.split_at is not None else len(self.code)
+        loads = [len(self.code) - split_at] + [0] * (self.shard_count - 1)
+        assigned = [[] for _ in range(self.shard_count)]
+        for index in sorted(range(len(self.definitions)), key=lambda i: -len(self.definitions[i])):
+            shard = loads.index(min(loads))
+            assigned[shard].append(index)
+            loads[shard] += len(self.definitions[index])
+
+        parts = [''.join(self.definitions[i] for i in sorted(indices)) for indices in assigned]
+        self.code = self.code[:split_at] + parts[0] + self.code[split_at:]
+        self.shards = [self.code] + [self.includes + part for part in parts[1:]]
     
     def generate_program(self, program : Program):
         for statement in program.statements:
@@ -23,6 +114,9 @@ class CodeGenerator:
     
     def generate_statement(self, statement : Statement, parent : str = ''):
         if isinstance(statement.token, CppLit):
+            # later definitions may depend on the literal
+            if self.split_at is None:
+                self.split_at = len(self.code)
             self.code += statement.transpile() + '\n'
 
         elif isinstance(statement.token, EnumDecl):
@@ -35,19 +129,31 @@ class CodeGenerator:
             self.generate_func(statement.token, parent)
         
         elif isinstance(statement.token, Import):
-            self.code += statement.token.transpile() + '\n'
-            self.header += statement.token.transpile() + '\n'
+            if self.pch and not statement.token.is_module():
+                return
+
+            self.add_include(statement.token.transpile() + '\n')
+
+            path = statement.token.path.value
+            if path in self.forward_decls:
+                for decl in self.forward_decls[path]:
+                    self.header += decl + '\n'
+            else:
+                self.header += statement.token.transpile() + '\n'
         
-    def generate_class(self, class_decl : ClassDecl, parent : str = '', depth : int = 0):
+    def generate_class(self, class_decl : ClassDecl, parent : str = '', depth : int = 0, is_template : bool = False):
         self.header += class_decl.transpile(depth=depth, is_header=True) + ' {\n'
         name = class_decl.name.value
         name = (parent + '::' + name) if parent else name 
 
+        # members of class templates have to be defined in the header
+        is_template = is_template or class_decl.template is not None
+
         for statement in class_decl.body.statements:
             if isinstance(statement.token, FuncDecl):
-                self.generate_func(statement.token, name, depth)
+                self.generate_func(statement.token, name, depth, is_template)
             elif isinstance(statement.token, ClassDecl):
-                self.generate_class(statement.token, name, depth)
+                self.generate_class(statement.token, name, depth, is_template)
             elif isinstance(statement.token, VarDecl):
                 self.header += statement.token.transpile(depth=depth) + ';\n'
             elif isinstance(statement.token, EnumDecl):	
@@ -59,9 +165,12 @@ class CodeGenerator:
 
         self.header += '};\n'
 
-    def generate_func(self, func_decl : FuncDecl, parent : str = '', depth : int = 0):
-        if func_decl.template:
+    def generate_func(self, func_decl : FuncDecl, parent : str = '', depth : int = 0, is_template : bool = False):
+        # so do inline and constexpr functions
+        if func_decl.template or is_template or defined_in_header(func_decl):
             self.header += func_decl.transpile(depth=depth, parent=parent, all_data=True) + '\n'
         else:
             self.header += func_decl.transpile(depth=depth, parent=parent, is_header=True) + '\n'
-            self.code += func_decl.transpile(depth=depth, parent=parent) + '\n'
\ No newline at end of file
+            # deduced return types and their callers stay in one source
+            pinned = bool(self.deduced) and (is_deduced(func_decl) or calls_any(func_decl.body, self.deduced))
+            self.add_definition(func_decl.transpile(depth=depth, parent=parent) + '\n', pinned)
@@ -0,0 +1,385 @@
+from .AST import *
+from .Token import *
+from .Analysis import *
+
+import math
+
+# types of the values the evaluator computes with, float is left to the
+# C++ compiler, its single precision rounding isn't reproduced
+VALUE_TYPES = ['int', 'bool', 'char', 'double']
+
+# statements a call may execute before it is given up
+MAX_STEPS = 100000
+
+# calls a call may nest
+MAX_DEPTH = 64
+
+INT_MIN = -2**31
+INT_MAX = 2**31 - 1
+
+CHAR_ESCAPES = {'n': 10, 't': 9, 'r': 13, '0': 0, '\\': 92, "'": 39, '"': 34}
+
+class NotEvaluable(Exception):
+    """ The evaluation left the subset of the language the evaluator knows,
+    overflowed or ran out of steps, the call is left to the runtime. """
+    pass
+
+# value_type: name of a type of VALUE_TYPES, None for other types
+def value_type(type) -> str:
+    if not isinstance(type, Type) or type.variadic or type.template:
+        return None
+    if isinstance(type.token, Token) and type.token.type == 'TYPE' and type.token.value in VALUE_TYPES:
+        return type.token.value
+    return None
+
+# char_code: code of the text of a char literal, None for the escapes
+# that aren't handled
+def char_code(text : str) -> int:
+    if len(text) == 1:
+        return ord(text)
+    if len(text) == 2 and text[0] == '\\' and text[1] in CHAR_ESCAPES:
+        return CHAR_ESCAPES[text[1]]
+    return None
+
+# constant: value of a literal argument, None for other expressions
+def constant(node):
+    if isinstance(node, Expr):
+        node = node.token
+    if isinstance(node, Parenthesis):
+        return constant(node.expr)
+    if isinstance(node, Boolean):
+        return node.value == 'true'
+    if isinstance(node, Char):
+        return char_code(node.value)
+    return literal_value(node)
+
+# literal: AST of a value of type, at the position of token
+def literal(value, type : str, token : Token):
+    line, column = token.line, token.column
+    if type == 'bool':
+        return Boolean(Token('BOOLEAN', 'true' if value else 'false', line, column))
+
+    if type == 'char':
+        if 32 <= value < 127 and chr(value) not in "'\\":
+            return Char(Token('CHAR', chr(value), line, column))
+        if 0 <= value < 32:
+            return Char(Token('CHAR', f'\\x{value:02x}', line, column))
+        raise NotEvaluable(f'char {value} has no portable literal')
+
+    # INT_MIN is the negation of a long literal
+    if type == 'int' and value == INT_MIN:
+        raise NotEvaluable('int minimum has no literal')
+
+    negative = value < 0 or (type == 'double' and math.copysign(1.0, value) < 0)
+    if type == 'double':
+        node = Float(Token('FLOAT', abs(value), line, column))
+    else:
+        node = Integer(Token('INTEGER', abs(value), line, column))
+    if negative:
+        return Parenthesis(UnaryOp(Token('MINUS', '-', line, column), node))
+    return node
+
+# convert: value converted to type like C++ does, the conversions that are
+# undefined or implementation defined aren't evaluated
+def convert(value, type : str):
+    if value is None:
+        raise NotEvaluable('uninitialized variable')
+    if type == 'double':
+        return float(value)
+    if type == 'bool':
+        return bool(value)
+
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise NotEvaluable(f'{value} converted to {type}')
+        value = math.trunc(value)
+    value = int(value)
+    low, high = (-128, 127) if type == 'char' else (INT_MIN, INT_MAX)
+    if not low <= value <= high:
+        raise NotEvaluable(f'{value} overflows {type}')
+    return value
+
+# arithmetic: a op b with the semantics of C++ on int and double
+def arithmetic(op : str, a, b):
+    if op in ['==', '!=', '<', '>', '<=', '>=']:
+        return {'==': a == b, '!=': a != b, '<': a < b, '>': a > b, '<=': a <= b, '>=': a >= b}[op]
+
+    if isinstance(a, float) or isinstance(b, float):
+        a, b = float(a), float(b)
+        if op == '+': result = a + b
+        elif op == '-': result = a - b
+        elif op == '*': result = a * b
+        elif op == '/' and b != 0: result = a / b
+        else: raise NotEvaluable(f'double {op}')
+        if not math.isfinite(result):
+            raise NotEvaluable(f'{result} has no literal')
+        return result
+
+    a, b = int(a), int(b)
+    if op == '+': result = a + b
+    elif op == '-': result = a - b
+    elif op == '*': result = a * b
+    elif op in ['/', '%']:
+        if b == 0:
+            raise NotEvaluable('division by zero')
+        # truncated towards zero, the remainder has the sign of a
+        quotient = abs(a) // abs(b) * (1 if (a < 0) == (b < 0) else -1)
+        result = quotient if op == '/' else a - quotient * b
+    elif op == '&': result = a & b
+    elif op == '|': result = a | b
+    elif op == '^': result = a ^ b
+    elif op in ['<<', '>>']:
+        if not 0 <= b < 32 or (op == '<<' and a < 0):
+            raise NotEvaluable(f'shift {a} {op} {b}')
+        result = a << b if op == '<<' else a >> b
+    else:
+        raise NotEvaluable(f'int {op}')
+
+    if not INT_MIN <= result <= INT_MAX:
+        raise NotEvaluable(f'{result} overflows int')
+    return result
+
+class Returned(Exception):
+    def __init__(self, value):
+        self.value = value
+
+class Broke(Exception):
+    pass
+
+class Continued(Exception):
+    pass
+
+class Evaluator:
+    """ Runs calls of functions with literal arguments at compile time.
+
+    Only a pure subset of the language is evaluated: arithmetic, logic and
+    comparisons, assignments of local variables, if, while, range for
+    loops over int, return and calls of the known functions, over int,
+    bool, char and double values with the semantics of C++. Anything else
+    raises NotEvaluable when it is reached: names that aren't params or
+    locals, other statements and expressions, overflows, divisions by
+    zero, more than max_steps statements or MAX_DEPTH nested calls.
+
+    functions maps names to the FuncDecl they call. Results are cached by
+    function and arguments.
+    """
+
+    def __init__(self, functions : dict, max_steps : int = MAX_STEPS):
+        self.functions = functions
+        self.max_steps = max_steps
+        self.cache = {}
+        self.steps = 0
+        self.depth = 0
+
+    # evaluate: result of calling func with args, None when it can't be
+    # computed at compile time
+    def evaluate(self, func : FuncDecl, args : list):
+        self.steps = 0
+        self.depth = 0
+        try:
+            return self.call(func, args)
+        except (NotEvaluable, RecursionError):
+            return None
+
+    def call(self, func : FuncDecl, args : list):
+        if len(args) != len(func.args):
+            raise NotEvaluable(f'{func.name.value} takes {len(func.args)} arguments')
+
+        types = [value_type(param.type) for param in func.args]
+        type = value_type(func.type)
+        if None in types or type is None or func.body is None:
+            raise NotEvaluable(f'{func.name.value} is not over values')
+
+        args = [convert(arg, t) for arg, t in zip(args, types)]
+        key = (func.name.value, tuple(args))
+        if key in self.cache:
+            return self.cache[key]
+
+        self.depth += 1
+        if self.depth > MAX_DEPTH:
+            raise NotEvaluable('too many nested calls')
+
+        scope = {param.name.value: [t, arg] for param, t, arg in zip(func.args, types, args)}
+        try:
+            self.block(func.body, [scope])
+        except Returned as returned:
+            result = convert(returned.value, type)
+        except (Broke, Continued):
+            raise NotEvaluable('break outside of a loop')
+        else:
+            raise NotEvaluable(f'{func.name.value} ends without a value')
+
+        self.depth -= 1
+        self.cache[key] = result
+        return result
+
+    def step(self):
+        self.steps += 1
+        if self.steps > self.max_steps:
+            raise NotEvaluable('too many steps')
+
+    # scopes: list of the name -> [type, value] of the nested blocks
+    def variable(self, name : str, scopes : list) -> list:
+        for scope in reversed(scopes):
+            if name in scope:
+                return scope[name]
+        raise NotEvaluable(f'{name} is not a local variable')
+
+    def block(self, block : Block, scopes : list):
+        scopes = scopes + [{}]
+        for statement in block.statements:
+            self.statement(statement, scopes)
+
+    def statement(self, statement, scopes : list):
+        self.step()
+        node = statement.token if isinstance(statement, Statement) else statement
+
+        if node is None:
+            return
+        if isinstance(node, Block):
+            self.block(node, scopes)
+        elif isinstance(node, VarDecl):
+            var_type = value_type(node.type)
+            if var_type is None or node.bracket or node.is_static:
+                raise NotEvaluable(f'{node.name.value} is not a value')
+            value = convert(self.value(node.value, scopes), var_type) if node.value is not None else None
+            scopes[-1][node.name.value] = [var_type, value]
+        elif isinstance(node, Expr):
+            self.value(node, scopes)
+        elif isinstance(node, Return):
+            raise Returned(self.value(node.expr, scopes) if node.expr is not None else None)
+        elif isinstance(node, If):
+            branches = [(node.cond, node.body)] + [(elif_stmt.cond, elif_stmt.body) for elif_stmt in node.elif_stmt]
+            for cond, body in branches:
+                if self.value(cond, scopes):
+                    self.block(body, scopes)
+                    return
+            if node.else_stmt is not None:
+                self.block(node.else_stmt, scopes)
+        elif isinstance(node, While):
+            while self.value(node.cond, scopes):
+                self.step()
+                try:
+                    self.block(node.body, scopes)
+                except Broke:
+                    break
+                except Continued:
+                    continue
+        elif isinstance(node, RangeFor):
+            self.range_for(node, scopes)
+        elif isinstance(node, Break):
+            raise Broke()
+        elif isinstance(node, Continue):
+            raise Continued()
+        else:
+            raise NotEvaluable(f'{type(node).__name__} statement')
+
+    # range_for: loop over an int index, as RangeFor transpiles it
+    def range_for(self, node : RangeFor, scopes : list):
+        start = self.value(node.start, scopes)
+        end = self.value(node.end, scopes)
+        # without a type the index has the type of start + end
+        if node.var_decl.type is not None:
+            is_int = value_type(node.var_decl.type) == 'int'
+        else:
+            is_int = node.index_type() in ['int', f'decltype({node.start.transpile()} + {node.end.transpile()})']
+            is_int = is_int and not isinstance(start, float) and not isinstance(end, float)
+        if not is_int:
+            raise NotEvaluable('range over other values than int')
+
+        start = convert(start, 'int')
+        end = convert(end, 'int')
+        step = convert(self.value(node.step, scopes), 'int') if node.step is not None else 1
+        descending = literal_value(node.step) is not None and literal_value(node.step) < 0
+
+        index = ['int', start]
+        scopes = scopes + [{node.var_decl.name.value: index}]
+        while (index[1] > end) if descending else (end > index[1]):
+            self.step()
+            try:
+                self.block(node.body, scopes)
+            except Broke:
+                break
+            except Continued:
+                pass
+            index[1] = arithmetic('+', index[1], step)
+
+    def value(self, node, scopes : list):
+        if isinstance(node, Expr):
+            return self.value(node.token, scopes)
+        if isinstance(node, Parenthesis):
+            return self.value(node.expr, scopes)
+        if isinstance(node, (Integer, Float)):
+            return node.value
+        if isinstance(node, Boolean):
+            return node.value == 'true'
+        if isinstance(node, Char):
+            code = char_code(node.value)
+            if code is None:
+                raise NotEvaluable(f"char '{node.value}'")
+            return code
+        if isinstance(node, Token):
+            if node.type == 'ID':
+                return self.variable(node.value, scopes)[1]
+            if node.type in ['INTEGER', 'FLOAT']:
+                return node.value
+            raise NotEvaluable(f'{node.type} token')
+
+        if isinstance(node, UnaryOp):
+            value = self.value(node.expr, scopes)
+            if value is None:
+                raise NotEvaluable('uninitialized variable')
+            if node.op == '!':
+                return not value
+            if node.op == '+':
+                return arithmetic('+', 0, value)
+            if node.op == '-':
+                return -value if isinstance(value, float) else arithmetic('-', 0, value)
+            if node.op == '~' and not isinstance(value, float):
+                return ~int(value)
+            raise NotEvaluable(f'unary {node.op}')
+
+        if isinstance(node, (PreOp, PostOp)):
+            variable = self.assigned(node.expr, scopes)
+            before = convert(variable[1], variable[0])
+            if node.op not in ['++', '--']:
+                raise NotEvaluable(f'{node.op} operator')
+            variable[1] = convert(arithmetic('+' if node.op == '++' else '-', before, 1), variable[0])
+            return variable[1] if isinstance(node, PreOp) else before
+
+        if isinstance(node, BinOp):
+            if node.op == '=':
+                variable = self.assigned(node.left, scopes)
+                variable[1] = convert(self.value(node.right, scopes), variable[0])
+                return variable[1]
+            if node.op in ASSIGN_OPS:
+                variable = self.assigned(node.left, scopes)
+                result = arithmetic(node.op[:-1], convert(variable[1], variable[0]), self.value(node.right, scopes))
+                variable[1] = convert(result, variable[0])
+                return variable[1]
+            if node.op == '&&':
+                return bool(self.value(node.left, scopes)) and bool(self.value(node.right, scopes))
+            if node.op == '||':
+                return bool(self.value(node.left, scopes)) or bool(self.value(node.right, scopes))
+
+            left = self.value(node.left, scopes)
+            right = self.value(node.right, scopes)
+            if left is None or right is None:
+                raise NotEvaluable('uninitialized variable')
+            return arithmetic(node.op, left, right)
+
+        if isinstance(node, Call):
+            if not isinstance(node.func, Token) or node.template is not None or node.func.value not in self.functions:
+                raise NotEvaluable('call of an unknown function')
+            args = [self.value(arg, scopes) for arg in node.args.token]
+            return self.call(self.functions[node.func.value], args)
+
+        raise NotEvaluable(f'{type(node).__name__} expression')
+
+    # assigned: [type, value] of the local variable an assignment changes
+    def assigned(self, node, scopes : list) -> list:
+        while isinstance(node, (Expr, Parenthesis)):
+            node = node.token if isinstance(node, Expr) else node.expr
+        if not isinstance(node, Token) or node.type != 'ID':
+            raise NotEvaluable('assignment of something else than a local variable')
+        return self.variable(node.value, scopes)
@@ -0,0 +1,126 @@
+# productions of the Parser reported to the node hooks
+PRODUCTIONS = [
+    'attributes', 'name', 'namespace_access', 'object_access', 'args', 'call', 'array',
+    'value', 'primary', 'lambda_param', 'lambda_expr', 'dot_expr', 'unary',
+    'term', 'add', 'bitop', 'comp',
+    'assign_op', 'assign', 'expr', 'block', 'param', 'params', 'index',
+    'type_name', 'type_ptr', 'type_ref', 'bracket', 'template_param_list_val',
+    'template_params', 'template_type', 'template_decl', 'type_spec',
+    'var_decl', 'simple_var_decl', 'func_decl', 'return_stmt', 'elif_stmt',
+    'if_stmt', 'while_stmt', 'for_stmt', 'match_arm', 'match_stmt',
+    'type_decl', 'inherit_decl',
+    'class_decl', 'protection_decl', 'del_stmt', 'enum_key', 'enum_decl',
+    'op_id', 'operator_decl', 'statement',
+]
+
+class Hooks:
+    """ Callbacks notified of the events of the compiler.
+
+    on_token(token)                    every token returned by a lexer
+    on_node(production, node)          every production the parser completes
+    on_backtrack(failed, restart)      a speculative parse failed at the
+                                       token failed and restarts at restart
+    on_emit(node, header, code)        the header and source code generated
+                                       for a top level statement
+
+    Lexers, parsers and generators look at the hooks once when they are
+    constructed and only wrap their methods when some are registered, so
+    hooks added later apply to the next ones created.
+    """
+
+    def __init__(self):
+        self.token = []
+        self.node = []
+        self.backtrack = []
+        self.emit = []
+
+    # the on_ methods can be used as decorators
+    def on_token(self, callback):
+        self.token.append(callback)
+        return callback
+
+    def on_node(self, callback):
+        self.node.append(callback)
+        return callback
+
+    def on_backtrack(self, callback):
+        self.backtrack.append(callback)
+        return callback
+
+    def on_emit(self, callback):
+        self.emit.append(callback)
+        return callback
+
+    def remove(self, callback):
+        for callbacks in (self.token, self.node, self.backtrack, self.emit):
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def clear(self):
+        self.token.clear()
+        self.node.clear()
+        self.backtrack.clear()
+        self.emit.clear()
+
+    def bind_lexer(self, lexer):
+        if not self.token:
+            return
+
+        get_next_token = lexer.get_next_token
+        callbacks = list(self.token)
+
+        def get_next_token_hooked():
+            token = get_next_token()
+            for callback in callbacks:
+                callback(token)
+            return token
+
+        lexer.get_next_token = get_next_token_hooked
+
+    def bind_parser(self, parser):
+        if self.node:
+            callbacks = list(self.node)
+            for production in PRODUCTIONS:
+                setattr(parser, production, self.hook_production(production, getattr(parser, production), callbacks))
+
+        if self.backtrack:
+            callbacks = list(self.backtrack)
+            set_state = parser.set_state
+
+            def set_state_hooked(state):
+                for callback in callbacks:
+                    callback(parser.current_token, state['token'])
+                return set_state(state)
+
+            parser.set_state = set_state_hooked
+
+    def hook_production(self, production, method, callbacks):
+        def production_hooked(*args, **kwargs):
+            node = method(*args, **kwargs)
+            for callback in callbacks:
+                callback(production, node)
+            return node
+        return production_hooked
+
+    def bind_generator(self, generator):
+        if not self.emit:
+            return
+
+        generate_statement = generator.generate_statement
+        callbacks = list(self.emit)
+
+        def generate_statement_hooked(statement, parent=''):
+            header = len(generator.header)
+            code = len(generator.code)
+            definitions = len(generator.definitions)
+
+            generate_statement(statement, parent)
+
+            emitted = generator.code[code:] + ''.join(generator.definitions[definitions:])
+            for callback in callbacks:
+                callback(statement.token, generator.header[header:], emitted)
+
+        generator.generate_statement = generate_statement_hooked
+
+# hooks of the compiler, bic.hooks.on_token(callback) etc.
+hooks = Hooks()
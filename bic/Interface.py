@@ -0,0 +1,223 @@
+from .AST import *
+from .Token import *
+
+import hashlib
+import os
+import struct
+
+# Interface: compact binary description of the declarations a module
+# exports, so importers don't have to lex and parse its source.
+#
+# layout:
+#   header   magic 'BICI', version u16, entry count u32,
+#            source sha256 (32 bytes), interface sha256 (32 bytes)
+#   index    per entry: kind u8, name (u16 length + utf-8), offset u32
+#   records  values encoded as tagged data, decoded on first access
+
+MAGIC = b'BICI'
+VERSION = 1
+HEADER = struct.Struct('<4sHI32s32s')
+
+# entry kinds
+IMPORT, CLASS, FUNC, ENUM, TYPE = range(5)
+
+# method flags
+CONST, STATIC, VIRTUAL, PURE, CONSTRUCTOR, DESTRUCTOR = (1 << i for i in range(6))
+
+def source_hash(text : str) -> bytes:
+    return hashlib.sha256(text.encode()).digest()
+
+def interface_filename(filename : str) -> str:
+    return os.path.splitext(filename)[0] + '.bici'
+
+# value encoding: N none, I int, S string, L list
+def encode(value) -> bytes:
+    if value is None:
+        return b'N'
+    if isinstance(value, int):
+        return b'I' + struct.pack('<i', value)
+    if isinstance(value, str):
+        data = value.encode()
+        return b'S' + struct.pack('<I', len(data)) + data
+    return b'L' + struct.pack('<I', len(value)) + b''.join(encode(v) for v in value)
+
+def decode(buffer, offset : int):
+    tag = buffer[offset:offset + 1]
+    offset += 1
+    if tag == b'N':
+        return None, offset
+    if tag == b'I':
+        return struct.unpack_from('<i', buffer, offset)[0], offset + 4
+    if tag == b'S':
+        size = struct.unpack_from('<I', buffer, offset)[0]
+        offset += 4
+        return bytes(buffer[offset:offset + size]).decode(), offset + size
+    if tag == b'L':
+        count = struct.unpack_from('<I', buffer, offset)[0]
+        offset += 4
+        values = []
+        for _ in range(count):
+            value, offset = decode(buffer, offset)
+            values.append(value)
+        return values, offset
+    raise Exception('Invalid interface data')
+
+def type_str(node) -> str:
+    return node.transpile() if node is not None else None
+
+# method_flags: flags of a method, method_type overrides the one of node
+def method_flags(node, method_type=None) -> int:
+    method_type = method_type or getattr(node, 'method_type', None)
+    flags = 0
+    if getattr(node, 'is_const', False): flags |= CONST
+    if getattr(node, 'is_static', False): flags |= STATIC
+    if getattr(node, 'is_virtual', False): flags |= VIRTUAL
+    if getattr(node, 'body', True) is None: flags |= PURE
+    if method_type == 'constructor': flags |= CONSTRUCTOR
+    if method_type == 'destructor': flags |= DESTRUCTOR
+    return flags
+
+def func_record(node, method_type=None) -> list:
+    template = node.template.transpile() if getattr(node, 'template', None) else None
+    params = [param.transpile() for param in node.args]
+    return [node.protection, template, type_str(node.type), params, method_flags(node, method_type)]
+
+def class_record(node : ClassDecl) -> list:
+    template = node.template.transpile() if node.template else None
+    inherits = [[protection, type.transpile()] for protection, type in node.inherits]
+    fields = []
+    methods = []
+    for statement in node.body.statements:
+        member = statement.token
+        if isinstance(member, VarDecl):
+            fields.append([member.protection, member.name.value, type_str(member.type), int(member.is_static)])
+        elif isinstance(member, FuncDecl):
+            # constructors get their method type when the class is
+            # transpiled, after the interface is written
+            method_type = member.method_type
+            if member.name.value == node.name.value:
+                method_type = method_type or 'constructor'
+            methods.append([member.name.value] + func_record(member, method_type))
+    return [template, inherits, fields, methods]
+
+# interface_entries: (kind, name, record) of the declarations a module exports
+def interface_entries(tree : Program) -> list:
+    entries = []
+    for statement in tree.statements:
+        node = statement.token
+        if isinstance(node, Import):
+            entries.append((IMPORT, node.path.value, None))
+        elif isinstance(node, ClassDecl):
+            entries.append((CLASS, node.name.value, class_record(node)))
+        elif isinstance(node, FuncDecl):
+            if node.name.value != 'main':
+                entries.append((FUNC, node.name.value, func_record(node)))
+        elif isinstance(node, EnumDecl):
+            keys = [key.name.value for key in node.keys]
+            entries.append((ENUM, node.name.value, [type_str(node.type), keys]))
+        elif isinstance(node, TypeDecl):
+            entries.append((TYPE, node.left.value, [type_str(node.right)]))
+    return entries
+
+def write_interface(filename : str, tree : Program, source : str):
+    index = b''
+    records = b''
+    entries = interface_entries(tree)
+
+    # records are addressed from the end of the index
+    for kind, name, record in entries:
+        data = name.encode()
+        index += struct.pack('<BH', kind, len(data)) + data + struct.pack('<I', len(records))
+        records += encode(record)
+
+    payload = index + records
+    header = HEADER.pack(MAGIC, VERSION, len(entries), source_hash(source), hashlib.sha256(payload).digest())
+
+    with open(filename, 'wb') as file:
+        file.write(header + payload)
+
+class ModuleInterface:
+    """ Lazily decoded view of a .bici file.
+
+    The file is read at once, checking its hash goes over every byte of
+    it anyway. Only the index is decoded up front, the records are viewed
+    in place and decoded on first access. A file whose payload doesn't
+    match the hash of its header, truncated or corrupted, is rejected.
+    """
+
+    def __init__(self, filename : str):
+        with open(filename, 'rb') as file:
+            buffer = memoryview(file.read())
+
+        if len(buffer) < HEADER.size:
+            raise Exception(f'{filename} is truncated')
+
+        magic, self.version, count, self.source_hash, self.interface_hash = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise Exception(f'{filename} is not a bic interface')
+        if hashlib.sha256(buffer[HEADER.size:]).digest() != self.interface_hash:
+            raise Exception(f'{filename} does not match its hash')
+
+        # only the index is read up front
+        self.entries = []
+        offset = HEADER.size
+        for _ in range(count):
+            kind, size = struct.unpack_from('<BH', buffer, offset)
+            offset += 3
+            name = bytes(buffer[offset:offset + size]).decode()
+            offset += size
+            self.entries.append((kind, name, struct.unpack_from('<I', buffer, offset)[0]))
+            offset += 4
+
+        self.records = buffer[offset:]
+        self.cache = {}
+
+    def names(self, kind : int) -> list:
+        return [name for k, name, _ in self.entries if k == kind]
+
+    def get(self, kind : int, name : str):
+        key = (kind, name)
+        if key not in self.cache:
+            for k, n, offset in self.entries:
+                if k == kind and n == name:
+                    self.cache[key] = decode(self.records, offset)[0]
+                    break
+            else:
+                return None
+        return self.cache[key]
+
+    def imports(self) -> list:
+        return [Import(Token('STRING', path, 0, 0)) for path in self.names(IMPORT)]
+
+    # declared_types: same result as Analysis.declared_types on the tree
+    def declared_types(self) -> dict:
+        types = {}
+        for kind, name, _ in self.entries:
+            if kind == CLASS:
+                template = self.get(CLASS, name)[0]
+                template = f'template <{template}> ' if template else ''
+                types[name] = f'{template}class {name};'
+            elif kind == ENUM:
+                type = self.get(ENUM, name)[0]
+                type = (' : ' + type) if type else ''
+                types[name] = f'enum class {name}{type};'
+            elif kind == TYPE:
+                types[name] = None
+        return types
+
+# load_interface: interface of a source file, None when it is missing,
+# damaged or out of date with the source
+def load_interface(filename : str, source : str):
+    path = interface_filename(filename)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        interface = ModuleInterface(path)
+    except Exception:
+        return None
+
+    if interface.version != VERSION or interface.source_hash != source_hash(source):
+        return None
+
+    return interface
@@ -1,4 +1,5 @@
 from .Token import *
+from .Hooks import *
 
 # Lexer class
 class Lexer:
@@ -8,7 +9,6 @@ class Lexer:
         self.column = 0
         self.line = 1
         self.filename = filename
-        self.print_token = False
 
         with open(self.filename, 'r') as file:
             self.text = file.read()
@@ -23,11 +23,13 @@ class Lexer:
             'type', 'const', # Type
             'let', 'mut', # vars
             'ret', # functions
-            'if', 'elif', 'else', 'while', 'for', 'in', 'break', 'continue', # control flow
+            'if', 'elif', 'else', 'while', 'for', 'in', 'break', 'continue', 'match', # control flow
             'class', 'pub', 'priv', 'static', 'virtual', 'new', 'del', 'null', 'operator',  # classes
             'enum',
             'import',
         ]
+
+        hooks.bind_lexer(self)
         
     def get_state(self):
         return {
@@ -98,12 +100,6 @@ class Lexer:
         return result
 
     def get_next_token(self):
-        tok = self._get_next_token()
-        if self.print_token:
-            print(tok)
-        return tok
-
-    def _get_next_token(self):
         while self.current_char is not None:
             if self.current_char.isspace():
                 self.skip_whitespace()
@@ -112,7 +108,8 @@ class Lexer:
             if self.current_char.isdigit():
                 num = self.integer()
 
-                if self.current_char == '.': # float
+                # float, unless the dot starts a range (0..n)
+                if self.current_char == '.' and self.text[self.pos+1:self.pos+2] != '.':
                     self.advance()
                     num += '.' + self.integer()
                     return Token('FLOAT', float(num), self.line, self.column)
@@ -191,7 +188,7 @@ class Lexer:
         return chars in [
             '==', '!=', '<=', '>=', '+=', '-=', '*=', '/=',
             '++', '--', '&&', '||', '<<', '>>', '->', '::',
-            '//', '/*', '*/', '%=', '&=', '|=', '^=',
+            '//', '/*', '*/', '%=', '&=', '|=', '^=', '..', '=>',
         ]
 
     def get_multi_char_symbol(self, chars):
@@ -202,6 +199,7 @@ class Lexer:
             '<<': 'LSHIFT', '>>': 'RSHIFT', '->': 'ARROW',  '::': 'COLONCOLON',
             '//': 'COMMENT', '/*': 'COMMENT_START', '*/': 'COMMENT_END',
             '%=': 'MODEQ',   '&=': 'ANDEQ',  '|=': 'OREQ',   '^=': 'XOREQ',
+            '..': 'DOTDOT', '=>': 'FATARROW',
         }[chars]
 
     def is_symbol(self, char):
@@ -0,0 +1,91 @@
+from .AST import *
+from .CodeGenerator import *
+
+import re
+
+# module_name: C++ module name of a .bic file
+def module_name(filename : str) -> str:
+    name = filename.replace('\\', '/').split('/')[-1].replace('.bic', '')
+    return re.sub(r'\W', '_', name)
+
+class ModuleGenerator(CodeGenerator):
+    """ Generates a C++20 named module unit from the AST Nodes.
+
+    Top level declarations marked pub are exported, system imports go to the
+    global module fragment and .bic imports become module imports. A module
+    that defines main can't be a named module, it is generated as a plain
+    source that imports the other modules.
+    """
+
+    def __init__(self, tree : Program, filename : str):
+        super().__init__(tree, filename)
+        self.module_name = module_name(filename)
+
+        self.is_program = any(
+            isinstance(s.token, FuncDecl) and s.token.name.value == 'main' for s in tree.statements
+        )
+        self.source_filename = filename + ('.cpp' if self.is_program else '.cppm')
+
+        self.fragment = ''
+        self.imports = ''
+        self.exports = []
+
+    def generate(self):
+        self.generate_program(self.tree)
+
+        if self.is_program:
+            code = self.fragment
+        else:
+            code = ('module;\n' + self.fragment) if self.fragment else ''
+            code += f'export module {self.module_name};\n'
+
+        self.code = code + self.imports + self.header + self.code
+        self.header = ''
+
+    def generate_statement(self, statement : Statement, parent : str = ''):
+        node = statement.token
+
+        if isinstance(node, Import):
+            if node.is_module():
+                self.imports += f'import {module_name(node.path.value)};\n'
+            else:
+                self.fragment += node.transpile() + '\n'
+            return
+
+        # top level protection has no meaning in C++, pub exports
+        protection = getattr(node, 'protection', None)
+        if protection is not None:
+            node.protection = None
+
+        start = len(self.header)
+        super().generate_statement(statement, parent)
+
+        if protection == 'PUB' and not self.is_program and len(self.header) > start:
+            self.header = self.header[:start] + 'export ' + self.header[start:]
+            self.exports.append(node.name.value)
+
+# module_commands: commands to build the module units in import order
+def module_commands(compiler, generators, flags=[]):
+    commands = []
+    objects = []
+    flags = ['-std=c++20', *flags]
+
+    for generator in generators:
+        source = generator.source_filename
+        obj = generator.module_name + '.o'
+        objects.append(obj)
+
+        if 'clang' in compiler:
+            if generator.is_program:
+                commands.append([compiler, *flags, '-fprebuilt-module-path=.', '-c', source, '-o', obj])
+            else:
+                pcm = generator.module_name + '.pcm'
+                commands.append([compiler, *flags, '-fprebuilt-module-path=.', '--precompile', source, '-o', pcm])
+                commands.append([compiler, *flags, '-fprebuilt-module-path=.', '-c', pcm, '-o', obj])
+        else:
+            commands.append([compiler, *flags, '-fmodules-ts', '-x', 'c++', '-c', source, '-o', obj])
+
+    if any(generator.is_program for generator in generators):
+        commands.append([compiler, *objects, '-o', 'main'])
+
+    return commands
@@ -28,6 +28,8 @@ class Parser:
 
         self.class_nodes = [VarDecl, FuncDecl, ClassDecl, EnumDecl, OperatorDecl]
 
+        hooks.bind_parser(self)
+
     def set_capture_error(self):
         self.is_capture_error = True
         self.error_count = 0
@@ -71,7 +73,7 @@ class Parser:
             self.last_token = state['last_token']
             self.lexer.set_state(state['lexer'])
 
-    def error(self, token_type=None):
+    def error(self, token_type=None, message=None):
         def print_line_error():
             print(f'{self.lexer.get_line(self.last_token.line)}')
             print(f'{(self.last_token.column - 1) * " "}^')
@@ -92,7 +94,7 @@ class Parser:
             else:
                 print('File %s: line %d, column %d' % (self.lexer.filename, self.last_token.line, self.last_token.column))
                 print_line_error()
-                print(f'Unexpected {self.current_token.type} "{self.current_token.value}"')
+                print(message or f'Unexpected {self.current_token.type} "{self.current_token.value}"')
                 sys.exit(1)
     
     def eat(self, token_type):
@@ -101,9 +103,6 @@ class Parser:
         if self.state_id == 'template':
             if self.current_token.type == 'RSHIFT':
                 self.current_token = Token('GT', '>', self.current_token.line, self.current_token.column)
-                self.lexer.pos += 1
-                self.lexer.column += 1
-                self.lexer.current_char = '>'
                 return
 
         if self.current_token.type == token_type:
@@ -111,6 +110,42 @@ class Parser:
         else:
             self.error(token_type)
 
+    # attribute_error: reports the attribute token, misplaced or unknown
+    def attribute_error(self, token, message):
+        self.last_token = token
+        self.error(message=message)
+
+    # attributes: (AT name)*
+    def attributes(self):
+        tokens = []
+        while self.current_token.type == 'AT':
+            self.eat('AT')
+            tokens.append(self.name())
+        return tokens
+
+    # check_attributes: names of the attribute tokens added to names,
+    # reports the unknown and repeated ones, the ones that conflict with
+    # another and the ones not in allowed, what kind of node they are on
+    def check_attributes(self, tokens, allowed, kind, names=[]):
+        names = list(names)
+        for token in tokens:
+            name = token.value
+            if name not in FUNC_ATTRIBUTES + BRANCH_ATTRIBUTES:
+                self.attribute_error(token, f'Unknown attribute @{name}')
+            if name not in allowed:
+                self.attribute_error(token, f'Attribute @{name} does not apply to {kind}')
+            if name in names:
+                self.attribute_error(token, f'Repeated attribute @{name}')
+            conflict = conflicting_attribute(name, names)
+            if conflict is not None:
+                self.attribute_error(token, f'Attribute @{name} conflicts with @{conflict}')
+            names.append(name)
+        return names
+
+    # branch_attributes: attributes of an if, elif or else branch
+    def branch_attributes(self):
+        return self.check_attributes(self.attributes(), BRANCH_ATTRIBUTES, 'branches')
+
     # name: ID
     def name(self):
         node = self.current_token
@@ -152,7 +187,7 @@ class Parser:
         self.eat('LPAREN')
         if self.current_token.type == 'RPAREN':
             self.eat('RPAREN')
-            return Call(node, Args([]))
+            return Call(node, Args([]), template=template)
         
         args = self.args()
         self.eat('RPAREN')
@@ -220,6 +255,9 @@ class Parser:
             self.eat(token.type)
             return PreOp(token, self.primary())
 
+        elif token.type in ['PIPE', 'OR']:
+            return self.lambda_expr()
+
         elif token.type == 'ID':
             node = self.name()
 
@@ -247,6 +285,46 @@ class Parser:
         
         self.error()
     
+    # lambda_param: MUT? ID (COLON type_spec)?
+    def lambda_param(self):
+        is_mut = False
+        if self.current_token.type == 'MUT':
+            self.eat('MUT')
+            is_mut = True
+        node = self.name()
+        type = None
+        if self.current_token.type == 'COLON':
+            self.eat('COLON')
+            type = self.type_spec()
+        return Param(name=node, type=type, is_mut=is_mut)
+
+    # lambda_expr: (PIPE (lambda_param (COMMA lambda_param)*)? PIPE | OR) (ARROW type_spec)? (block | expr)
+    def lambda_expr(self):
+        token = self.current_token
+        params = []
+        if token.type == 'OR':
+            self.eat('OR')
+        else:
+            self.eat('PIPE')
+            if self.current_token.type != 'PIPE':
+                params.append(self.lambda_param())
+                while self.current_token.type == 'COMMA':
+                    self.eat('COMMA')
+                    params.append(self.lambda_param())
+            self.eat('PIPE')
+
+        type = None
+        if self.current_token.type == 'ARROW':
+            self.eat('ARROW')
+            type = self.type_spec()
+
+        # an expression body is the value returned
+        if self.current_token.type == 'LBRACE':
+            body = self.block()
+        else:
+            body = Block([Statement(Return(self.expr()))])
+        return Lambda(token, params, type, body)
+
     # dot_expr: primary (DOT ID)+
     def dot_expr(self):
         node = self.primary()
@@ -426,14 +504,18 @@ class Parser:
         self.eat('RBRACE')
         return Block(statements)
 
-    # param: ID (LBRACKET expr RBRACKET)* COLON type_spec
+    # param: MUT? ID (LBRACKET expr RBRACKET)* COLON type_spec
     def param(self):
+        is_mut = False
+        if self.current_token.type == 'MUT':
+            self.eat('MUT')
+            is_mut = True
         node = self.name()
         bracket = []
         while self.current_token.type == 'LBRACKET':
             bracket.append(self.bracket())
         self.eat('COLON')
-        node = Param(name=node, type=self.type_spec(), bracket=bracket)
+        node = Param(name=node, type=self.type_spec(), bracket=bracket, is_mut=is_mut)
         return node
 
     # params: param (COMMA param)*
@@ -506,6 +588,12 @@ class Parser:
 
         try:
             node = self.type_spec()
+
+            # a type followed by anything but the end of the argument is the
+            # start of an expression, retried here instead of by every
+            # enclosing template argument
+            if self.current_token.type not in ('COMMA', 'GT', 'RSHIFT'):
+                self.error()
         except ParserError as e:
             self.set_state(state)
             self.unset_capture_error()
@@ -648,30 +736,39 @@ class Parser:
             return Return(self.expr())
         return Return(None)
 
-    # elif_stmt: ELIF LPARENT expr RPARENT block
+    # elif_stmt: ELIF LPARENT expr RPARENT attributes block
     def elif_stmt(self):
         self.eat('ELIF')
         self.eat('LPAREN')
         expr = self.expr()
         self.eat('RPAREN')
+        attributes = self.branch_attributes()
         block = self.block()
-        return Elif(expr, block)
+        node = Elif(expr, block)
+        node.attributes = attributes
+        return node
 
-    # if_stmt: IF LPARENT expr RPARENT block (elif_stmt)* (ELSE block)?
+    # if_stmt: IF LPARENT expr RPARENT attributes block (elif_stmt)* (ELSE attributes block)?
     def if_stmt(self):
         self.eat('IF')
         self.eat('LPAREN')
         cond = self.expr()
         self.eat('RPAREN')
+        attributes = self.branch_attributes()
         block = self.block()
         elifs = []
         while self.current_token.type == 'ELIF':
             elifs.append(self.elif_stmt())
         else_block = None
+        else_attributes = []
         if self.current_token.type == 'ELSE':
             self.eat('ELSE')
+            else_attributes = self.branch_attributes()
             else_block = self.block()
-        return If(cond, block, elifs, else_block)
+        node = If(cond, block, elifs, else_block)
+        node.attributes = attributes
+        node.else_attributes = else_attributes
+        return node
 
     # while_stmt: WHILE LPARENT expr RPARENT block
     def while_stmt(self):
@@ -682,16 +779,66 @@ class Parser:
         block = self.block()
         return While(cond, block)
 
-    # for_stmt: FOR LPARENT simple_var_decl IN expr RPARENT block
+    # for_stmt: FOR LPARENT MUT? simple_var_decl IN expr (DOTDOT expr (STEP expr)?)? RPARENT block
+    # step is only a keyword after a range
     def for_stmt(self):
         self.eat('FOR')
         self.eat('LPAREN')
+        is_copy = False
+        if self.current_token.type == 'MUT':
+            self.eat('MUT')
+            is_copy = True
         var_decl = self.simple_var_decl()
         self.eat('IN')
         expr = self.expr()
+
+        if self.current_token.type == 'DOTDOT':
+            self.eat('DOTDOT')
+            end = self.expr()
+            step = None
+            if self.current_token.type == 'ID' and self.current_token.value == 'step':
+                self.eat('ID')
+                step = self.expr()
+            self.eat('RPAREN')
+            return RangeFor(var_decl, expr, end, step, self.block())
+
         self.eat('RPAREN')
         block = self.block()
-        return For(var_decl, expr, block)
+        return For(var_decl, expr, block, is_copy=is_copy)
+
+    # match_arm: (expr (COMMA expr)* | ELSE) FATARROW block
+    def match_arm(self):
+        labels = []
+        if self.current_token.type == 'ELSE':
+            self.eat('ELSE')
+        else:
+            labels.append(self.expr())
+            while self.current_token.type == 'COMMA':
+                self.eat('COMMA')
+                labels.append(self.expr())
+        self.eat('FATARROW')
+        return MatchArm(labels, self.block())
+
+    # match_stmt: MATCH LPARENT expr RPARENT LBRACE match_arm* RBRACE
+    # the else arm, at most one, is the default
+    def match_stmt(self):
+        self.eat('MATCH')
+        self.eat('LPAREN')
+        expr = self.expr()
+        self.eat('RPAREN')
+        self.eat('LBRACE')
+        arms = []
+        default = None
+        while self.current_token.type != 'RBRACE':
+            arm = self.match_arm()
+            if arm.labels:
+                arms.append(arm)
+            elif default is None:
+                default = arm.body
+            else:
+                self.error()
+        self.eat('RBRACE')
+        return Match(expr, arms, default)
 
     # type_decl: TYPE ID = type_spec;
     def type_decl(self):
@@ -817,6 +964,8 @@ class Parser:
     # if_stmt |
     # for_stmt |
     # while_stmt |
+    # match_stmt |
+    # attributes (func_decl | operator_decl | class_decl) |
     # class_decl |
     # func_decl SEMI 
     # func_decl
@@ -857,6 +1006,8 @@ class Parser:
             return Statement(self.while_stmt())
         elif token.type == 'FOR':
             return Statement(self.for_stmt())
+        elif token.type == 'MATCH':
+            return Statement(self.match_stmt())
         elif token.type == 'BREAK':
             self.eat('BREAK')
             return Statement(Break())
@@ -885,6 +1036,26 @@ class Parser:
                 node.is_virtual = True
                 return Statement(node)
             self.error()
+        elif token.type == 'AT':
+            tokens = self.attributes()
+            statement = self.statement(is_virtual)
+            node = statement.token if statement is not None else None
+            if type(node) in [FuncDecl, OperatorDecl]:
+                node.attributes = self.check_attributes(tokens, FUNC_ATTRIBUTES, 'functions', node.attributes)
+                is_main = isinstance(node, FuncDecl) and node.name.value == 'main' and node.method_type is None
+                if is_main and defined_in_header(node):
+                    self.attribute_error(tokens[0], 'main can not be inline or constexpr')
+                if (is_virtual or node.is_virtual) and 'constexpr' in node.attributes:
+                    self.attribute_error(tokens[0], 'Attribute @constexpr does not apply to virtual methods')
+                return statement
+            if type(node) is ClassDecl:
+                node.attributes = self.check_attributes(tokens, CLASS_ATTRIBUTES, 'classes', node.attributes)
+                for member in node.body.statements:
+                    method = member.token
+                    if isinstance(method, (FuncDecl, OperatorDecl)):
+                        method.attributes += [name for name in node.attributes if name not in method.attributes and conflicting_attribute(name, method.attributes) is None]
+                return statement
+            self.attribute_error(tokens[0], f'Attribute @{tokens[0].value} does not apply here')
         elif token.type in ['LET', 'MUT']:
             node = self.var_decl()
             self.eat('SEMI')
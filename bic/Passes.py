@@ -0,0 +1,1114 @@
+from .AST import *
+from .Analysis import *
+from .Evaluator import *
+
+import re
+
+# Passes: optimizations of the AST run between parsing and code generation,
+# every pass returns what it changed
+
+# scalar types written as names, cheaper to copy than to reference
+SCALAR_NAMES = re.compile(r'^(std::)?(u?int(8|16|32|64)_t|size_t|ptrdiff_t|u?intptr_t)$')
+
+# methods of the standard library types that have a const overload, a
+# call of one of ACCESS_METHODS only reads when its value is only read
+CONST_METHODS = [
+    'size', 'length', 'empty', 'capacity', 'at', 'front', 'back', 'data',
+    'c_str', 'substr', 'find', 'rfind', 'find_first_of', 'find_last_of',
+    'compare', 'starts_with', 'ends_with', 'count', 'contains',
+    'lower_bound', 'upper_bound', 'equal_range', 'begin', 'end', 'cbegin',
+    'cend', 'rbegin', 'rend', 'top', 'value', 'has_value', 'get', 'str',
+]
+
+# containers whose elements have the type of the first template argument
+SEQUENCES = [
+    'std::vector', 'std::array', 'std::list', 'std::forward_list',
+    'std::deque', 'std::set', 'std::multiset', 'std::unordered_set',
+    'std::unordered_multiset', 'std::span', 'std::initializer_list',
+]
+
+STRINGS = ['std::string', 'std::string_view']
+
+# func_label: name of a function or operator in the reports
+def func_label(node) -> str:
+    if isinstance(node, OperatorDecl):
+        return 'operator' + node.op.value
+    return node.name.value
+
+# type_label: name of a param type, None for types that aren't a plain name
+def type_label(type) -> str:
+    if not isinstance(type, Type):
+        return None
+    if isinstance(type.token, Token):
+        return type.token.value if type.token.type == 'ID' else None
+    if isinstance(type.token, NamespaceAccess):
+        return type.token.transpile()
+    return None
+
+# value_types: names of the module that are cheap to copy, its enums and
+# the aliases of scalars
+def value_types(tree) -> set:
+    types = set()
+    for node in walk(tree):
+        if isinstance(node, EnumDecl):
+            types.add(node.name.value)
+
+    for node in walk(tree):
+        if isinstance(node, TypeDecl) and isinstance(node.right, Type):
+            token = node.right.token
+            if isinstance(token, Token) and (token.type == 'TYPE' or token.value in types):
+                types.add(node.left.value)
+    return types
+
+# is_scalar: type is cheap to copy
+def is_scalar(type, scalars) -> bool:
+    if not isinstance(type, Type):
+        return False
+    if isinstance(type.token, TypePtr):
+        return True
+    if isinstance(type.token, Token) and type.token.type == 'TYPE':
+        return True
+    name = type_label(type)
+    return name is not None and (name in scalars or SCALAR_NAMES.match(name) is not None)
+
+# element_type: type of the elements of a container type, None when it
+# isn't known
+def element_type(type):
+    if not isinstance(type, Type):
+        return None
+    if isinstance(type.token, TypeRef):
+        type = type.token.token
+        if not isinstance(type, Type):
+            return None
+
+    name = type_label(type)
+    if name in STRINGS:
+        return Type(Token('TYPE', 'char', 0, 0))
+    if name in SEQUENCES and type.template and type.template.params:
+        element = type.template.params[0]
+        return element if isinstance(element, Type) else None
+    return None
+
+# class_methods: class name -> method name -> True when every overload of
+# the method is const
+def class_methods(tree) -> dict:
+    classes = {}
+    for node in walk(tree):
+        if isinstance(node, ClassDecl):
+            methods = classes.setdefault(node.name.value, {})
+            for statement in node.body.statements:
+                method = statement.token
+                if isinstance(method, (FuncDecl, OperatorDecl)):
+                    name = func_label(method)
+                    methods[name] = methods.get(name, True) and method.is_const
+    return classes
+
+# class_decls: class name -> declaration of the classes of tree, None for
+# a name shared by several classes
+def class_decls(tree) -> dict:
+    decls = {}
+    for node in walk(tree):
+        if isinstance(node, ClassDecl):
+            decls[node.name.value] = None if node.name.value in decls else node
+    return decls
+
+# const_call: calling method on a value of the type named name only reads
+# it. The methods of the project classes are looked up in classes, the
+# types of the standard library have CONST_METHODS and a call on any
+# other type may modify the value
+def const_call(name, method, classes) -> bool:
+    if name in classes:
+        return classes[name].get(method, False)
+    if name is not None and name.startswith('std::'):
+        return method in CONST_METHODS
+    return False
+
+# ref_params: function name -> positions of its params that are
+# references to non const
+def ref_params(tree) -> dict:
+    refs = {}
+    for node in walk(tree):
+        if isinstance(node, (FuncDecl, OperatorDecl)):
+            for i, param in enumerate(node.args):
+                if is_mut_ref(param.type):
+                    refs.setdefault(func_label(node), set()).add(i)
+    return refs
+
+# functions: the functions and methods whose signature a pass may change,
+# methods of classes with bases and virtual methods keep the signature the
+# overrides are matched with
+def functions(tree):
+    def class_functions(class_decl):
+        if class_decl.inherits:
+            return
+        for statement in class_decl.body.statements:
+            node = statement.token
+            if isinstance(node, (FuncDecl, OperatorDecl)) and not node.is_virtual and node.body is not None:
+                yield node
+            elif isinstance(node, ClassDecl):
+                yield from class_functions(node)
+
+    for statement in tree.statements:
+        node = statement.token
+        if isinstance(node, FuncDecl) and node.body is not None:
+            yield node
+        elif isinstance(node, ClassDecl):
+            yield from class_functions(node)
+
+# const_ref_params: passes the params of class and template types by const
+# reference when the function never modifies them. Scalars, enums,
+# pointers, references, arrays, params declared mut and params called
+# stay by value. classes and refs are the class_methods and ref_params
+# of the whole project. Returns the rewritten (function, param) pairs.
+def const_ref_params(tree, classes, refs) -> list:
+    scalars = value_types(tree)
+
+    rewritten = []
+    for func in functions(tree):
+        # cpp literals may use the params in any way
+        if any(isinstance(node, CppLit) for node in walk(func.body)):
+            continue
+
+        types = {}
+        for param in func.args:
+            name = type_label(param.type)
+            if param.is_mut or param.is_ref or param.bracket or name is None:
+                continue
+            if param.type.is_const or param.type.variadic or name in scalars or SCALAR_NAMES.match(name):
+                continue
+            types[param.name.value] = name
+
+        if not types:
+            continue
+
+        def const_method(name, method):
+            return const_call(types.get(name), method, classes)
+
+        # a callable may have a call operator that isn't const
+        called = {node.func.value for node in walk(func.body) if isinstance(node, Call) and isinstance(node.func, Token)}
+
+        mutated = mutated_names(func.body, const_method, refs)
+        for param in func.args:
+            if param.name.value in types and param.name.value not in mutated | called:
+                param.is_ref = True
+                rewritten.append((func, param))
+
+    return rewritten
+
+# modifies_this: a method body may modify its object: it assigns a field,
+# binds it to a reference or a pointer, calls a method of the class that
+# isn't in consts or a method of a field that isn't const, or uses this
+# itself. methods are the names of the methods of the class, fields the
+# types of its fields and classes the methods of the project classes (see
+# const_call)
+def modifies_this(body, methods, consts, fields, classes, refs) -> bool:
+    for node in walk(body):
+        if isinstance(node, Token):
+            if node.type == 'ID' and node.value == 'this':
+                return True
+
+        elif isinstance(node, BinOp):
+            if node.op in ASSIGN_OPS and this_member(node.left) is not None:
+                return True
+            if node.op == '>>' and this_member(node.right) is not None:
+                return True
+
+        elif isinstance(node, (PreOp, PostOp)):
+            if node.op in ['++', '--'] and this_member(node.expr) is not None:
+                return True
+
+        elif isinstance(node, UnaryOp):
+            if node.op == '&' and this_member(node.expr) is not None:
+                return True
+
+        elif isinstance(node, VarDecl):
+            # references, pointers and iterators of a field, auto would
+            # deduce them to const in a const method
+            if node.value is not None and this_member(node.value) is not None:
+                if node.type is None or is_mut_ref(node.type) or (isinstance(node.type, Type) and isinstance(node.type.token, TypePtr) and not node.type.is_const):
+                    return True
+
+        elif isinstance(node, For):
+            if this_member(node.iterable) is not None and is_mut_ref(node.var_decl.type):
+                return True
+
+        elif isinstance(node, Call):
+            func = node.func
+            if isinstance(func, ObjectAccess) and func.left == 'this':
+                if not isinstance(func.right, Token) or func.right.value not in consts:
+                    return True
+            elif isinstance(func, (ObjectAccess, Dot)) and isinstance(func.right, Token):
+                member = this_member(func.left)
+                if member is not None and not const_call(type_label(fields.get(member)), func.right.value, classes):
+                    return True
+            elif isinstance(func, Token) and func.value in methods and func.value not in consts:
+                return True
+
+            name = call_name(node)
+            positions = refs.get(name, set())
+            for i, arg in enumerate(node.args.token):
+                if (name in MUTATING_CALLS or i in positions) and this_member(arg) is not None:
+                    return True
+
+    # elements of a field modified through the variable of a range for loop
+    elements = {}
+    for loop in walk(body):
+        if isinstance(loop, For):
+            iterable = loop.iterable.token if isinstance(loop.iterable, Expr) else loop.iterable
+            if isinstance(iterable, ObjectAccess) and iterable.left == 'this' and isinstance(iterable.right, Token):
+                elements[loop.var_decl.name.value] = type_label(element_type(fields.get(iterable.right.value)))
+    mutated = mutated_names(body, lambda name, method: const_call(elements.get(name), method, classes), refs)
+    for loop in walk(body):
+        if isinstance(loop, For) and loop.is_reference() and loop.var_decl.name.value in mutated:
+            if this_member(loop.iterable) is not None:
+                return True
+    return False
+
+# const_methods: declares const the methods that never modify their
+# object, so they can be called on const objects and const references.
+# Every method is assumed const and the ones that modify their object,
+# or call a method that does, are taken out until none is, the methods
+# of all the classes of the trees are inferred together as they call
+# each other across the modules. Static, virtual and overloaded methods,
+# methods of classes with bases, methods returning a reference, a pointer
+# or a deduced value and bodies with cpp literals are left alone. Returns
+# the (tree, class, method) triples.
+def const_methods(trees) -> list:
+    classes = [(tree, node) for tree in trees for node in walk(tree) if isinstance(node, ClassDecl)]
+    refs = ref_params(trees)
+
+    candidates = []
+    for tree, class_decl in classes:
+        if class_decl.inherits:
+            continue
+        members = [s.token for s in class_decl.body.statements if isinstance(s.token, FuncDecl)]
+        for method in members:
+            name = method.name.value
+            if method.method_type is not None or name == class_decl.name.value or method.is_static or method.is_virtual:
+                continue
+            if method.is_const or method.body is None or sum(m.name.value == name for m in members) > 1:
+                continue
+            # auto could deduce an iterator of a field, methods without a
+            # value are safe
+            if method.type is None and any(isinstance(node, Return) and node.expr is not None for node in walk(method.body)):
+                continue
+            if is_mut_ref(method.type) or (isinstance(method.type, Type) and isinstance(method.type.token, TypePtr) and not method.type.is_const):
+                continue
+            if any(isinstance(node, CppLit) for node in walk(method.body)):
+                continue
+            candidates.append((tree, class_decl, method))
+
+    fields = {}
+    for _, class_decl in classes:
+        types = fields.setdefault(class_decl.name.value, {})
+        for statement in class_decl.body.statements:
+            if isinstance(statement.token, VarDecl):
+                types[statement.token.name.value] = statement.token.type
+
+    assumed = set(method for _, _, method in candidates)
+    changed = True
+    while changed:
+        changed = False
+
+        # class name -> method name -> every overload is const or assumed
+        status = {}
+        for _, class_decl in classes:
+            methods = status.setdefault(class_decl.name.value, {})
+            for statement in class_decl.body.statements:
+                method = statement.token
+                if isinstance(method, (FuncDecl, OperatorDecl)):
+                    name = func_label(method)
+                    const = method.is_const or method.is_static or method in assumed
+                    methods[name] = methods.get(name, True) and const
+
+        for _, class_decl, method in candidates:
+            if method not in assumed:
+                continue
+
+            methods = status[class_decl.name.value]
+            consts = set(name for name, const in methods.items() if const)
+            if modifies_this(method.body, set(methods), consts, fields[class_decl.name.value], status, refs):
+                assumed.discard(method)
+                changed = True
+
+    inferred = []
+    for tree, class_decl, method in candidates:
+        if method in assumed:
+            method.is_const = True
+            inferred.append((tree, class_decl, method))
+    return inferred
+
+# loop_bindings: declares the variables of range for loops without a type
+# by reference when the body modifies them, so the elements are modified,
+# by value when the elements are scalars and by const reference
+# otherwise. classes and refs are the tables of the whole project. Returns
+# the rewritten (loop, binding) pairs.
+def loop_bindings(tree, classes, refs) -> list:
+    scalars = value_types(tree)
+
+    rewritten = []
+    for func in walk(tree):
+        if not isinstance(func, (FuncDecl, OperatorDecl)) or func.body is None:
+            continue
+
+        # declared types of the variables of the function and the
+        # variables that can't be modified
+        types = {}
+        constants = set()
+        for param in func.args:
+            types[param.name.value] = param.type
+            if param.is_ref or param.type.is_const:
+                constants.add(param.name.value)
+        for node in walk(func.body):
+            if isinstance(node, VarDecl):
+                if node.type is not None:
+                    types[node.name.value] = node.type
+                if not node.is_mut:
+                    constants.add(node.name.value)
+
+        for loop in walk(func.body):
+            if not isinstance(loop, For) or loop.var_decl.type is not None or loop.is_copy:
+                continue
+
+            element = None
+            if isinstance(loop.iterable.token, Token):
+                element = element_type(types.get(loop.iterable.token.value))
+            name = loop.var_decl.name.value
+            if element is not None:
+                # loops nested in this one see the type of the variable
+                types[name] = element
+
+            def const_method(variable, method):
+                # elements of unknown types are modified by any call
+                return variable == name and element is not None and const_call(type_label(element), method, classes)
+
+            if name in mutated_names(loop.body, const_method, refs):
+                # the elements of a constant are modified in a copy
+                loop.binding = 'auto' if lvalue_root(loop.iterable) in constants else 'auto&'
+            elif is_scalar(element, scalars):
+                loop.binding = 'auto'
+            else:
+                loop.binding = 'const auto&'
+            rewritten.append((loop, loop.binding))
+
+    return rewritten
+
+# shortest if chain turned into a switch
+SWITCH_ARMS = 3
+
+# line_of: line of the first token of node
+def line_of(node) -> int:
+    return next((t.line for t in walk(node) if isinstance(t, Token)), 0)
+
+# is_subject: expression a switch can evaluate once instead of every
+# comparison, a variable or a member of one
+def is_subject(node) -> bool:
+    if isinstance(node, Token):
+        return node.type == 'ID'
+    if isinstance(node, ObjectAccess):
+        return isinstance(node.right, Token) and (node.left == 'this' or is_subject(node.left))
+    return False
+
+# case_label: kind of a constant usable as a case label, 'int' or the enum
+# of an enum constant, None for other expressions
+def case_label(node, enums):
+    if literal_value(node) is not None:
+        return 'int' if isinstance(literal_value(node), int) else None
+    if isinstance(node, NamespaceAccess) and isinstance(node.right, Token):
+        left = node.left.right if isinstance(node.left, NamespaceAccess) else node.left
+        if isinstance(left, Token) and left.value in enums:
+            return left.value
+    return None
+
+# equality_labels: subject, kind and labels of a condition comparing the
+# subject with constants (x == A || x == B), None for other conditions
+def equality_labels(cond, enums):
+    while isinstance(cond, (Expr, Parenthesis)):
+        cond = cond.token if isinstance(cond, Expr) else cond.expr
+
+    if not isinstance(cond, BinOp):
+        return None
+
+    if cond.op == '||':
+        left = equality_labels(cond.left, enums)
+        right = equality_labels(cond.right, enums)
+        if left is None or right is None or left[0].transpile() != right[0].transpile() or left[1] != right[1]:
+            return None
+        return left[0], left[1], left[2] + right[2]
+
+    if cond.op != '==':
+        return None
+
+    for subject, label in [(cond.left, cond.right), (cond.right, cond.left)]:
+        subject = subject.token if isinstance(subject, Expr) else subject
+        label = label.token if isinstance(label, Expr) else label
+        kind = case_label(label, enums)
+        if is_subject(subject) and kind is not None:
+            return Expr(subject), kind, [label]
+    return None
+
+# is_integral: the declared type can be switched on with integer labels
+def is_integral(type) -> bool:
+    if not isinstance(type, Type):
+        return False
+    if isinstance(type.token, Token) and type.token.type == 'TYPE':
+        return type.token.value in ['int', 'char', 'bool']
+    name = type_label(type)
+    return name is not None and SCALAR_NAMES.match(name) is not None
+
+# switch_chains: turns if/elif chains of SWITCH_ARMS arms or more that
+# compare the same variable with enum constants or integer literals into
+# match statements, lowered to a switch the C++ compiler can make a jump
+# table of. enums are the names of the enums of the project. Chains with
+# a break, duplicated labels, @likely or @unlikely branches or integer
+# labels compared to a variable that isn't declared integral are left
+# alone. Returns the (match, arms)
+# pairs.
+def switch_chains(tree, enums) -> list:
+    rewritten = []
+    for func in walk(tree):
+        if not isinstance(func, (FuncDecl, OperatorDecl)) or func.body is None:
+            continue
+
+        types = {param.name.value: param.type for param in func.args}
+        for node in walk(func.body):
+            if isinstance(node, VarDecl) and node.type is not None:
+                types[node.name.value] = node.type
+
+        for statement in walk(func.body):
+            if not isinstance(statement, Statement) or not isinstance(statement.token, If):
+                continue
+
+            chain = statement.token
+            branches = [(chain.cond, chain.body)] + [(elif_stmt.cond, elif_stmt.body) for elif_stmt in chain.elif_stmt]
+            if len(branches) < SWITCH_ARMS or has_break([body for _, body in branches] + [chain.else_stmt]):
+                continue
+            # a switch has no likely branches
+            if chain.attributes or chain.else_attributes or any(elif_stmt.attributes for elif_stmt in chain.elif_stmt):
+                continue
+
+            arms = []
+            for cond, body in branches:
+                labels = equality_labels(cond, enums)
+                if labels is None:
+                    break
+                arms.append((labels, body))
+            if len(arms) != len(branches):
+                continue
+
+            subject, kind, _ = arms[0][0]
+            if any(labels[0].transpile() != subject.transpile() or labels[1] != kind for labels, _ in arms):
+                continue
+
+            values = [label.transpile() for (_, _, labels), _ in arms for label in labels]
+            if len(set(values)) != len(values):
+                continue
+
+            if kind == 'int':
+                variable = subject.token.value if isinstance(subject.token, Token) else None
+                if not is_integral(types.get(variable)):
+                    continue
+
+            match = Match(subject, [MatchArm(labels, body) for (_, _, labels), body in arms], chain.else_stmt)
+            statement.token = match
+            rewritten.append((match, len(arms)))
+
+    return rewritten
+
+# new_object: the object created by a `new` expression, a call of its
+# constructor or its type, None for other expressions and arrays
+def new_object(node):
+    if isinstance(node, Expr):
+        node = node.token
+    if not isinstance(node, New):
+        return None
+
+    expr = node.expr.token if isinstance(node.expr, Expr) else node.expr
+    if isinstance(expr, Call) and isinstance(expr.func, (Token, NamespaceAccess)):
+        return expr
+    if isinstance(expr, NamespaceAccess) or (isinstance(expr, Token) and expr.type == 'ID'):
+        return expr
+    return None
+
+# pointer_uses: (use, ancestors) of every use of the variable name below node
+def pointer_uses(node, name, ancestors=None, uses=None):
+    ancestors = [] if ancestors is None else ancestors
+    uses = [] if uses is None else uses
+
+    if isinstance(node, Token):
+        if node.type == 'ID' and node.value == name:
+            uses.append((node, list(ancestors)))
+    elif isinstance(node, (list, tuple)):
+        for child in node:
+            pointer_uses(child, name, ancestors, uses)
+    elif isinstance(node, AST):
+        ancestors.append(node)
+        for child in vars(node).values():
+            pointer_uses(child, name, ancestors, uses)
+        ancestors.pop()
+    return uses
+
+# pointer_use: what a use of a pointer does with it: 'access' through ->
+# or *, 'null' compared with null, 'del', 'renew' assigned a new object,
+# None when the pointer escapes
+def pointer_use(token, ancestors) -> str:
+    child = token
+    parents = list(ancestors)
+    while parents and isinstance(parents[-1], (Expr, Parenthesis)):
+        child = parents.pop()
+    parent = parents[-1] if parents else None
+
+    if isinstance(parent, ObjectAccess) and parent.op == '->' and parent.left is token:
+        return 'access'
+    if isinstance(parent, UnaryOp) and parent.op == '*':
+        return 'access'
+    if isinstance(parent, Del):
+        return 'del'
+    if isinstance(parent, BinOp):
+        other = parent.right if parent.left is child else parent.left
+        other = other.token if isinstance(other, Expr) else other
+        if parent.op in ['==', '!='] and isinstance(other, Null):
+            return 'null'
+        if parent.op == '=' and parent.left is child and new_object(parent.right) is not None:
+            return 'renew'
+    return None
+
+# enclosing: closest ancestor of kind
+def enclosing(ancestors, kind):
+    return next((node for node in reversed(ancestors) if isinstance(node, kind)), None)
+
+# reset: statement calling reset on the std::unique_ptr name
+def reset(name, args=[]):
+    return Expr(Call(ObjectAccess(name, Token('ID', 'reset', name.line, name.column)), Args(args)))
+
+# quiet_type: destroying a value of type runs no code of the program:
+# scalars, pointers, strings, sequences of quiet types and the classes of
+# decls without a destructor whose bases and fields are quiet
+def quiet_type(type, decls, scalars, seen=None) -> bool:
+    seen = set() if seen is None else seen
+    if is_scalar(type, scalars) or type_label(type) in STRINGS:
+        return True
+    element = element_type(type)
+    if element is not None:
+        return quiet_type(element, decls, scalars, seen)
+
+    name = type_label(type)
+    if name in seen:
+        return True
+    if decls.get(name) is None:
+        return False
+    seen.add(name)
+
+    body = [statement.token for statement in decls[name].body.statements]
+    if any(isinstance(node, FuncDecl) and node.method_type == 'destructor' for node in body):
+        return False
+    if not all(quiet_type(base if isinstance(base, Type) else Type(base), decls, scalars, seen) for _, base in decls[name].inherits):
+        return False
+    return all(quiet_type(node.type, decls, scalars, seen) for node in body if isinstance(node, VarDecl) and not node.is_static)
+
+# stack_allocations: escape analysis of the pointers initialized with a
+# `new` object in a function. When the pointer is only used to reach the
+# object (->, *, compared with null) and deleted in the block declaring
+# it, if at all, the object is created on the stack and the del removed.
+# The destructor then runs when the block is left, so an object whose
+# destructor isn't quiet (see quiet_type, decls are the classes of the
+# project) only goes on the stack when its del ends the block. A pointer
+# that is also deleted in nested blocks or assigned new objects, or whose
+# del runs a destructor before the end of the block, becomes a
+# std::unique_ptr, its dels reset it. An object with a destructor that is
+# never deleted stays on the heap, its destructor never ran. Pointers
+# returned, stored, given to calls or otherwise used keep the heap
+# object. Returns the (var_decl, allocation) pairs.
+def stack_allocations(tree, decls) -> list:
+    scalars = value_types(tree)
+    rewritten = []
+    for func in walk(tree):
+        if not isinstance(func, (FuncDecl, OperatorDecl)) or func.body is None:
+            continue
+        if any(isinstance(node, CppLit) for node in walk(func.body)):
+            continue
+
+        declared = {}
+        for node in walk(func.body):
+            if isinstance(node, VarDecl):
+                declared[node.name.value] = declared.get(node.name.value, 0) + 1
+        for param in func.args:
+            declared[param.name.value] = declared.get(param.name.value, 0) + 1
+
+        for block in walk(func.body):
+            if not isinstance(block, Block):
+                continue
+
+            for statement in block.statements:
+                decl = statement.token if isinstance(statement, Statement) else None
+                if not isinstance(decl, VarDecl) or decl.is_static or new_object(decl.value) is None:
+                    continue
+                if not isinstance(decl.type, Type) or not isinstance(decl.type.token, TypePtr):
+                    continue
+                # a shadowed name can't be told apart
+                if declared[decl.name.value] > 1:
+                    continue
+
+                uses = [use for use in pointer_uses(func.body, decl.name.value) if use[0] is not decl.name]
+                # a lambda may be called after the block is left
+                kinds = [pointer_use(token, ancestors) if enclosing(ancestors, Lambda) is None else None for token, ancestors in uses]
+                if None in kinds:
+                    continue
+
+                dels = [enclosing(ancestors, Statement) for (_, ancestors), kind in zip(uses, kinds) if kind == 'del']
+                renews = [enclosing(ancestors, Statement) for (_, ancestors), kind in zip(uses, kinds) if kind == 'renew']
+                if 'renew' in kinds and not decl.is_mut:
+                    continue
+                if any(not isinstance(stmt.token, Expr) or not isinstance(stmt.token.token, BinOp) for stmt in renews):
+                    continue
+
+                pointee = decl.type.token.token
+                quiet = quiet_type(pointee if isinstance(pointee, Type) else Type(pointee), decls, scalars)
+                if not renews and all(stmt in block.statements for stmt in dels) and (quiet or dels == block.statements[-1:]):
+                    decl.allocation = 'stack'
+                elif dels or quiet:
+                    decl.allocation = 'unique'
+                else:
+                    continue
+
+                for stmt in dels:
+                    stmt.token = None if decl.allocation == 'stack' else reset(decl.name)
+                for stmt in renews:
+                    stmt.token = reset(decl.name, [stmt.token.token.right])
+                rewritten.append((decl, decl.allocation))
+
+    if any(allocation == 'unique' for _, allocation in rewritten):
+        imports = [s.token.path.value for s in tree.statements if isinstance(s.token, Import)]
+        if 'memory' not in imports:
+            tree.statements.insert(0, Statement(Import(Token('STRING', 'memory', 0, 0))))
+
+    rewritten.sort(key=lambda item: item[0].name.line)
+    return rewritten
+
+# class_name: name of a base class without its scope and template
+# arguments, None when it isn't a name
+def class_name(type) -> str:
+    if isinstance(type, Type):
+        type = type.token
+    if isinstance(type, NamespaceAccess):
+        type = type.right
+    if isinstance(type, Token) and type.type == 'ID':
+        return type.value
+    return None
+
+# virtual_methods: the methods of class_decl that can be overridden, the
+# ones declared virtual and the ones overriding a method of overridden, the
+# names of the virtual methods of its bases
+def virtual_methods(class_decl, overridden) -> list:
+    methods = []
+    for statement in class_decl.body.statements:
+        method = statement.token
+        if not isinstance(method, FuncDecl) or method.method_type == 'destructor' or method.name.value == class_decl.name.value:
+            continue
+        if method.is_static or method.template is not None:
+            continue
+        if method.is_virtual or method.name.value in overridden:
+            methods.append(method)
+    return methods
+
+# devirtualize: marks final the classes of the whole program that no class
+# derives from, and the virtual methods no derived class overrides, so the
+# C++ compiler can call them directly and inline them. Classes are matched
+# by name, a name shared by several classes counts as derived from when
+# one of them is. Abstract classes and classes named in cpp literals are
+# left open, they are meant to be or may be derived from. Only safe when
+# no code outside the trees derives from their classes. Returns the
+# (tree, class or method) pairs.
+def devirtualize(trees) -> list:
+    classes = [(tree, node) for tree in trees for node in walk(tree) if isinstance(node, ClassDecl)]
+
+    # class name -> classes deriving from a class of that name
+    derived = {}
+    for _, node in classes:
+        for _, base in node.inherits:
+            name = class_name(base)
+            if name is not None:
+                derived.setdefault(name, []).append(node)
+
+    cpp = ' '.join(node.transpile() for tree in trees for node in walk(tree) if isinstance(node, CppLit))
+    for word in re.findall(r'\w+', cpp):
+        derived.setdefault(word, [])
+
+    by_name = {}
+    for _, node in classes:
+        by_name.setdefault(node.name.value, []).append(node)
+
+    # overridable: names of the virtual methods of the classes named name
+    # and their bases
+    cache = {}
+    def overridable(name, seen) -> set:
+        if name in cache:
+            return cache[name]
+        if name in seen:
+            return set()
+        seen.add(name)
+        names = set()
+        for node in by_name.get(name, []):
+            inherited = set()
+            for _, base in node.inherits:
+                inherited |= overridable(class_name(base), seen)
+            names |= inherited | {method.name.value for method in virtual_methods(node, inherited)}
+        cache[name] = names
+        return names
+
+    # descendants: the classes deriving from the classes named name, directly
+    # or not
+    def descendants(name, seen) -> list:
+        nodes = []
+        for node in derived.get(name, []):
+            if node.name.value not in seen:
+                seen.add(node.name.value)
+                nodes += [node] + descendants(node.name.value, seen)
+        return nodes
+
+    rewritten = []
+    for tree, node in classes:
+        name = node.name.value
+        methods = [s.token for s in node.body.statements if isinstance(s.token, FuncDecl)]
+        if any(method.body is None for method in methods):
+            continue
+
+        inherited = set()
+        for _, base in node.inherits:
+            inherited |= overridable(class_name(base), set())
+
+        if name not in derived:
+            node.is_final = True
+            rewritten.append((tree, node))
+            continue
+
+        overrides = set()
+        for child in descendants(name, {name}):
+            overrides.update(s.token.name.value for s in child.body.statements if isinstance(s.token, FuncDecl))
+
+        for method in virtual_methods(node, inherited):
+            if method.name.value not in overrides:
+                method.is_final = True
+                rewritten.append((tree, method))
+
+    return rewritten
+
+# foldable_functions: the free functions of the trees over int, bool,
+# char and double values, by name. Overloaded names, templates and names
+# of variables, params and methods are left out, their calls may not be
+# calls of the function
+def foldable_functions(trees) -> dict:
+    functions = {}
+    shadowed = set()
+    for tree in trees:
+        for statement in tree.statements:
+            node = statement.token
+            if isinstance(node, FuncDecl) and node.name.value != 'main':
+                if node.name.value in functions:
+                    shadowed.add(node.name.value)
+                functions[node.name.value] = node
+
+        for node in walk(tree):
+            if isinstance(node, (VarDecl, Param)):
+                shadowed.add(node.name.value)
+            elif isinstance(node, ClassDecl):
+                shadowed.update(s.token.name.value for s in node.body.statements if isinstance(s.token, FuncDecl))
+
+    foldable = {}
+    for name, func in functions.items():
+        if name in shadowed or func.template is not None or func.body is None:
+            continue
+        if value_type(func.type) is None or any(value_type(param.type) is None or param.bracket for param in func.args):
+            continue
+        foldable[name] = func
+    return foldable
+
+# fold_calls: replaces the calls of the foldable functions whose arguments
+# are literals with their result, computed by the Evaluator. Calls whose
+# evaluation leaves the pure subset it knows, overflows or takes too many
+# steps are left to the runtime, so are the calls in cpp literals.
+# Returns the (call, literal) pairs.
+def fold_calls(tree, functions) -> list:
+    evaluator = Evaluator(functions)
+    folded = []
+
+    def fold_call(call):
+        if not isinstance(call.func, Token) or call.template is not None:
+            return None
+        func = functions.get(call.func.value)
+        if func is None:
+            return None
+        args = [constant(arg) for arg in call.args.token]
+        if None in args:
+            return None
+
+        value = evaluator.evaluate(func, args)
+        if value is None:
+            return None
+        try:
+            return literal(value, value_type(func.type), call.func)
+        except NotEvaluable:
+            return None
+
+    # the arguments are folded before the calls they are given to
+    def fold(node):
+        for key, child in list(vars(node).items()):
+            if isinstance(child, list):
+                for i, item in enumerate(child):
+                    if isinstance(item, AST):
+                        child[i] = fold_node(item)
+            elif isinstance(child, AST):
+                setattr(node, key, fold_node(child))
+
+    def fold_node(node):
+        fold(node)
+        if isinstance(node, Call):
+            result = fold_call(node)
+            if result is not None:
+                folded.append((node, result))
+                return result
+        return node
+
+    fold(tree)
+    return folded
+
+# calls given a callable that may keep it after they return
+ESCAPING_CALLS = ['async', 'thread', 'jthread', 'bind', 'function']
+
+# variable_uses: (token, ancestors) of the names below node used as
+# variables, not as members, scopes, types or declared names
+def variable_uses(node, ancestors=None, uses=None):
+    ancestors = [] if ancestors is None else ancestors
+    uses = [] if uses is None else uses
+
+    if isinstance(node, Token):
+        if node.type == 'ID':
+            uses.append((node, list(ancestors)))
+    elif isinstance(node, (list, tuple)):
+        for child in node:
+            variable_uses(child, ancestors, uses)
+    elif isinstance(node, AST) and not isinstance(node, (Type, NamespaceAccess)):
+        ancestors.append(node)
+        for key, child in vars(node).items():
+            if key == 'right' and isinstance(node, (ObjectAccess, Dot)) and isinstance(child, Token):
+                continue
+            if key == 'name' and isinstance(node, (VarDecl, Param)):
+                continue
+            variable_uses(child, ancestors, uses)
+        ancestors.pop()
+    return uses
+
+# lambda_nodes: (lambda, ancestors) of every lambda below node
+def lambda_nodes(node, ancestors=None, found=None):
+    ancestors = [] if ancestors is None else ancestors
+    found = [] if found is None else found
+
+    if isinstance(node, (list, tuple)):
+        for child in node:
+            lambda_nodes(child, ancestors, found)
+    elif isinstance(node, AST):
+        if isinstance(node, Lambda):
+            found.append((node, list(ancestors)))
+        ancestors.append(node)
+        for child in vars(node).values():
+            lambda_nodes(child, ancestors, found)
+        ancestors.pop()
+    return found
+
+# callable_use: what is done with a lambda or a variable holding one:
+# 'call' called or given to a call that doesn't keep it, 'decl' the value
+# of a variable, None when it escapes. calls maps the functions of the
+# project to the positions of the params they only call. The functions
+# of the standard library but ESCAPING_CALLS, like the algorithms, call
+# what they are given before they return, any other function may keep it.
+def callable_use(node, ancestors, calls) -> str:
+    child = node
+    parents = list(ancestors)
+    while parents and isinstance(parents[-1], (Expr, Parenthesis)):
+        child = parents.pop()
+    parent = parents[-1] if parents else None
+
+    if isinstance(parent, Call) and parent.func is child:
+        return 'call'
+    if isinstance(parent, Args) and len(parents) > 1 and isinstance(parents[-2], Call):
+        call = parents[-2]
+        name = call_name(call)
+        position = next(i for i, arg in enumerate(parent.token) if arg is child)
+        if isinstance(call.func, NamespaceAccess) and call.func.transpile().startswith('std::') and name not in ESCAPING_CALLS:
+            return 'call'
+        if isinstance(call.func, Token) and position in calls.get(name, set()):
+            return 'call'
+    if isinstance(parent, VarDecl) and parent.value is child:
+        return 'decl'
+    return None
+
+# called_params: function name -> positions of the params the function
+# only calls or gives to calls, the params of callables it doesn't keep,
+# over the functions of every tree. The functions giving a param to
+# another one are inferred together: no param is assumed called and the
+# positions grow until none is added, recursive calls keep the param.
+def called_params(trees) -> dict:
+    funcs = [s.token for tree in trees for s in tree.statements if isinstance(s.token, FuncDecl) and s.token.body is not None]
+
+    calls = {}
+    while True:
+        found = {}
+        for func in funcs:
+            positions = set()
+            for i, param in enumerate(func.args):
+                uses = pointer_uses(func.body, param.name.value)
+                if all(enclosing(ancestors, Lambda) is None and callable_use(token, ancestors, calls) == 'call' for token, ancestors in uses):
+                    positions.add(i)
+
+            # every overload has to call it
+            name = func.name.value
+            found[name] = found[name] & positions if name in found else positions
+        if found == calls:
+            return calls
+        calls = found
+
+# lambda_escapes: the lambda may be called after the variables of the
+# function are gone: anything but called, given to a call that doesn't
+# keep it or held in a variable only used so
+def lambda_escapes(lam, ancestors, body, calls) -> bool:
+    use = callable_use(lam, ancestors, calls)
+    if use != 'decl':
+        return use is None
+
+    decl = enclosing(ancestors, VarDecl)
+    if decl.is_static:
+        return True
+    for token, use_ancestors in pointer_uses(body, decl.name.value):
+        if token is decl.name:
+            continue
+        # another lambda may escape with it
+        if enclosing(use_ancestors, Lambda) is not None:
+            return True
+        if callable_use(token, use_ancestors, calls) != 'call':
+            return True
+    return False
+
+# lambda_captures: infers the captures of the lambdas from the variables
+# of the enclosing function they use. A lambda that doesn't escape the
+# function captures by reference, except the scalars it only reads which
+# are copied. A lambda that escapes, returned, stored or given to a
+# function that may keep it, captures by value and moves in the mut
+# objects the function no longer uses after it, it is mutable when it
+# modifies its copies. Lambdas using fields or methods capture this,
+# lambdas with cpp literals capture everything. classes, refs and calls
+# are the class_methods, ref_params and called_params of the whole
+# project. Returns the (lambda, captures) pairs.
+def lambda_captures(tree, classes, refs, calls) -> list:
+    scalars = value_types(tree)
+
+    # the names a method reaches through this
+    members = {}
+    for node in walk(tree):
+        if isinstance(node, ClassDecl):
+            names = set()
+            for statement in node.body.statements:
+                if isinstance(statement.token, (FuncDecl, VarDecl)):
+                    names.add(statement.token.name.value)
+            for statement in node.body.statements:
+                if isinstance(statement.token, (FuncDecl, OperatorDecl)):
+                    members[id(statement.token)] = names
+
+    # lambdas outside of functions have nothing to capture
+    for node in walk(tree):
+        if isinstance(node, Lambda):
+            node.captures = []
+
+    inferred = []
+    for func in walk(tree):
+        if not isinstance(func, (FuncDecl, OperatorDecl)) or func.body is None:
+            continue
+
+        # declared types of the variables of the function and of its
+        # lambdas, the ones copied for free and the ones that can be moved
+        types = {}
+        declared = {}
+        counters = set()
+        arrays = set()
+        statics = set()
+        movable = set()
+        for param in func.args:
+            types[param.name.value] = param.type
+            if not param.is_ref and not param.type.is_const and not isinstance(param.type.token, TypeRef):
+                movable.add(param.name.value)
+        for node in walk(func.body):
+            if isinstance(node, (VarDecl, Param)):
+                name = node.name.value
+                types[name] = node.type
+                declared[name] = declared.get(name, 0) + 1
+                if node.bracket:
+                    arrays.add(name)
+                if isinstance(node, VarDecl) and node.is_static:
+                    statics.add(name)
+                if isinstance(node, VarDecl) and node.is_mut and isinstance(node.type, Type) and not isinstance(node.type.token, TypeRef):
+                    movable.add(name)
+            elif isinstance(node, RangeFor):
+                counters.add(node.var_decl.name.value)
+        # a shadowed name can't be told apart
+        movable = {name for name in movable if declared.get(name, 0) + (name in [p.name.value for p in func.args]) == 1}
+
+        def const_method(name, method):
+            return const_call(type_label(types.get(name)), method, classes)
+
+        for lam, ancestors in lambda_nodes(func.body):
+            escapes = lambda_escapes(lam, ancestors, func.body, calls)
+            if any(isinstance(node, CppLit) for node in walk(lam.body)):
+                lam.captures = ['='] if escapes else ['&']
+                inferred.append((lam, lam.captures))
+                continue
+
+            local = {p.name.value for p in lam.params}
+            local.update(node.name.value for node in walk(lam.body) if isinstance(node, (VarDecl, Param)))
+            uses = [token.value for token, _ in variable_uses(lam.body) if token.value not in local]
+
+            free = []
+            for name in uses:
+                if name in types and name not in statics and name not in free:
+                    free.append(name)
+
+            captures = []
+            names = members.get(id(func), set())
+            if any(isinstance(node, ObjectAccess) and node.left == 'this' for node in walk(lam.body)) or any(name in names and name not in types for name in uses):
+                captures.append('this')
+
+            mutated = mutated_names(lam.body, const_method, refs)
+            last = max((token.line, token.column) for token in walk(lam) if isinstance(token, Token))
+            statement = enclosing(ancestors, Statement)
+            in_loop = enclosing(ancestors, (While, For, RangeFor)) is not None
+
+            # the function doesn't use the variable after the lambda, nor
+            # in the statement creating it where the order is unknown
+            def moved(name):
+                if in_loop or name not in movable:
+                    return False
+                for token, use_ancestors in pointer_uses(func.body, name):
+                    if any(node is lam for node in use_ancestors):
+                        continue
+                    if (token.line, token.column) > last or any(node is statement for node in use_ancestors):
+                        return False
+                return True
+
+            for name in free:
+                scalar = (is_scalar(types[name], scalars) or name in counters) and name not in arrays
+                if not escapes:
+                    captures.append(name if scalar and name not in mutated else '&' + name)
+                elif not scalar and moved(name):
+                    captures.append(f'{name} = std::move({name})')
+                else:
+                    captures.append(name)
+
+            lam.captures = captures
+            lam.is_mutable = escapes and any(name in mutated for name in free)
+            inferred.append((lam, captures))
+
+    if any('std::move' in capture for _, captures in inferred for capture in captures):
+        imports = [s.token.path.value for s in tree.statements if isinstance(s.token, Import)]
+        if 'utility' not in imports:
+            tree.statements.insert(0, Statement(Import(Token('STRING', 'utility', 0, 0))))
+
+    inferred.sort(key=lambda item: line_of(item[0]))
+    return inferred
@@ -0,0 +1,279 @@
+from .AST import *
+
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+PHASES = ['read', 'lex', 'parse', 'codegen', 'write']
+
+# decl_name: label of a top level statement in the trace
+def decl_name(node) -> str:
+    kind = type(node).__name__
+    if isinstance(node, (FuncDecl, ClassDecl, EnumDecl, VarDecl)):
+        return f'{kind} {node.name.value}'
+    if isinstance(node, TypeDecl):
+        return f'{kind} {node.left.value}'
+    if isinstance(node, Import):
+        return f'{kind} {node.path.value}'
+    return kind
+
+class Profiler:
+    """ Wall and CPU time of the compiler phases, with counters of the lexer,
+    the parser and the generated code.
+
+    Lexers, parsers and generators are only instrumented when a profiler is
+    given to the project, their methods are wrapped on the instance so the
+    compiler runs unchanged without one. Lexing happens while parsing, its
+    wall time is measured per token and taken out of the parse phase, which
+    shares its CPU time with lex in the same proportion.
+
+    With memory the allocations are traced from construction on and a
+    snapshot is taken at the end of every phase: after the lexer read the
+    source, after parsing and after generating. Tracing slows everything
+    down, the times are not meaningful then.
+    """
+
+    def __init__(self, memory : bool = False, top : int = 10):
+        self.origin = time.perf_counter()
+        self.phases = {phase: [0.0, 0.0] for phase in PHASES}
+        self.counters = {
+            'tokens': 0,
+            'relexed tokens': 0,
+            'speculative parses': 0,
+            'speculative failures': 0,
+            'rewinds': 0,
+            'output bytes': 0,
+        }
+        self.nodes = {}
+        self.events = []
+
+        # wall time spent lexing by the instrumented lexers
+        self.lex_wall = 0.0
+
+        # class -> [count, bytes] of the AST nodes and tokens, and the
+        # memory of every phase, when tracing allocations
+        self.memory = memory
+        self.top = top
+        self.sizes = {}
+        self.snapshots = []
+        self.last_snapshot = None
+        self.peak = 0
+        if memory:
+            tracemalloc.start()
+
+    def timestamp(self, wall : float) -> float:
+        return (wall - self.origin) * 1e6
+
+    def add_event(self, name : str, category : str, start : float, end : float, args : dict = None):
+        event = {
+            'name': name, 'cat': category, 'ph': 'X',
+            'ts': self.timestamp(start), 'dur': (end - start) * 1e6,
+            'pid': os.getpid(), 'tid': threading.get_ident(),
+        }
+        if args:
+            event['args'] = args
+        self.events.append(event)
+
+    # phase: context measuring a phase of the compiler for filename
+    def phase(self, name : str, filename : str):
+        return Phase(self, name, filename)
+
+    def count(self, counter : str, value : int = 1):
+        self.counters[counter] += value
+
+    def count_nodes(self, tree : Program):
+        for node in walk(tree):
+            if isinstance(node, AST):
+                name = type(node).__name__
+                self.nodes[name] = self.nodes.get(name, 0) + 1
+
+            if self.memory:
+                name = type(node).__name__
+                size = self.sizes.setdefault(name, [0, 0])
+                size[0] += 1
+                size[1] += sys.getsizeof(node) + sys.getsizeof(vars(node))
+
+    # snapshot: memory held at the end of a phase and the allocation sites
+    # that grew the most during it
+    def snapshot(self, phase : str, filename : str):
+        current, peak = tracemalloc.get_traced_memory()
+        self.peak = max(self.peak, peak)
+
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+            tracemalloc.Filter(False, '<unknown>'),
+        ])
+        if self.last_snapshot is None:
+            stats = snapshot.statistics('lineno')
+            sites = [(stat.traceback[0], stat.size, stat.count) for stat in stats[:self.top]]
+        else:
+            stats = snapshot.compare_to(self.last_snapshot, 'lineno')
+            sites = [(stat.traceback[0], stat.size_diff, stat.count_diff) for stat in stats[:self.top]]
+        self.last_snapshot = snapshot
+
+        self.snapshots.append({
+            'phase': phase,
+            'file': filename,
+            'current': current,
+            'peak': peak,
+            'top': [{'site': f'{frame.filename}:{frame.lineno}', 'size': size, 'count': count} for frame, size, count in sites],
+        })
+
+        # the next phase reports its own peak
+        tracemalloc.reset_peak()
+
+    def instrument_lexer(self, lexer):
+        get_next_token = lexer.get_next_token
+        lexed_to = [0]
+
+        def timed_get_next_token():
+            if lexer.pos < lexed_to[0]:
+                self.counters['relexed tokens'] += 1
+
+            start = time.perf_counter()
+            token = get_next_token()
+            self.lex_wall += time.perf_counter() - start
+
+            self.counters['tokens'] += 1
+            lexed_to[0] = max(lexed_to[0], lexer.pos)
+            return token
+
+        lexer.get_next_token = timed_get_next_token
+
+    def instrument_parser(self, parser):
+        set_capture_error = parser.set_capture_error
+        set_state = parser.set_state
+        error = parser.error
+        statement = parser.statement
+        depth = [0]
+
+        def counted_set_capture_error():
+            self.counters['speculative parses'] += 1
+            return set_capture_error()
+
+        def counted_set_state(state):
+            self.counters['rewinds'] += 1
+            return set_state(state)
+
+        def counted_error(token_type=None, message=None):
+            if parser.is_capture_error:
+                self.counters['speculative failures'] += 1
+            return error(token_type, message)
+
+        # spans of the top level statements only
+        def timed_statement(is_virtual=False):
+            depth[0] += 1
+            start = time.perf_counter()
+            try:
+                node = statement(is_virtual)
+            finally:
+                depth[0] -= 1
+
+            if depth[0] == 0 and node is not None:
+                self.add_event(decl_name(node.token), 'parse', start, time.perf_counter())
+            return node
+
+        parser.set_capture_error = counted_set_capture_error
+        parser.set_state = counted_set_state
+        parser.error = counted_error
+        parser.statement = timed_statement
+
+    def instrument_generator(self, generator):
+        generate_statement = generator.generate_statement
+
+        def timed_generate_statement(statement, parent=''):
+            start = time.perf_counter()
+            generate_statement(statement, parent)
+            self.add_event(decl_name(statement.token), 'codegen', start, time.perf_counter())
+
+        generator.generate_statement = timed_generate_statement
+
+    def report(self) -> str:
+        lines = [f'{"phase":<12}{"wall ms":>12}{"cpu ms":>12}']
+        total_wall = total_cpu = 0.0
+        for phase, (wall, cpu) in self.phases.items():
+            lines.append(f'{phase:<12}{wall * 1000:>12.3f}{cpu * 1000:>12.3f}')
+            total_wall += wall
+            total_cpu += cpu
+        lines.append(f'{"total":<12}{total_wall * 1000:>12.3f}{total_cpu * 1000:>12.3f}')
+        lines.append('')
+
+        for counter, value in self.counters.items():
+            lines.append(f'{counter:<24}{value:>12,}')
+        lines.append('')
+
+        lines.append(f'{"AST nodes":<24}{sum(self.nodes.values()):>12,}')
+        for name, count in sorted(self.nodes.items(), key=lambda item: -item[1]):
+            lines.append(f'    {name:<20}{count:>12,}')
+        return '\n'.join(lines)
+
+    def memory_report(self) -> str:
+        lines = [f'{"peak":<24}{self.peak / 1024:>12,.0f} KiB', '']
+
+        for snapshot in self.snapshots:
+            lines.append(f'after {snapshot["phase"]} {snapshot["file"]}: {snapshot["current"] / 1024:,.0f} KiB live, {snapshot["peak"] / 1024:,.0f} KiB peak')
+            for site in snapshot['top']:
+                lines.append(f'    {site["size"] / 1024:>+10,.1f} KiB {site["count"]:>+9,} blocks  {site["site"]}')
+        lines.append('')
+
+        lines.append(f'{"live objects":<24}{"count":>12}{"KiB":>12}')
+        for name, (count, size) in sorted(self.sizes.items(), key=lambda item: -item[1][1]):
+            lines.append(f'    {name:<20}{count:>12,}{size / 1024:>12,.1f}')
+        return '\n'.join(lines)
+
+    # write_memory: the memory report as json, to be tracked over time
+    def write_memory(self, filename : str):
+        data = {
+            'peak': self.peak,
+            'phases': self.snapshots,
+            'objects': {name: {'count': count, 'size': size} for name, (count, size) in self.sizes.items()},
+        }
+        with open(filename, 'w') as file:
+            json.dump(data, file, indent=4)
+
+    # write_trace: Chrome trace event file, opens in Perfetto or chrome://tracing
+    def write_trace(self, filename : str):
+        with open(filename, 'w') as file:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, file)
+
+class Phase:
+    def __init__(self, profiler : Profiler, name : str, filename : str):
+        self.profiler = profiler
+        self.name = name
+        self.filename = filename
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        self.lex_wall = self.profiler.lex_wall
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        cpu = time.process_time() - self.cpu
+        wall = end - self.wall
+
+        profiler = self.profiler
+        lex_wall = profiler.lex_wall - self.lex_wall
+        lex_cpu = cpu * lex_wall / wall if wall else 0.0
+
+        phase = profiler.phases[self.name]
+        phase[0] += wall - lex_wall
+        phase[1] += cpu - lex_cpu
+        profiler.phases['lex'][0] += lex_wall
+        profiler.phases['lex'][1] += lex_cpu
+
+        args = {'file': self.filename}
+        if lex_wall:
+            args['lex ms'] = lex_wall * 1000
+        profiler.add_event(self.name, 'phase', self.wall, end, args)
+
+        if profiler.memory:
+            profiler.snapshot(self.name, self.filename)
+        return False
@@ -0,0 +1,490 @@
+from .AST import *
+from .Lexer import *
+from .Parser import *
+from .CodeGenerator import *
+from .ModuleGenerator import *
+from .Interface import *
+from .Analysis import *
+from .Passes import *
+
+import contextlib
+import os
+import re
+
+PCH_HEADER = 'bic_pch.hpp'
+INSTANTIATIONS_SOURCE = 'bic_instantiations.cpp'
+
+# Module: a .bic source file of the project
+class Module:
+    def __init__(self, filename):
+        self.filename = filename
+        self.name = os.path.splitext(os.path.basename(filename))[0]
+        self.tree = None
+        self.interface = None
+        self.generator = None
+
+        # imports moved out of the header: path -> forward declarations
+        self.forward_decls = {}
+
+        # extern template declarations appended to the header
+        self.extern_templates = []
+
+        # (call, literal) pairs of the calls computed at compile time
+        self.folded_calls = []
+
+        # (function, param) pairs passed by const reference
+        self.const_refs = []
+
+        # (class, method) pairs of the methods inferred const
+        self.const_methods = []
+
+        # (loop, binding) pairs of the range for loops
+        self.loop_bindings = []
+
+        # (match, arms) pairs of the if chains turned into switches
+        self.switch_chains = []
+
+        # (var_decl, allocation) pairs of the new objects off the heap
+        self.stack_allocations = []
+
+        # classes and methods marked final
+        self.finals = []
+
+        # (lambda, captures) pairs of the lambdas
+        self.lambda_captures = []
+
+    def imports(self):
+        if self.tree is None:
+            return self.interface.imports()
+        return [s.token for s in self.tree.statements if isinstance(s.token, Import)]
+
+    def declared_types(self):
+        if self.tree is None:
+            return self.interface.declared_types()
+        return declared_types(self.tree)
+
+    # load: uses the interface file of the module when it is up to date,
+    # parses the source otherwise
+    def load(self):
+        with open(self.filename, 'r') as file:
+            self.interface = load_interface(self.filename, file.read())
+
+        if self.interface is None:
+            self.tree = Parser(Lexer(self.filename)).parse()
+
+class Project:
+    """ Groups the modules that are compiled together. """
+
+    def __init__(self, filenames, pch=False, forward_decls=False, modules=False, interfaces=False, extern_templates=None, shards=1, fold_calls=False, const_methods=False, const_refs=False, switch_chains=False, stack_alloc=False, devirtualize=False, profiler=None):
+        self.modules = [Module(filename) for filename in filenames]
+        self.pch = PCH_HEADER if pch else None
+        self.pch_header = ''
+        self.forward_decls = forward_decls
+        self.cpp_modules = modules
+        self.interfaces = interfaces
+
+        # minimum number of uses of a template instance to instantiate it
+        # once for the whole project, None to disable
+        self.extern_templates = extern_templates
+        self.instantiations = ''
+
+        # number of sources the definitions of every module are split into
+        self.shards = shards
+
+        # replace the calls of pure functions over literals by their result
+        self.fold_calls = fold_calls
+
+        # declare const the methods that never modify their object
+        self.const_methods = const_methods
+
+        # pass the params that are only read by const reference
+        self.const_refs = const_refs
+
+        # turn if chains comparing a variable with constants into switches
+        self.switch_chains = switch_chains
+
+        # create the new objects that don't escape their function on the
+        # stack or in a std::unique_ptr
+        self.stack_alloc = stack_alloc
+
+        # mark final the classes no class of the project derives from and
+        # the virtual methods never overridden, off for libraries whose
+        # classes are derived from outside the project
+        self.devirtualize = devirtualize
+
+        # imported modules that are not part of the project
+        self.externals = {}
+
+        # Profiler timing the phases, None to run uninstrumented
+        self.profiler = profiler
+
+    def parse(self):
+        for module in self.modules:
+            self.parse_module(module)
+
+    def parse_module(self, module):
+        with self.phase('read', module):
+            lexer = Lexer(module.filename)
+
+        with self.phase('parse', module):
+            if self.profiler:
+                self.profiler.instrument_lexer(lexer)
+            parser = Parser(lexer)
+            if self.profiler:
+                self.profiler.instrument_parser(parser)
+            module.tree = parser.parse()
+
+        if self.profiler:
+            self.profiler.count_nodes(module.tree)
+
+        if self.interfaces:
+            write_interface(interface_filename(module.filename), module.tree, lexer.text)
+
+    # phase: measures a phase of module when profiling
+    def phase(self, name, module):
+        if self.profiler is None:
+            return contextlib.nullcontext()
+        return self.profiler.phase(name, module.filename)
+
+    # is_global: the options that need every module parsed before any of
+    # them is generated are enabled
+    def is_global(self):
+        return bool(self.pch or self.forward_decls or self.extern_templates is not None or self.cpp_modules)
+
+    # non .bic imports of every module, in order of first appearance
+    def system_imports(self):
+        paths = []
+        for module in self.modules:
+            for node in module.imports():
+                if not node.is_module() and node.path.value not in paths:
+                    paths.append(node.path.value)
+        return paths
+
+    # resolve: module of a .bic import, None when it can't be found
+    def resolve(self, module, node):
+        path = os.path.normpath(os.path.join(os.path.dirname(module.filename), node.path.value))
+        for other in self.modules:
+            if os.path.normpath(other.filename) == path:
+                return other
+
+        if path not in self.externals:
+            external = None
+            if os.path.exists(path):
+                external = Module(path)
+                external.load()
+            self.externals[path] = external
+
+        return self.externals[path]
+
+    # build_order: modules of the project sorted so that every module comes
+    # after the modules it imports
+    def build_order(self):
+        order = []
+        visited = set()
+
+        def visit(module):
+            if module.filename in visited:
+                return
+            visited.add(module.filename)
+
+            for node in module.imports():
+                if node.is_module():
+                    dependency = self.resolve(module, node)
+                    if dependency in self.modules:
+                        visit(dependency)
+            order.append(module)
+
+        for module in self.modules:
+            visit(module)
+        return order
+
+    # header_plan: .bic imports whose types are only used through
+    # pointers or references in the header, with their forward declarations
+    def header_plan(self, module):
+        plan = {}
+        uses = header_uses(module.tree)
+        if uses is None:
+            return plan
+
+        for node in module.imports():
+            if not node.is_module():
+                continue
+
+            dependency = self.resolve(module, node)
+            if dependency is None:
+                continue
+
+            decls = forward_decls(uses, dependency.declared_types())
+            if decls is not None:
+                plan[node.path.value] = decls
+
+        return plan
+
+    # header_fan_in: number of headers pulled in by including the header
+    # of module, following the imports that stay in the headers
+    def header_fan_in(self, module, moved=True):
+        headers = set()
+        seen = set()
+        stack = [module]
+        while stack:
+            current = stack.pop()
+            if current.filename in seen:
+                continue
+            seen.add(current.filename)
+
+            for node in current.imports():
+                if moved and node.path.value in current.forward_decls:
+                    continue
+
+                if not node.is_module():
+                    headers.add(self.pch or node.path.value)
+                    continue
+
+                headers.add(node.path.value)
+                dependency = self.resolve(current, node)
+                if dependency is not None:
+                    stack.append(dependency)
+
+        return len(headers)
+
+    # template_instantiations: explicit instantiations of the templates
+    # defined by the project that are used at least threshold times in
+    # the whole project. The extern declarations go in the headers of the
+    # modules using them, where their argument types are declared, and the
+    # instantiations source includes those headers
+    def template_instantiations(self, threshold):
+        templates = {}
+        for module in self.modules:
+            for statement in module.tree.statements:
+                node = statement.token
+                if isinstance(node, (FuncDecl, ClassDecl)) and node.template:
+                    if any(t.variadic for t in node.template.types):
+                        continue
+                    # deduced return types can't be declared extern
+                    if isinstance(node, FuncDecl) and node.type is None:
+                        continue
+                    templates[node.name.value] = (module, node)
+
+        # instance -> modules using it
+        users = {}
+        for module in self.modules:
+            uses = template_uses(module.tree, {name: node.template for name, (_, node) in templates.items()}, {})
+            for key, count in uses.items():
+                users.setdefault(key, []).extend([module] * count)
+
+        root = os.path.commonpath([os.path.dirname(os.path.abspath(m.filename)) for m in self.modules])
+        includes = []
+        source = ''
+        for (name, args), modules in users.items():
+            if len(modules) < threshold:
+                continue
+
+            _, node = templates[name]
+            if isinstance(node, ClassDecl):
+                decl = f'class {name}<{", ".join(args)}>'
+            else:
+                # signature with the template parameters replaced
+                mapping = dict(zip((t.left.value for t in node.template.types), args))
+                params = ', '.join(substitute(param.transpile(), mapping) for param in node.args)
+                decl = f'{substitute(node.type.transpile(), mapping)} {name}<{", ".join(args)}>({params})'
+            source += f'template {decl};\n'
+
+            for module in modules:
+                if f'extern template {decl};' in module.extern_templates:
+                    continue
+                module.extern_templates.append(f'extern template {decl};')
+
+                header = os.path.relpath(os.path.abspath(module.filename), root).replace('\\', '/').replace('.bic', '.hpp')
+                if header not in includes:
+                    includes.append(header)
+
+        if not source:
+            return ''
+        return ''.join(f'#include "{header}"\n' for header in includes) + source
+
+    # prepare: project wide analysis, needs every module parsed
+    def prepare(self):
+        if self.pch:
+            self.pch_header = '#pragma once\n'
+            for path in self.system_imports():
+                self.pch_header += f'#include "{path}"\n'
+
+        if self.forward_decls:
+            for module in self.modules:
+                module.forward_decls = self.header_plan(module)
+
+        if self.extern_templates is not None:
+            self.instantiations = self.template_instantiations(self.extern_templates)
+
+    # transform: optimization passes over the AST of every module, before
+    # anything is generated from it
+    def transform(self):
+        trees = [module.tree for module in self.modules]
+        enums = set()
+        for module in self.modules:
+            enums.update(node.name.value for node in walk(module.tree) if isinstance(node, EnumDecl))
+
+        # the functions called may be in another module
+        if self.fold_calls:
+            functions = foldable_functions(trees)
+            for module in self.modules:
+                module.folded_calls = fold_calls(module.tree, functions)
+
+        # the other passes see the methods that only read
+        if self.const_methods:
+            inferred = const_methods(trees)
+            for module in self.modules:
+                module.const_methods = [(class_decl, method) for tree, class_decl, method in inferred if tree is module.tree]
+
+        # the classes and functions used may be in another module
+        classes = class_methods(trees)
+        refs = ref_params(trees)
+        decls = class_decls(trees)
+        calls = called_params(trees)
+
+        for module in self.modules:
+            module.loop_bindings = loop_bindings(module.tree, classes, refs)
+            if self.const_refs:
+                module.const_refs = const_ref_params(module.tree, classes, refs)
+            if self.switch_chains:
+                module.switch_chains = switch_chains(module.tree, enums)
+            if self.stack_alloc:
+                module.stack_allocations = stack_allocations(module.tree, decls)
+            # after the params passed by const reference, they aren't moved
+            module.lambda_captures = lambda_captures(module.tree, classes, refs, calls)
+
+        # the class hierarchy spans the modules
+        if self.devirtualize:
+            finals = devirtualize(trees)
+            for module in self.modules:
+                module.finals = [node for tree, node in finals if tree is module.tree]
+
+    def generate(self):
+        self.transform()
+        self.prepare()
+
+        if self.cpp_modules:
+            for module in self.build_order():
+                module.generator = ModuleGenerator(module.tree, module.name)
+                self.run_generator(module)
+            return
+
+        for module in self.modules:
+            self.generate_module(module)
+
+    def generate_module(self, module):
+        module.generator = CodeGenerator(module.tree, module.name, pch=self.pch, forward_decls=module.forward_decls, extern_templates=module.extern_templates, shards=self.shards)
+        self.run_generator(module)
+
+    def run_generator(self, module):
+        with self.phase('codegen', module):
+            if self.profiler:
+                self.profiler.instrument_generator(module.generator)
+            module.generator.generate()
+
+    def output_filename(self, module, output):
+        return output + module.filename.replace('.bic', '')
+
+    # output_root: folder shared by the generated files of every module
+    def output_root(self, output):
+        return os.path.commonpath([os.path.dirname(os.path.abspath(self.output_filename(m, output))) for m in self.modules])
+
+    # write_module: writes the generated files of module, returns the
+    # sources and the header (None for module units)
+    def write_module(self, module, output):
+        with self.phase('write', module):
+            files = self.write_generated(module, output)
+
+        if self.profiler:
+            sources, header = files
+            self.profiler.count('output bytes', sum(os.path.getsize(f) for f in sources + ([header] if header else [])))
+        return files
+
+    def write_generated(self, module, output):
+        cg = module.generator
+        output_filename = self.output_filename(module, output)
+
+        if not os.path.exists(output_filename):
+            os.makedirs(output_filename)
+
+        if self.cpp_modules:
+            source_filename = output_filename + os.path.splitext(cg.source_filename)[1]
+            write_file(source_filename, cg.code)
+            return [source_filename], None
+
+        sources = []
+        for shard, code in zip(cg.shard_filenames, cg.shards):
+            sources.append(os.path.join(os.path.dirname(output_filename), shard))
+            write_file(sources[-1], code)
+        write_file(output_filename + '.hpp', cg.header)
+
+        return sources, output_filename + '.hpp'
+
+    # generated_headers: headers a source generated for module includes,
+    # following the .bic imports. Modules outside of the project are
+    # represented by their .bic source.
+    def generated_headers(self, module, output):
+        headers = []
+        seen = set()
+        stack = [module]
+        while stack:
+            current = stack.pop()
+            if current.filename in seen:
+                continue
+            seen.add(current.filename)
+
+            if current in self.modules:
+                headers.append(self.output_filename(current, output) + '.hpp')
+            else:
+                headers.append(current.filename)
+
+            for node in current.imports():
+                if node.is_module():
+                    dependency = self.resolve(current, node)
+                    if dependency is not None:
+                        stack.append(dependency)
+
+        if self.pch:
+            headers.append(os.path.join(self.output_root(output), PCH_HEADER))
+        return headers
+
+    # write_shared: writes the files shared by every module, returns their
+    # paths by kind ('pch', 'instantiations'). It may run before any module
+    # is written, the output root is created first
+    def write_shared(self, output):
+        files = {}
+        root = self.output_root(output)
+        os.makedirs(root, exist_ok=True)
+
+        if self.instantiations:
+            files['instantiations'] = os.path.join(root, INSTANTIATIONS_SOURCE)
+            write_file(files['instantiations'], self.instantiations)
+
+        if self.pch:
+            # next to the generated headers so the relative include finds it
+            files['pch'] = os.path.join(root, PCH_HEADER)
+            write_file(files['pch'], self.pch_header)
+
+        return files
+
+def write_file(filename, text):
+    with open(filename, 'w+') as file:
+        file.truncate(0)
+        file.write(text)
+
+# substitute: replaces the template parameters named in mapping in a
+# transpiled type
+def substitute(text, mapping):
+    pattern = r'(?<![\w:.])(' + '|'.join(map(re.escape, mapping)) + r')\b'
+    return re.sub(pattern, lambda m: mapping[m.group(1)], text)
+
+# pch_commands: commands to precompile the shared header and the flags
+# every translation unit needs to use it
+def pch_commands(compiler, header, flags=[]):
+    if 'clang' in compiler:
+        pch = header + '.pch'
+        return [[compiler, *flags, '-x', 'c++-header', header, '-o', pch]], ['-include-pch', pch]
+
+    # gcc looks for <header>.gch next to the header when it is included
+    pch = header + '.gch'
+    return [[compiler, *flags, '-x', 'c++-header', header, '-o', pch]], []
@@ -1,6 +1,12 @@
-
 from .AST import *
 from .Token import *
+from .Hooks import *
 from .Lexer import *
 from .Parser import *
-from .CodeGenerator import *
\ No newline at end of file
+from .CodeGenerator import *
+from .ModuleGenerator import *
+from .Interface import *
+from .Profile import *
+from .Project import *
+from .Cache import *
+from .Build import *
\ No newline at end of file
@@ -1,42 +1,176 @@
-from bic import Parser, Lexer, CodeGenerator
-import sys
-import argparse
-import os
-
-# helper function to get the options from the command line
-# -o <folder> to specify the output folder
-def get_options():
-    parser = argparse.ArgumentParser(description='Bic compiler')
-    parser.add_argument('filename', help='the file to compile')
-    parser.add_argument('-o', '--output', help='the output folder', default='./')
-    return parser.parse_args()
-
-def main():
-    options = get_options()
-
-    lexer = Lexer(options.filename)
-    parser = Parser(lexer)
-    tree = parser.parse()
-
-    cg = CodeGenerator(tree, options.filename.replace('.bic', '').split('/')[-1])
-    cg.generate()
-
-    # write code to file
-    if options.output:
-        output_filename = options.output + options.filename.replace('.bic', '')
-        
-        if not os.path.exists(output_filename):
-            os.makedirs(output_filename)
-        
-        with open(output_filename + '.cpp', 'w+') as file:
-            file.truncate(0)
-            file.write(cg.code)
-        
-        with open(output_filename + '.hpp', 'w+') as file:
-            file.truncate(0)
-            file.write(cg.header)
-        
-        print(u'\u2713', options.filename, u'\u2192', output_filename + '.cpp', output_filename + '.hpp')
-
-if __name__ == '__main__':
+from bic import Project, ClassDecl, func_label, line_of, Profiler, Builder, BuildError, ObjectCache, parse_size, pch_commands, module_commands
+import sys
+import argparse
+import os
+import shlex
+
+# helper function to get the options from the command line
+# -o <folder> to specify the output folder
+# --pch to share the non .bic imports in a precompiled header
+# --forward-decls to replace header includes with forward declarations
+# --modules to generate C++20 module units instead of headers and sources
+# --interfaces to write a .bici interface file next to every source
+# --extern-templates N to instantiate once the templates used N times in
+# the project
+# --shards N to split the definitions of every module into N sources
+# --fold-calls to compute at compile time the calls of pure functions
+# with literal arguments
+# --const-methods to declare const the methods that never modify their object
+# --const-refs to pass the params that are only read by const reference
+# --switch-chains to turn if chains comparing a variable with constants
+# into switches
+# --stack-alloc to create the new objects that don't escape their function
+# on the stack or in a std::unique_ptr
+# --devirtualize to mark final the classes nothing derives from and the
+# virtual methods never overridden, only when the project is the whole
+# program
+# -v to report what the optimizations changed
+# --time-report to print the time spent in every phase of the compiler
+# --trace <file> to write a Chrome trace of the phases and declarations
+# --mem-report to print the memory used by every phase, --mem-json <file>
+# to write it as json
+#
+# main.py build ... also compiles the generated code:
+# --cc <compiler>, -j N parallel jobs, --cxxflags, --exe <file> to link,
+# --cache-dir <folder> to reuse objects, --cache-size (e.g. 2G)
+def get_options(build=False):
+    parser = argparse.ArgumentParser(description='Bic compiler', prog='main.py build' if build else None)
+    parser.add_argument('filenames', nargs='+', help='the files to compile')
+    parser.add_argument('-o', '--output', help='the output folder', default='./')
+    parser.add_argument('--pch', action='store_true', help='collect the non .bic imports in a precompiled header')
+    parser.add_argument('--forward-decls', action='store_true', help='forward declare types only used through pointers or references in headers')
+    parser.add_argument('--modules', action='store_true', help='generate C++20 module units')
+    parser.add_argument('--interfaces', action='store_true', help='write .bici interface files for importers')
+    parser.add_argument('--extern-templates', type=int, metavar='N', help='instantiate the templates used at least N times in the whole project in a single source')
+    parser.add_argument('--shards', type=int, default=1, metavar='N', help='split the definitions of every module into N sources')
+    parser.add_argument('--fold-calls', action='store_true', help='compute the calls of pure functions with literal arguments at compile time')
+    parser.add_argument('--const-methods', action='store_true', help='declare const the methods that never modify their object')
+    parser.add_argument('--const-refs', action='store_true', help='pass class and template params that are only read by const reference')
+    parser.add_argument('--switch-chains', action='store_true', help='turn if chains comparing a variable with enum constants or integers into switches')
+    parser.add_argument('--stack-alloc', action='store_true', help='create the new objects that do not escape their function on the stack or in a std::unique_ptr')
+    parser.add_argument('--devirtualize', action='store_true', help='mark final the classes and virtual methods not derived from or overridden in the project, not for libraries')
+    parser.add_argument('--cc', help='the c++ compiler used for the build commands', default='g++')
+
+    if not build:
+        parser.add_argument('-v', '--verbose', action='store_true', help='report the changes made by the optimizations')
+        parser.add_argument('--time-report', action='store_true', help='print the time and counters of every compiler phase')
+        parser.add_argument('--trace', metavar='FILE', help='write a Chrome trace event file of the compiler phases')
+        parser.add_argument('--mem-report', action='store_true', help='print the memory allocated by every compiler phase')
+        parser.add_argument('--mem-json', metavar='FILE', help='write the memory report to a json file')
+
+    if build:
+        parser.add_argument('-j', '--jobs', type=int, help='number of parallel compiler processes')
+        parser.add_argument('--cxxflags', default='-std=c++17', help='flags passed to the c++ compiler')
+        parser.add_argument('--exe', help='link the objects into this executable')
+        parser.add_argument('--cache-dir', default=os.environ.get('BIC_CACHE_DIR'), help='reuse compiled objects stored in this folder')
+        parser.add_argument('--cache-size', default='5G', help='maximum size of the object cache')
+
+    options = parser.parse_args(sys.argv[2:] if build else sys.argv[1:])
+
+    if options.modules and (options.pch or options.forward_decls or options.extern_templates is not None or options.shards > 1):
+        parser.error('--modules can not be combined with --pch, --forward-decls, --extern-templates or --shards')
+
+    if build and options.modules:
+        parser.error('build does not support --modules')
+
+    if options.shards < 1:
+        parser.error('--shards must be at least 1')
+
+    return options
+
+def get_project(options, profiler=None):
+    return Project(options.filenames, pch=options.pch, forward_decls=options.forward_decls, modules=options.modules, interfaces=options.interfaces, extern_templates=options.extern_templates, shards=options.shards, fold_calls=options.fold_calls, const_methods=options.const_methods, const_refs=options.const_refs, switch_chains=options.switch_chains, stack_alloc=options.stack_alloc, devirtualize=options.devirtualize, profiler=profiler)
+
+def build():
+    options = get_options(build=True)
+
+    cache = ObjectCache(options.cache_dir, parse_size(options.cache_size)) if options.cache_dir else None
+
+    builder = Builder(get_project(options), options.output, compiler=options.cc, flags=shlex.split(options.cxxflags), jobs=options.jobs, executable=options.exe, cache=cache)
+    try:
+        builder.run()
+    except BuildError as e:
+        print(u'\u2717', e)
+        sys.exit(1)
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'build':
+        return build()
+
+    options = get_options()
+
+    memory = options.mem_report or options.mem_json is not None
+    profiler = Profiler(memory=memory) if options.time_report or options.trace or memory else None
+
+    project = get_project(options, profiler)
+    project.parse()
+    project.generate()
+
+    # write code to file
+    if options.output:
+        for module in project.modules:
+            sources, header = project.write_module(module, options.output)
+
+            print(u'\u2713', module.filename, u'\u2192', *sources, *([header] if header else []))
+
+            if options.forward_decls:
+                before = project.header_fan_in(module, moved=False)
+                after = project.header_fan_in(module)
+                print(f'    {module.generator.header_filename}: header fan-in {before} -> {after}')
+
+            if options.verbose:
+                for call, result in module.folded_calls:
+                    print(f'    {module.filename}:{line_of(call)}: {call.transpile()} -> {result.transpile()}')
+                for class_decl, method in module.const_methods:
+                    print(f'    {module.filename}:{method.name.line}: {class_decl.name.value}::{method.name.value} const')
+                for loop, binding in module.loop_bindings:
+                    print(f'    {module.filename}:{loop.var_decl.name.line}: for ({loop.var_decl.name.value} in ...) as {binding}')
+                for func, param in module.const_refs:
+                    print(f'    {module.filename}:{param.name.line}: {func_label(func)}({param.name.value}) by const reference')
+                for match, arms in module.switch_chains:
+                    print(f'    {module.filename}:{line_of(match)}: if chain of {arms} arms as switch')
+                for decl, allocation in module.stack_allocations:
+                    where = 'on the stack' if allocation == 'stack' else 'in a std::unique_ptr'
+                    print(f'    {module.filename}:{decl.name.line}: new object of {decl.name.value} {where}')
+                for node in module.finals:
+                    kind = 'class' if isinstance(node, ClassDecl) else 'method'
+                    print(f'    {module.filename}:{node.name.line}: {kind} {node.name.value} final')
+                for lam, captures in module.lambda_captures:
+                    mutable = ' mutable' if lam.is_mutable else ''
+                    print(f'    {module.filename}:{lam.token.line}: lambda [{", ".join(captures)}]{mutable}')
+
+        if options.modules:
+            generators = [module.generator for module in project.build_order()]
+            print(u'\u2713', 'build commands', u'\u2192', project.output_root(options.output))
+            for command in module_commands(options.cc, generators):
+                print('   ', ' '.join(command))
+
+        shared = project.write_shared(options.output)
+
+        if 'instantiations' in shared:
+            print(u'\u2713', 'template instantiations', u'\u2192', shared['instantiations'])
+
+        if 'pch' in shared:
+            commands, flags = pch_commands(options.cc, shared['pch'])
+            print(u'\u2713', 'precompiled header', u'\u2192', shared['pch'])
+            for command in commands:
+                print('   ', ' '.join(command))
+            if flags:
+                print('    compile flags:', ' '.join(flags))
+
+    if options.time_report:
+        print(profiler.report())
+
+    if options.trace:
+        profiler.write_trace(options.trace)
+        print(u'\u2713', 'trace', u'\u2192', options.trace)
+
+    if options.mem_report:
+        print(profiler.memory_report())
+
+    if options.mem_json:
+        profiler.write_memory(options.mem_json)
+        print(u'\u2713', 'memory report', u'\u2192', options.mem_json)
+
+if __name__ == '__main__':
     main()
\ No newline at end of file
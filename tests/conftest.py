@@ -0,0 +1,55 @@
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bic import Project
+
+# transpile(sources, **options): writes the {filename: code} sources in a
+# temporary folder, transpiles them as one project with the Project
+# options
+@pytest.fixture
+def transpile(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    def run(sources, **options):
+        for filename, code in sources.items():
+            (tmp_path / filename).write_text(code)
+
+        project = Project(list(sources), **options)
+        project.parse()
+        project.generate()
+        return project
+
+    return run
+
+# compile_project(project): writes the code generated for project and its
+# shared files to build/ and compiles its sources, skipped when there is
+# no c++ compiler
+@pytest.fixture
+def compile_project(tmp_path):
+    compiler = os.environ.get('CXX', 'g++')
+    if shutil.which(compiler) is None:
+        pytest.skip(f'{compiler} not found')
+
+    def run(project):
+        sources = []
+        for module in project.modules:
+            sources += project.write_module(module, 'build/')[0]
+        shared = project.write_shared('build/')
+        if 'instantiations' in shared:
+            sources.append(shared['instantiations'])
+
+        objects = []
+        for source in sources:
+            obj = os.path.splitext(source)[0] + '.o'
+            process = subprocess.run([compiler, '-std=c++17', '-c', source, '-o', obj, '-I', 'build'], cwd=tmp_path, capture_output=True, text=True)
+            assert process.returncode == 0, process.stderr
+            objects.append(obj)
+        return objects
+
+    return run
@@ -0,0 +1,64 @@
+import pytest
+
+ATTRIBUTES = '''
+@inline sq(x : int) -> int { ret x * x; }
+
+@hot @noexcept run(n : int) -> int {
+    if (n > 3) @likely {
+        ret 1;
+    } elif (n > 1) @unlikely {
+        ret 2;
+    } else @unlikely {
+        ret 3;
+    }
+}
+
+@constexpr cube(x : int) -> int { ret x * x * x; }
+
+@cold class Log {
+    pub write(n : int) -> int { ret n; }
+}
+
+main() -> int { ret run(sq(2)); }
+'''
+
+def test_function_attributes(transpile):
+    generator = transpile({'a.bic': ATTRIBUTES}).modules[0].generator
+
+    # inline and constexpr functions are defined in the header
+    assert '[[gnu::always_inline]] inline int sq(int x){' in generator.header
+    assert 'constexpr int cube(int x){' in generator.header
+    assert 'sq(int x)' not in generator.code
+    assert 'cube(int x)' not in generator.code
+
+    assert '[[gnu::hot]] int run(int n) noexcept ;' in generator.header
+    assert 'int run(int n)  noexcept {' in generator.code
+
+def test_class_attributes_apply_to_methods(transpile):
+    generator = transpile({'a.bic': ATTRIBUTES}).modules[0].generator
+
+    assert '[[gnu::cold]] int write(int n);' in generator.header
+    assert 'int Log::write(int n) {' in generator.code
+
+def test_branch_attributes(transpile):
+    generator = transpile({'a.bic': ATTRIBUTES}).modules[0].generator
+
+    assert 'if (n > 3) [[likely]] {' in generator.code
+    assert '} else if (n > 1) [[unlikely]] {' in generator.code
+    assert '} else [[unlikely]] {' in generator.code
+
+def test_attributes_compile(transpile, compile_project):
+    compile_project(transpile({'a.bic': ATTRIBUTES}))
+
+@pytest.mark.parametrize('code, message', [
+    ('@fast f() -> int { ret 0; }', 'Unknown attribute @fast'),
+    ('@hot @cold f() -> int { ret 0; }', 'Attribute @cold conflicts with @hot'),
+    ('@inline @inline f() -> int { ret 0; }', 'Repeated attribute @inline'),
+    ('@likely f() -> int { ret 0; }', 'Attribute @likely does not apply to functions'),
+    ('f(n : int) -> int { if (n > 0) @cold { ret 1; } ret 0; }', 'Attribute @cold does not apply to branches'),
+    ('@inline main() -> int { ret 0; }', 'main can not be inline or constexpr'),
+])
+def test_invalid_attributes(transpile, capsys, code, message):
+    with pytest.raises(SystemExit):
+        transpile({'a.bic': code})
+    assert message in capsys.readouterr().out
@@ -0,0 +1,135 @@
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'main.py')
+
+SHAPES = '''
+class Shape {
+    pub mut w : int;
+    pub Shape(w : int) { .w = w; }
+    pub area() -> int { ret .w * .w; }
+}
+'''
+
+USE = '''
+import "shapes.bic";
+
+main() -> int {
+    mut s : Shape = Shape(3);
+    ret s.area();
+}
+'''
+
+BAD = '''
+broken() -> int { ret undefined_name; }
+'''
+
+@pytest.fixture
+def build(tmp_path):
+    if shutil.which('g++') is None:
+        pytest.skip('g++ not found')
+
+    def run(sources, *options):
+        for filename, code in sources.items():
+            (tmp_path / filename).write_text(code)
+        return subprocess.run([sys.executable, MAIN, 'build', *sources, '-o', 'out/', *options], cwd=tmp_path, capture_output=True, text=True)
+
+    return run
+
+def test_build(build, tmp_path):
+    process = build({'shapes.bic': SHAPES, 'use.bic': USE}, '--exe', 'use')
+    assert process.returncode == 0, process.stdout + process.stderr
+    assert subprocess.run([str(tmp_path / 'use')]).returncode == 9
+
+def test_failed_build_cancels_cleanly(build):
+    # the cancelled compiles used to outlive the event loop
+    for _ in range(3):
+        process = build({'shapes.bic': SHAPES, 'bad.bic': BAD, 'use.bic': USE}, '-j', '2')
+        assert process.returncode == 1
+        assert 'exited with code' in process.stdout
+        assert 'Exception ignored' not in process.stderr
+
+PASSES = '''
+import "string";
+
+size(s : std::string) -> int { ret s.size(); }
+
+main() -> int {
+    let k : int = 2;
+    let scale : auto = |x : int| x * k;
+    ret scale(size("abc"));
+}
+'''
+
+def test_build_runs_the_passes(build, tmp_path):
+    process = build({'a.bic': PASSES}, '--const-refs', '--exe', 'a')
+    assert process.returncode == 0, process.stdout + process.stderr
+
+    code = (tmp_path / 'out' / 'a.cpp').read_text()
+    assert 'int size(const std::string& s)' in code
+    assert '[k](int x)' in code
+    assert subprocess.run([str(tmp_path / 'a')]).returncode == 6
+
+DESTRUCTORS = '''
+import "iostream";
+
+class Log {
+    pub mut id : int;
+    pub Log(id : int) { .id = id; }
+    pub ~Log() { std::cout << "~" << .id << " "; }
+}
+
+main() -> int {
+    let a : Log* = new Log(1);
+    del a;
+    std::cout << "after ";
+    let b : Log* = new Log(2);
+    std::cout << b->id << " ";
+    del b;
+    ret 0;
+}
+'''
+
+def test_stack_alloc_keeps_the_destructor_order(build, tmp_path):
+    process = build({'d.bic': DESTRUCTORS}, '--stack-alloc', '--exe', 'd')
+    assert process.returncode == 0, process.stdout + process.stderr
+    run = subprocess.run([str(tmp_path / 'd')], capture_output=True, text=True)
+    assert run.stdout == '~1 after 2 ~2 '
+
+TWICE = '''
+twice<T : typename>(x : T) -> T { ret x + x; }
+'''
+
+TENFOLD = '''
+twice<T : typename>(x : T) -> T { ret x * 10; }
+'''
+
+CALL_TWICE = '''
+import "lib.bic";
+
+main() -> int { ret twice<int>(2); }
+'''
+
+def test_cached_instantiations_follow_the_headers(build, tmp_path):
+    cache = ['--extern-templates', '1', '--cache-dir', str(tmp_path / 'cache'), '--exe', 'app']
+
+    process = build({'lib.bic': TWICE, 'app.bic': CALL_TWICE}, *cache)
+    assert process.returncode == 0, process.stdout + process.stderr
+    assert subprocess.run([str(tmp_path / 'app')]).returncode == 4
+
+    # the instantiations source is the same, the header it includes isn't
+    process = build({'lib.bic': TENFOLD, 'app.bic': CALL_TWICE}, *cache)
+    assert process.returncode == 0, process.stdout + process.stderr
+    assert '0 hits, 3 misses' in process.stdout
+    assert subprocess.run([str(tmp_path / 'app')]).returncode == 20
+
+@pytest.mark.parametrize('options', [['--pch'], ['--extern-templates', '1']])
+def test_build_shared_files_in_a_clean_folder(build, tmp_path, options):
+    # the shared files are written before any module creates out/
+    process = build({'lib.bic': TWICE, 'app.bic': CALL_TWICE}, *options, '--exe', 'app')
+    assert process.returncode == 0, process.stdout + process.stderr
+    assert subprocess.run([str(tmp_path / 'app')]).returncode == 4
@@ -0,0 +1,48 @@
+LIB = '''
+import "vector";
+import "string";
+
+class Item {
+    pub mut name : std::string;
+}
+
+class Shelf {
+    pub mut items : std::vector<Item>;
+}
+'''
+
+APP = '''
+import "lib.bic";
+import "string";
+
+label(item : Item*) -> int { ret 1; }
+
+main() -> int {
+    mut i : Item = Item();
+    ret label(&i);
+}
+'''
+
+def test_pch(transpile, compile_project):
+    project = transpile({'lib.bic': LIB, 'app.bic': APP}, pch=True)
+    lib, app = project.modules
+
+    # the system imports of every module, once
+    assert project.pch_header == '#pragma once\n#include "vector"\n#include "string"\n'
+    for module in project.modules:
+        assert module.generator.header.startswith('#pragma once\n#include "bic_pch.hpp"\n')
+        assert '#include "string"' not in module.generator.header + module.generator.code
+    compile_project(project)
+
+def test_forward_decls(transpile, compile_project):
+    project = transpile({'lib.bic': LIB, 'app.bic': APP}, forward_decls=True)
+    lib, app = project.modules
+
+    # app.hpp only uses Item through a pointer
+    assert app.forward_decls == {'lib.bic': ['class Item;']}
+    assert 'class Item;' in app.generator.header
+    assert '#include "lib.hpp"' not in app.generator.header
+    assert '#include "lib.hpp"' in app.generator.code
+    # Shelf holds its Items by value
+    assert '#include "vector"' in lib.generator.header
+    compile_project(project)
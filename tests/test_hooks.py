@@ -0,0 +1,52 @@
+import pytest
+
+from bic import hooks
+
+SOURCE = '''
+class Counter {
+    pub mut n : int;
+    pub add() -> void { .n += 1; }
+}
+
+twice(x : int) -> int { ret x * 2; }
+
+main() -> int {
+    twice(3);
+    ret 0;
+}
+'''
+
+@pytest.fixture
+def events():
+    recorded = {'token': [], 'node': [], 'backtrack': [], 'emit': []}
+    callbacks = [
+        hooks.on_token(lambda token: recorded['token'].append(token.value)),
+        hooks.on_node(lambda production, node: recorded['node'].append((production, type(node).__name__))),
+        hooks.on_backtrack(lambda failed, restart: recorded['backtrack'].append((failed, restart))),
+        hooks.on_emit(lambda node, header, code: recorded['emit'].append((type(node).__name__, header, code))),
+    ]
+    yield recorded
+    for callback in callbacks:
+        hooks.remove(callback)
+
+def test_hooks(transpile, events):
+    transpile({'h.bic': SOURCE})
+
+    assert events['token'][:4] == ['class', 'Counter', '{', 'pub']
+    assert ('class_decl', 'ClassDecl') in events['node']
+    assert ('func_decl', 'FuncDecl') in events['node']
+
+    # the code generated for every top level statement
+    kinds = [kind for kind, _, _ in events['emit']]
+    assert kinds == ['ClassDecl', 'FuncDecl', 'FuncDecl']
+    _, header, code = events['emit'][1]
+    assert header == '[[nodiscard]] int twice(int x);\n'
+    assert code == 'int twice(int x) {\n    return x * 2;\n}\n'
+
+    # twice(3); is tried as a function declaration first
+    assert [(failed.value, restart.value) for failed, restart in events['backtrack']] == [(3, 'twice')]
+
+def test_no_hooks_leave_the_compiler_unchanged(transpile):
+    project = transpile({'h.bic': SOURCE})
+    # the methods are only wrapped on the instance when hooks are registered
+    assert 'generate_statement' not in vars(project.modules[0].generator)
@@ -0,0 +1,54 @@
+from bic import Parser, Lexer, ModuleInterface, load_interface, write_interface, interface_filename, CLASS, FUNC, CONSTRUCTOR
+
+SHAPES = '''
+class Square {
+    pub mut side : int;
+    pub Square(side : int) { .side = side; }
+    pub area() -> int { ret .side * .side; }
+}
+
+perimeter(s : Square) -> int { ret s.side * 4; }
+'''
+
+def write(tmp_path):
+    path = tmp_path / 'shapes.bic'
+    path.write_text(SHAPES)
+    tree = Parser(Lexer(str(path))).parse()
+    write_interface(interface_filename(str(path)), tree, SHAPES)
+    return tree, tmp_path / 'shapes.bici'
+
+def test_load_interface(tmp_path):
+    write(tmp_path)
+    interface = load_interface(str(tmp_path / 'shapes.bic'), SHAPES)
+
+    assert interface.names(CLASS) == ['Square']
+    assert interface.names(FUNC) == ['perimeter']
+    # the records are decoded on first access
+    assert interface.cache == {}
+    methods = interface.get(CLASS, 'Square')[3]
+    assert methods[0][0] == 'Square' and methods[0][-1] & CONSTRUCTOR
+
+def test_interface_does_not_change_the_tree(tmp_path):
+    tree, _ = write(tmp_path)
+    square = tree.statements[0].token
+    assert all(s.token.method_type is None for s in square.body.statements if hasattr(s.token, 'method_type'))
+
+def test_out_of_date_interface(tmp_path):
+    write(tmp_path)
+    assert load_interface(str(tmp_path / 'shapes.bic'), SHAPES + '\n') is None
+
+def test_corrupted_interface(tmp_path):
+    _, path = write(tmp_path)
+    data = bytearray(path.read_bytes())
+    data[-1] ^= 0xff
+    path.write_bytes(bytes(data))
+
+    assert load_interface(str(tmp_path / 'shapes.bic'), SHAPES) is None
+
+def test_truncated_interface(tmp_path):
+    _, path = write(tmp_path)
+    path.write_bytes(path.read_bytes()[:-10])
+    assert load_interface(str(tmp_path / 'shapes.bic'), SHAPES) is None
+
+    path.write_bytes(b'BICI')
+    assert load_interface(str(tmp_path / 'shapes.bic'), SHAPES) is None
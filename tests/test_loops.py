@@ -0,0 +1,30 @@
+import pytest
+
+RANGES = '''
+run(n : int, s : double) -> double {
+    mut t : double = 0.0;
+    for (i in 0..10) { t += i; }
+    for (i in 0..10 step 2) { t += i; }
+    for (i in 10..0 step -1) { t += i; }
+    for (i in 0..2 step 0.5) { t += i; }
+    for (i in 0..n) { t += i; }
+    for (i in 0..10 step s) { t += i; }
+    ret t;
+}
+'''
+
+@pytest.mark.parametrize('loop', [
+    'for (int i = 0; i < 10; ++i) {',
+    'for (int i = 0; i < 10; i += 2) {',
+    'for (int i = 10; i > 0; --i) {',
+    # an int index would truncate the step and never end
+    'for (double i = 0; i < 2; i += 0.5) {',
+    'for (decltype(0 + n) i = 0, bic_end_i = n; i < bic_end_i; ++i) {',
+    'for (decltype(0 + 10 + s) i = 0; i < 10; i += s) {',
+])
+def test_range_loops(transpile, loop):
+    project = transpile({'r.bic': RANGES})
+    assert loop in project.modules[0].generator.code
+
+def test_range_loops_compile(transpile, compile_project):
+    compile_project(transpile({'r.bic': RANGES}))
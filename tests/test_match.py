@@ -0,0 +1,50 @@
+LOOP = '''
+main() -> int {
+    mut i : int = 0;
+    while (true) {
+        match (i) {
+            3 => { break; }
+            1, 2 => { i += 1; }
+            else => { i += 1; }
+        }
+    }
+    ret i;
+}
+'''
+
+def test_match_breaking_out_of_a_loop(transpile, compile_project):
+    project = transpile({'m.bic': LOOP})
+    code = project.modules[0].generator.code
+
+    # a switch would take the break meant for the while loop
+    assert 'switch' not in code
+    assert 'const auto& bic_match = i;' in code
+    assert 'if (bic_match == 3) {' in code
+    assert 'else if (bic_match == 1 || bic_match == 2) {' in code
+    compile_project(project)
+
+SWITCH = '''
+count(n : int) -> int {
+    mut t : int = 0;
+    match (n) {
+        0 => { t = 1; }
+        1 => {
+            for (i in 0..n) {
+                if (i == 2) { break; }
+                t += i;
+            }
+        }
+        else => { t = 2; }
+    }
+    ret t;
+}
+'''
+
+def test_match_with_loops_in_arms_is_a_switch(transpile, compile_project):
+    project = transpile({'s.bic': SWITCH})
+    code = project.modules[0].generator.code
+
+    # the break leaves the loop of the arm, not the switch
+    assert 'switch (n) {' in code
+    assert 'case 0:' in code and 'default:' in code
+    compile_project(project)
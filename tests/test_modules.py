@@ -0,0 +1,56 @@
+import shutil
+import subprocess
+
+import pytest
+
+GEO = '''
+import "cmath";
+
+pub class Point {
+    pub mut x : double;
+}
+
+pub norm(p : Point) -> double { ret std::sqrt(p.x * p.x); }
+
+helper() -> int { ret 1; }
+'''
+
+MAIN = '''
+import "geo.bic";
+
+main() -> int {
+    mut p : Point;
+    p.x = -3.0;
+    ret norm(p);
+}
+'''
+
+def test_module_units(transpile, tmp_path):
+    project = transpile({'geo.bic': GEO, 'main.bic': MAIN}, modules=True)
+    geo, main = project.modules
+
+    # system imports in the global module fragment, pub declarations exported
+    assert geo.generator.source_filename == 'geo.cppm'
+    assert geo.generator.code.startswith('module;\n#include "cmath"\nexport module geo;\n')
+    assert 'export class Point {' in geo.generator.code
+    assert 'export [[nodiscard]] double norm(Point p);' in geo.generator.code
+    assert '\n[[nodiscard]] int helper();' in geo.generator.code
+    # main can't be in a named module
+    assert main.generator.source_filename == 'main.cpp'
+    assert main.generator.code.startswith('import geo;\n')
+
+    if shutil.which('g++') is None:
+        pytest.skip('g++ not found')
+    for module in project.modules:
+        project.write_module(module, 'build/')
+
+    # the module interface is compiled before its importers
+    commands = [
+        ['g++', '-std=c++20', '-fmodules-ts', '-x', 'c++', '-c', 'geo.cppm', '-o', 'geo.o'],
+        ['g++', '-std=c++20', '-fmodules-ts', '-c', 'main.cpp', '-o', 'main.o'],
+        ['g++', 'geo.o', 'main.o', '-o', 'program'],
+    ]
+    for command in commands:
+        process = subprocess.run(command, cwd=tmp_path / 'build', capture_output=True, text=True)
+        assert process.returncode == 0, process.stderr
+    assert subprocess.run([str(tmp_path / 'build' / 'program')]).returncode == 3
@@ -0,0 +1,410 @@
+import pytest
+
+from bic import Parser, Lexer, CodeGenerator
+
+# the passes look up the classes and functions of every module of the
+# project, not only the module they rewrite
+
+BOX = '''
+class Box {
+    pub mut value : int;
+    pub Box() { .value = 0; }
+    pub Box(value : int) { .value = value; }
+    pub get() -> int { ret .value; }
+    pub peek() const -> int { ret .value; }
+    pub count() -> int { .value += 1; ret .value; }
+}
+'''
+
+CONST_REFS = '''
+import "box.bic";
+import "string";
+
+get(b : Box) -> int { ret b.get(); }
+
+peek(b : Box) -> int { ret b.peek(); }
+
+length(s : std::string) -> int { ret s.size(); }
+
+main() -> int {
+    let b : Box = Box(2);
+    ret get(b) + peek(b) + length("abc");
+}
+'''
+
+def test_const_refs_of_imported_classes(transpile, compile_project):
+    project = transpile({'box.bic': BOX, 'a.bic': CONST_REFS}, const_refs=True)
+    code = project.modules[1].generator.code
+
+    # get isn't const, a const Box& couldn't call it
+    assert 'int get(Box b)' in code
+    assert 'int peek(const Box& b)' in code
+    assert 'int length(const std::string& s)' in code
+    compile_project(project)
+
+LOOPS = '''
+import "box.bic";
+import "vector";
+
+total(bs : std::vector<Box>) -> int {
+    mut t : int = 0;
+    for (b in bs) {
+        let v : int = b.get();
+        t += v;
+    }
+    ret t;
+}
+
+main() -> int {
+    mut bs : std::vector<Box>;
+    bs.push_back(Box(2));
+    ret total(bs);
+}
+'''
+
+def test_loop_bindings_of_imported_classes(transpile, compile_project):
+    project = transpile({'box.bic': BOX, 'b.bic': LOOPS})
+    code = project.modules[1].generator.code
+
+    # get isn't const, the elements can't be bound by const reference
+    assert 'const auto& b' not in code
+    assert 'for (auto& b : bs)' in code
+    compile_project(project)
+
+ALLOCATIONS = '''
+import "iostream";
+
+class Log {
+    pub mut id : int;
+    pub Log(id : int) { .id = id; }
+    pub ~Log() { std::cout << "~" << .id << " "; }
+}
+
+class Point {
+    pub mut x : int;
+    pub Point(x : int) { .x = x; }
+}
+
+first() -> void {
+    let a : Log* = new Log(1);
+    del a;
+    std::cout << "after ";
+}
+
+last() -> void {
+    let b : Log* = new Log(2);
+    std::cout << b->id << " ";
+    del b;
+}
+
+leak() -> int {
+    let c : Log* = new Log(3);
+    ret c->id;
+}
+
+quiet() -> int {
+    let p : Point* = new Point(4);
+    let x : int = p->x;
+    del p;
+    ret x;
+}
+
+main() -> int {
+    first();
+    last();
+    ret leak() + quiet();
+}
+'''
+
+def test_stack_allocations_keep_the_destructor_order(transpile, compile_project):
+    project = transpile({'c.bic': ALLOCATIONS}, stack_alloc=True)
+    allocations = {decl.name.value: allocation for decl, allocation in project.modules[0].stack_allocations}
+
+    # the destructor of a runs before the print that follows its del
+    assert allocations == {'a': 'unique', 'b': 'stack', 'p': 'stack'}
+    code = project.modules[0].generator.code
+    assert 'a.reset();' in code
+    assert 'new Log(3)' in code
+    compile_project(project)
+
+TOUCH = '''
+import "box.bic";
+
+touch(b : Box&) -> void { b.value += 1; }
+'''
+
+HOLDER = '''
+import "box.bic";
+import "touch.bic";
+import "vector";
+
+class Holder {
+    pub mut items : Box;
+    pub mut boxes : std::vector<Box>;
+    pub peek() -> int { ret .items.count(); }
+    pub bump() -> void { touch(.items); }
+    pub sum() -> int {
+        mut t : int = 0;
+        for (b in .boxes) {
+            let v : int = b.count();
+            t += v;
+        }
+        ret t;
+    }
+    pub look() -> int { ret .items.peek(); }
+    pub first() -> int { ret .items.get(); }
+}
+
+main() -> int {
+    mut h : Holder;
+    h.bump();
+    let s : int = h.sum();
+    let p : int = h.peek();
+    let l : int = h.look();
+    let f : int = h.first();
+    ret p + l + f + s;
+}
+'''
+
+def test_const_methods_of_imported_classes(transpile, compile_project):
+    project = transpile({'box.bic': BOX, 'touch.bic': TOUCH, 'h.bic': HOLDER}, const_methods=True)
+    inferred = [method.name.value for _, method in project.modules[2].const_methods]
+
+    # count modifies a Box, whatever the standard count does, and touch
+    # modifies its argument
+    assert inferred == ['look', 'first']
+    # get is inferred with the methods of Holder that call it
+    assert [method.name.value for _, method in project.modules[0].const_methods] == ['get']
+    compile_project(project)
+
+APPLY = '''
+apply<F : typename>(f : F, x : int) -> int { ret f(x); }
+
+forward<F : typename>(f : F, x : int) -> int { ret apply(f, x); }
+
+keep<F : typename>(f : F) -> F { ret f; }
+'''
+
+LAMBDAS = '''
+import "apply.bic";
+import "string";
+
+main() -> int {
+    let text : std::string = "abc";
+    let a : int = apply(|x : int| text.size(), 1);
+    let b : int = forward(|y : int| text.size(), 2);
+    let kept : auto = keep(|z : int| text.size());
+    let c : int = kept(3);
+    ret a + b + c;
+}
+'''
+
+def test_lambdas_given_to_imported_functions(transpile, compile_project):
+    project = transpile({'apply.bic': APPLY, 'l.bic': LAMBDAS})
+    code = project.modules[1].generator.code
+
+    # apply and forward only call it, keep returns it
+    assert '[&text](int x)' in code
+    assert '[&text](int y)' in code
+    assert '[text](int z)' in code
+    compile_project(project)
+
+UNKNOWN = '''
+import "string";
+
+main() -> int {
+    let text : std::string = "abc";
+    later(|x : int| text.size());
+    ret 0;
+}
+'''
+
+def test_lambdas_given_to_unknown_functions(transpile):
+    project = transpile({'u.bic': UNKNOWN})
+    assert '[text](int x)' in project.modules[0].generator.code
+
+def test_lambdas_need_the_passes(tmp_path):
+    (tmp_path / 'u.bic').write_text(UNKNOWN)
+    tree = Parser(Lexer(str(tmp_path / 'u.bic'))).parse()
+    with pytest.raises(Exception, match='Lambda captures not inferred'):
+        CodeGenerator(tree, 'u').generate()
+
+ACCESSORS = '''
+import "vector";
+import "algorithm";
+
+fill(vs : std::vector<std::vector<int> >) -> int {
+    for (w in vs) {
+        w.front() = 1;
+    }
+    for (w in vs) {
+        std::sort(w.begin(), w.end());
+    }
+    mut t : int = 0;
+    for (w in vs) {
+        let f : int = w.front();
+        t += f;
+    }
+    ret t;
+}
+
+main() -> int {
+    mut vs : std::vector<std::vector<int> >;
+    ret fill(vs);
+}
+'''
+
+def test_loop_bindings_of_accessors(transpile, compile_project):
+    project = transpile({'v.bic': ACCESSORS})
+    code = project.modules[0].generator.code
+
+    # front and begin return references and iterators the body writes
+    # through, the last loop only reads them
+    assert code.count('for (auto& w : vs)') == 2
+    assert code.count('for (const auto& w : vs)') == 1
+    compile_project(project)
+
+WRITES = '''
+import "vector";
+import "algorithm";
+
+sorted(v : std::vector<int>) -> std::vector<int> {
+    std::sort(v.begin(), v.end());
+    ret v;
+}
+
+first(v : std::vector<int>) -> int {
+    v.front() = 7;
+    ret v.size();
+}
+
+head(v : std::vector<int>) -> int {
+    let f : int = v.front();
+    ret f;
+}
+
+main() -> int {
+    mut v : std::vector<int>;
+    v.push_back(3);
+    let s : std::vector<int> = sorted(v);
+    let f : int = first(v);
+    let h : int = head(v);
+    ret f + h;
+}
+'''
+
+def test_const_refs_of_accessors(transpile, compile_project):
+    project = transpile({'w.bic': WRITES}, const_refs=True)
+    code = project.modules[0].generator.code
+
+    assert 'std::vector<int> sorted(std::vector<int> v)' in code
+    assert 'int first(std::vector<int> v)' in code
+    assert 'int head(const std::vector<int>& v)' in code
+    compile_project(project)
+
+DEFAULTS = '''
+class Origin {
+    pub mut x : int;
+    pub Origin() { .x = 4; }
+}
+
+main() -> int {
+    let p : Origin* = new Origin();
+    let q : Origin* = new Origin;
+    let x : int = p->x;
+    let y : int = q->x;
+    del p;
+    ret x + y;
+}
+'''
+
+def test_stack_allocations_without_constructor_arguments(transpile, compile_project):
+    project = transpile({'o.bic': DEFAULTS}, stack_alloc=True)
+    code = project.modules[0].generator.code
+
+    # Origin bic_object_p(); would declare a function
+    assert 'Origin bic_object_p{}; Origin* const p = &bic_object_p;' in code
+    assert 'Origin bic_object_q; Origin* const q = &bic_object_q;' in code
+    compile_project(project)
+
+SHAPES = '''
+class Shape {
+    pub virtual area() const -> double { ret 0.0; }
+    pub virtual name() const -> int { ret 0; }
+    pub virtual ~Shape() {}
+}
+
+class Square (pub Shape) {
+    pub mut side : double;
+    pub area() const -> double { ret .side * .side; }
+}
+'''
+
+CUBES = '''
+import "shapes.bic";
+
+class Cube (pub Square) {
+    pub name() const -> int { ret 3; }
+}
+
+main() -> int {
+    mut c : Cube;
+    c.side = 2.0;
+    let s : Shape* = &c;
+    let n : int = s->name();
+    ret n;
+}
+'''
+
+def test_devirtualize_across_modules(transpile, compile_project):
+    project = transpile({'shapes.bic': SHAPES, 'cubes.bic': CUBES}, devirtualize=True)
+    shapes, cubes = project.modules
+
+    # Cube derives from Square in another module, nothing overrides area
+    assert 'class Square : public Shape {' in shapes.generator.header
+    assert 'double area() const final ;' in shapes.generator.header
+    assert 'virtual int name() const ;' in shapes.generator.header
+    assert 'class Cube final : public Square {' in cubes.generator.header
+    compile_project(project)
+
+PURE = '''
+import "iostream";
+
+square(x : int) -> int { ret x * x; }
+
+fact(n : int) -> int {
+    if (2 > n) { ret 1; }
+    let rest : int = fact(n - 1);
+    ret n * rest;
+}
+
+noisy(x : int) -> int {
+    std::cout << x << std::endl;
+    ret x;
+}
+'''
+
+FOLDS = '''
+import "pure.bic";
+
+main() -> int {
+    let a : int = square(7);
+    let b : int = fact(5);
+    let n : int = 3;
+    let c : int = square(n);
+    let d : int = noisy(2);
+    ret a + b + c + d;
+}
+'''
+
+def test_fold_calls_of_imported_functions(transpile, compile_project):
+    project = transpile({'pure.bic': PURE, 'folds.bic': FOLDS}, fold_calls=True)
+    code = project.modules[1].generator.code
+
+    assert len(project.modules[1].folded_calls) == 2
+    assert 'int const a = 49;' in code
+    assert 'int const b = 120;' in code
+    # not a literal argument, a side effect
+    assert 'int const c = square(n);' in code
+    assert 'int const d = noisy(2);' in code
+    compile_project(project)
@@ -0,0 +1,64 @@
+import json
+import tracemalloc
+
+from bic import Profiler
+
+SOURCE = '''
+class Counter {
+    pub mut n : int;
+    pub add() -> void { .n += 1; }
+}
+
+twice(x : int) -> int { ret x * 2; }
+
+main() -> int {
+    mut c : Counter;
+    c.add();
+    ret twice(c.n);
+}
+'''
+
+def test_time_report(transpile, tmp_path):
+    profiler = Profiler()
+    project = transpile({'p.bic': SOURCE}, profiler=profiler)
+    project.write_module(project.modules[0], 'build/')
+
+    assert profiler.counters['tokens'] > 0
+    assert profiler.counters['output bytes'] > 0
+    assert profiler.nodes['FuncDecl'] == 3
+    for phase in ['lex', 'parse', 'codegen', 'write']:
+        assert profiler.phases[phase][0] > 0
+
+    report = profiler.report()
+    assert report.splitlines()[0].split() == ['phase', 'wall', 'ms', 'cpu', 'ms']
+    assert 'total' in report and 'AST nodes' in report
+
+    # a span per phase and per top level declaration
+    profiler.write_trace(str(tmp_path / 'trace.json'))
+    events = json.loads((tmp_path / 'trace.json').read_text())['traceEvents']
+    names = {event['name'] for event in events}
+    assert {'parse', 'codegen', 'write'} <= names
+    assert {'ClassDecl Counter', 'FuncDecl twice', 'FuncDecl main'} <= names
+    assert all(event['ph'] == 'X' and event['dur'] >= 0 for event in events)
+
+def test_memory_report(transpile, tmp_path):
+    profiler = Profiler(memory=True)
+    try:
+        project = transpile({'p.bic': SOURCE}, profiler=profiler)
+    finally:
+        tracemalloc.stop()
+
+    # a snapshot at the end of every phase of the module
+    assert [snapshot['phase'] for snapshot in profiler.snapshots] == ['read', 'parse', 'codegen']
+    assert all(snapshot['file'] == 'p.bic' and snapshot['top'] for snapshot in profiler.snapshots)
+    assert profiler.peak > 0
+    assert profiler.sizes['FuncDecl'][0] == 3 and profiler.sizes['FuncDecl'][1] > 0
+
+    report = profiler.memory_report()
+    assert report.startswith('peak')
+    assert 'after parse p.bic' in report and 'live objects' in report
+
+    profiler.write_memory(str(tmp_path / 'memory.json'))
+    data = json.loads((tmp_path / 'memory.json').read_text())
+    assert data['peak'] == profiler.peak
+    assert data['objects']['FuncDecl']['count'] == 3
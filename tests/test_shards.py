@@ -0,0 +1,42 @@
+SOURCE = '''
+import "iostream";
+
+make(n : int) {
+    std::cout << n << std::endl;
+}
+
+twice(n : int) -> int { ret n * 2; }
+
+thrice(n : int) -> int { ret n * 3; }
+
+class Counter {
+    pub mut count : int;
+    pub Counter() { .count = 0; }
+    pub add(n : int) { .count += n; }
+    pub get() -> int { ret .count; }
+}
+
+main() -> int {
+    make(twice(1));
+    mut counter : Counter = Counter();
+    counter.add(thrice(2));
+    ret counter.get();
+}
+'''
+
+def test_definitions_are_split(transpile):
+    generator = transpile({'a.bic': SOURCE}, shards=2).modules[0].generator
+
+    assert len(generator.shards) == 2
+    assert all('#include "a.hpp"' in shard for shard in generator.shards)
+    assert sum(shard.count('int twice(int n)') for shard in generator.shards) == 1
+
+def test_deduced_return_types_stay_with_their_callers(transpile):
+    generator = transpile({'a.bic': SOURCE}, shards=2).modules[0].generator
+
+    first = generator.shards[0]
+    for definition in ['auto make(int n)', 'auto Counter::add(int n)', 'int main()']:
+        assert definition in first
+
+def test_shards_compile(transpile, compile_project):
+    compile_project(transpile({'a.bic': SOURCE}, shards=2))
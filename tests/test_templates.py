@@ -0,0 +1,38 @@
+LIB = '''
+same<T : typename>(x : T) -> T { ret x; }
+'''
+
+APP = '''
+import "lib.bic";
+
+class Money {
+    pub mut cents : int;
+    pub Money(cents : int) { .cents = cents; }
+}
+
+main() -> int {
+    let m : Money = same<Money>(Money(2));
+    let n : int = same<int>(3);
+    ret m.cents + n;
+}
+'''
+
+def test_extern_templates_of_importing_modules(transpile, compile_project):
+    project = transpile({'lib.bic': LIB, 'app.bic': APP}, extern_templates=1)
+    lib, app = project.modules
+
+    # Money is only declared in app.hpp
+    assert 'extern template' not in lib.generator.header
+    assert 'extern template Money same<Money>(Money x);' in app.generator.header
+    assert 'extern template int same<int>(int x);' in app.generator.header
+    assert project.instantiations == '#include "app.hpp"\ntemplate Money same<Money>(Money x);\ntemplate int same<int>(int x);\n'
+    compile_project(project)
+
+def test_extern_templates_threshold_counts_the_project(transpile):
+    project = transpile({'lib.bic': LIB, 'app.bic': APP, 'more.bic': 'import "lib.bic";\n\nfour(x : int) -> int { ret same<int>(x); }\n'}, extern_templates=2)
+    lib, app, more = project.modules
+
+    # same<int> is used once in each of two modules
+    assert 'same<int>' in project.instantiations
+    assert 'same<Money>' not in project.instantiations
+    assert 'extern template int same<int>(int x);' in more.generator.header